@@ -0,0 +1,423 @@
+import argparse
+import collections
+import gc
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Micro-benchmarks for the game-logic hot paths. Each benchmark is timed over
+# a sweep of the parameter its cost should depend on (catches in the history,
+# live particles or species in the catalog) so that growth shows up, not just
+# one number. Results are written as JSON and two runs can be compared:
+#
+#   python benchmarks.py list
+#   python benchmarks.py run [--only catch] [--quick] [--output base.json]
+#   python benchmarks.py compare base.json new.json
+#
+# The game runs headless against a throwaway save directory, so benchmarking
+# never touches ~/.forest_fishing.
+
+REPEAT = 5  # Samples per sweep point
+MIN_TIME = 0.05  # Seconds each sample runs for at least
+CATCH_SWEEP = (0, 100, 1000, 10000, 100000)  # Catches already in the history
+PARTICLE_SWEEP = (0, 10, 100, 1000, 10000)  # Live particles
+SPECIES_SWEEP = (10, 100, 1000, 10000)  # Species in the catalog
+QUICK_POINTS = 3  # Sweep points kept by --quick
+COMPARE_THRESHOLD = 0.10  # Relative change in the median reported as slower/faster
+
+BENCHMARKS = {}  # name -> (sweep parameter or None, sweep, setup)
+
+def benchmark(name, parameter=None, sweep=(None,)):
+    # Registers setup(game, size) -> (step, after): step() is timed, after()
+    # (or None) runs untimed after each call to undo what step changed
+    def register(setup):
+        BENCHMARKS[name] = (parameter, sweep, setup)
+        return setup
+    return register
+
+def import_game(home):
+    # main initializes pygame and picks its save paths on import
+    os.environ["HOME"] = home
+    os.environ["USERPROFILE"] = home
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import main
+    return main
+
+class Fixtures:
+    # The game under test and the sweep state built for it. One Game is
+    # created for the whole run; every sweep point resets the parts of it
+    # the benchmark touches.
+    def __init__(self, main):
+        self.main = main
+        self.game = main.Game()
+        self.base_species = dict(main.FISH_SPECIES)
+        self.catalog_size = len(self.base_species)
+        self.histories = {}
+        # Let startup work on background threads finish before timing
+        self.game.sound_manager.wait()
+        while self.game.world.chunks.pending:
+            time.sleep(0.01)
+            
+    def history(self, size):
+        # size catches spread over the catalog, the same for every run
+        if size not in self.histories:
+            main = self.main
+            rng = random.Random(size)
+            names = list(main.FISH_SPECIES)
+            history = []
+            for _ in range(size):
+                species = rng.choice(names)
+                data = main.FISH_SPECIES[species]
+                history.append(main.Fish(species, rng.uniform(*data["weight_range"]),
+                                         rng.uniform(*data["length_range"]), data["rarity"],
+                                         data["difficulty"], rng.choice(data["bait"]),
+                                         rng.randrange(10 ** 7)))
+            self.histories[size] = history
+        return self.histories[size]
+        
+    def reset(self, catches=0):
+        game = self.game
+        game.reset_progress()
+        game.travel_target = None
+        game.caught_fish = list(self.history(catches))
+        game.catches_changed()
+        game.state = self.main.GameState.PLAYING
+        game.effects.particles.clear()
+        game.effects.ripples.clear()
+        return game
+        
+    def set_catalog(self, size):
+        # Pads FISH_SPECIES with numbered copies of the real species
+        size = max(size, len(self.base_species))
+        if size == self.catalog_size:
+            return
+        self.catalog_size = size
+        catalog = self.main.FISH_SPECIES
+        catalog.clear()
+        catalog.update(self.base_species)
+        names = list(self.base_species)
+        for i in range(len(catalog), size):
+            name = names[i % len(names)]
+            catalog[f"{name} {i}"] = self.base_species[name]
+        self.histories.clear()
+        
+    def close(self):
+        self.set_catalog(0)
+        game = self.game
+        game.history.close()
+        game.layers.close()
+        game.capture.close()
+        self.main.pygame.quit()
+
+@benchmark("game.catch_fish", "catches", CATCH_SWEEP)
+def bench_catch_fish(fixtures, size):
+    # Every call lands a fish on size earlier catches with the quests open,
+    # so the quest update recounts the history as after a real catch. The
+    # species is picked between calls rather than inside them.
+    main = fixtures.main
+    game = fixtures.reset(size)
+    names = list(main.FISH_SPECIES)
+    statistics = main.CatchStatistics.from_catches(game.caught_fish)
+    
+    def prepare():
+        game.statistics = main.CatchStatistics()
+        game.statistics.merge(statistics)
+        game.quests = game.create_quests()
+        game.rewards_earned = []
+        game.state = main.GameState.PLAYING
+        game.effects.particles.clear()
+        game.effects.ripples.clear()
+        game.fishing_minigame.fish = random.choice(names)
+        
+    def after():
+        game.caught_fish.pop()
+        prepare()
+    prepare()
+    return game.catch_fish, after
+
+@benchmark("game.update_quests", "catches", CATCH_SWEEP)
+def bench_update_quests(fixtures, size):
+    # Every call sees a changed history and open quests, as after a catch
+    game = fixtures.reset(size)
+    fish = fixtures.history(1)[0]
+    
+    def after():
+        game.quests = game.create_quests()
+        game.rewards_earned = []
+        game.catches_changed()
+    after()
+    return lambda: game.update_quests(fish), after
+
+@benchmark("game.start_fishing", "species", SPECIES_SWEEP)
+def bench_start_fishing(fixtures, size):
+    main = fixtures.main
+    fixtures.set_catalog(size)
+    game = fixtures.reset()
+    world = game.world
+    game.fish_population = main.FishPopulation(
+        (0, main.WATER_TOP, world.width, main.SCREEN_HEIGHT - main.WATER_TOP),
+        count=main.POPULATION_SIZE * world.width // main.SCREEN_WIDTH,
+        species_pool=list(main.FISH_SPECIES), seed=size)
+    water = (main.WATER_TOP + main.SCREEN_HEIGHT) // 2
+    
+    def step():
+        game.cast_target = (random.uniform(0, world.width), water)
+        game.start_fishing()
+        
+    def after():
+        game.state = main.GameState.PLAYING
+        game.fishing_minigame.is_active = False
+        game.effects.particles.clear()
+        game.effects.ripples.clear()
+    return step, after
+
+@benchmark("minigame.update", "species", SPECIES_SWEEP)
+def bench_minigame_update(fixtures, size):
+    fixtures.set_catalog(size)
+    minigame = fixtures.main.FishingMinigame()
+    minigame.start_fishing(random.choice(list(fixtures.main.FISH_SPECIES)), now=0)
+    minigame.max_escape_time = math.inf
+    now = iter(range(sys.maxsize))
+    return lambda: minigame.update(next(now)), None
+
+@benchmark("minigame.set_hook", "species", SPECIES_SWEEP)
+def bench_set_hook(fixtures, size):
+    fixtures.set_catalog(size)
+    names = list(fixtures.main.FISH_SPECIES)
+    minigame = fixtures.main.FishingMinigame()
+    return minigame.set_hook, lambda: minigame.start_fishing(random.choice(names))
+
+def add_particles(effects, count):
+    # Particles that outlive the benchmark, spread over the screen
+    rng = random.Random(count)
+    for _ in range(count):
+        effects.add_particle(rng.uniform(0, 1200), rng.uniform(0, 800), (255, 255, 0),
+                             (rng.uniform(-0.01, 0.01), rng.uniform(-0.01, 0.01)))
+        effects.particles[-1]["life"] = effects.particles[-1]["max_life"] = sys.maxsize
+
+@benchmark("effects.update", "particles", PARTICLE_SWEEP)
+def bench_effects_update(fixtures, size):
+    effects = fixtures.main.VisualEffects()
+    add_particles(effects, size)
+    return effects.update, None
+
+@benchmark("effects.draw", "particles", PARTICLE_SWEEP)
+def bench_effects_draw(fixtures, size):
+    effects = fixtures.main.VisualEffects()
+    add_particles(effects, size)
+    return effects.draw, None
+
+@benchmark("player.move")
+def bench_player_move(fixtures, size):
+    main = fixtures.main
+    player = main.HumanCharacter(main.SCREEN_WIDTH // 2, main.SCREEN_HEIGHT // 2)
+    keys = collections.defaultdict(bool, {main.pygame.K_RIGHT: True})
+    # Walks into the world edge and stays there, clamped
+    return lambda: player.move(keys, main.WORLD_WIDTH), None
+
+@benchmark("player.draw")
+def bench_player_draw(fixtures, size):
+    main = fixtures.main
+    player = main.HumanCharacter(main.SCREEN_WIDTH // 2, main.SCREEN_HEIGHT // 2)
+    player.animation_state = "walking"
+    screen = fixtures.game.screen
+    return lambda: player.draw(screen), None
+
+def inventory_sort(mode):
+    def setup(fixtures, size):
+        # The inventory re-sorts (and regroups for search) whenever catches change
+        game = fixtures.reset(size)
+        view = game.inventory_list
+        view.sort_index = [label for label, _, _ in view.sort_modes].index(mode)
+        view.set_items(game.caught_fish, game.catch_version)
+        return view.rebuild, None
+    return setup
+
+for mode in ("Rarity", "Weight", "Newest", "Species"):
+    benchmark(f"inventory.sort.{mode.lower()}", "catches", CATCH_SWEEP)(inventory_sort(mode))
+
+def time_calls(step, after, number):
+    # Seconds per call over number calls
+    if after is None:
+        start = time.perf_counter()
+        for _ in range(number):
+            step()
+        return (time.perf_counter() - start) / number
+    total = 0.0
+    for _ in range(number):
+        start = time.perf_counter()
+        step()
+        total += time.perf_counter() - start
+        after()
+    return total / number
+
+def measure(step, after, repeat, min_time):
+    # Like timeit: double the calls per sample until a sample lasts
+    # min_time, then take repeat samples with the collector off
+    number = 1
+    while True:
+        per_call = time_calls(step, after, number)
+        if per_call * number >= min_time or number >= 1 << 24:
+            break
+        number *= 2
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        samples = [time_calls(step, after, number) for _ in range(repeat)]
+    finally:
+        if enabled:
+            gc.enable()
+    return number, samples
+
+def summarize(size, number, samples):
+    micros = [sample * 1e6 for sample in samples]
+    return {
+        "size": size,
+        "calls_per_sample": number,
+        "samples_us": [round(value, 4) for value in micros],
+        "min_us": round(min(micros), 4),
+        "median_us": round(statistics.median(micros), 4),
+        "mean_us": round(statistics.mean(micros), 4),
+        "stdev_us": round(statistics.stdev(micros), 4) if len(micros) > 1 else 0.0
+    }
+
+def growth(points):
+    # Exponent k of cost ~ size^k between the two largest sweep points:
+    # ~0 is constant, ~1 linear, ~2 quadratic. The small end of a sweep is
+    # dominated by fixed costs, so only the top says where it is heading.
+    points = [point for point in points if point["size"]]
+    if len(points) < 2:
+        return None
+    low, high = points[-2], points[-1]
+    return round(math.log(high["median_us"] / low["median_us"]) / math.log(high["size"] / low["size"]), 3)
+
+def git_revision():
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=here,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "diff", "--quiet", "HEAD"], cwd=here).returncode != 0
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return revision + ("-dirty" if dirty else "")
+
+def run_main(args):
+    names = [name for name in BENCHMARKS if not args.only or any(part in name for part in args.only)]
+    if not names:
+        print("No benchmark matches", file=sys.stderr)
+        return 1
+    home = tempfile.mkdtemp(prefix="fishing-bench-")
+    try:
+        main = import_game(home)
+        fixtures = Fixtures(main)
+        results = {}
+        try:
+            for name in names:
+                parameter, sweep, setup = BENCHMARKS[name]
+                if args.quick:
+                    sweep = sweep[:QUICK_POINTS]
+                points = []
+                for size in sweep:
+                    random.seed(0)
+                    if parameter != "species":
+                        fixtures.set_catalog(0)
+                    step, after = setup(fixtures, size)
+                    number, samples = measure(step, after, args.repeat, args.min_time)
+                    point = summarize(size, number, samples)
+                    points.append(point)
+                    label = name if parameter is None else f"{name} {parameter}={size}"
+                    print(f"{label:<44} {point['median_us']:>12.2f} us  "
+                          f"(min {point['min_us']:.2f}, stdev {point['stdev_us']:.2f}, "
+                          f"{number} calls x {args.repeat})", flush=True)
+                results[name] = {"parameter": parameter, "points": points, "growth": growth(points)}
+                if results[name]["growth"] is not None:
+                    print(f"{name:<44} growth ~ {parameter}^{results[name]['growth']}", flush=True)
+        finally:
+            fixtures.close()
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+        
+    report = {
+        "revision": git_revision(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pygame": main.pygame.version.ver,
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "min_time": args.min_time,
+        "benchmarks": results
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+    return 0
+
+def compare_main(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    print(f"base {base.get('revision')}  ->  new {new.get('revision')}")
+    changed = 0
+    for name, result in new["benchmarks"].items():
+        before = base["benchmarks"].get(name)
+        if before is None:
+            continue
+        old_points = {point["size"]: point for point in before["points"]}
+        for point in result["points"]:
+            old = old_points.get(point["size"])
+            if old is None or not old["median_us"]:
+                continue
+            ratio = point["median_us"] / old["median_us"]
+            verdict = ""
+            if ratio > 1 + args.threshold:
+                verdict = "slower"
+            elif ratio < 1 - args.threshold:
+                verdict = "faster"
+            changed += bool(verdict)
+            label = name if result["parameter"] is None else f"{name} {result['parameter']}={point['size']}"
+            print(f"{label:<44} {old['median_us']:>12.2f} -> {point['median_us']:>12.2f} us  "
+                  f"x{ratio:.2f} {verdict}")
+    print(f"{changed} changed by more than {args.threshold:.0%}")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the fishing game's hot paths")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="List the benchmarks and their sweeps")
+    run = commands.add_parser("run", help="Run the benchmarks")
+    run.add_argument("--only", action="append", help="Only benchmarks whose name contains this (repeatable)")
+    run.add_argument("--repeat", type=int, default=REPEAT, help="Samples per sweep point")
+    run.add_argument("--min-time", type=float, default=MIN_TIME, help="Minimum seconds per sample")
+    run.add_argument("--quick", action="store_true", help=f"Only the first {QUICK_POINTS} points of each sweep")
+    run.add_argument("--output", help="Write the results to this JSON file")
+    compare = commands.add_parser("compare", help="Compare two result files")
+    compare.add_argument("base")
+    compare.add_argument("new")
+    compare.add_argument("--threshold", type=float, default=COMPARE_THRESHOLD,
+                         help="Relative change in the median to report")
+    args = parser.parse_args(argv)
+    
+    if args.command == "list":
+        for name, (parameter, sweep, _) in BENCHMARKS.items():
+            print(name if parameter is None else f"{name}: {parameter} = {', '.join(map(str, sweep))}")
+        return 0
+    if args.command == "run":
+        if args.repeat < 1:
+            parser.error("--repeat must be at least 1")
+        return run_main(args)
+    return compare_main(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,168 @@
+import os
+# pygame's greeting would end up in `export -` output
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
 import pygame
 import sys
+import csv
+import gzip
+import time
 import random
 import math
 import json
+import argparse
+import threading
+import queue
+import gc
+import tracemalloc
+import tempfile
+import shutil
+import functools
+import struct
+import zlib
+import hashlib
+import weakref
+import itertools
+import bisect
+import sqlite3
+import io
+import wave
+import array
+import operator
+import socket
+import select
+import multiprocessing
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from contextlib import nullcontext
+from collections import deque, OrderedDict
+from datetime import datetime
 from enum import Enum
 from dataclasses import dataclass
 from typing import List, Dict, Optional, Tuple
 
+try:
+    import numpy
+except ImportError:
+    # Sound synthesis falls back to pure Python
+    numpy = None
+
 # Initialize Pygame
 pygame.init()
-pygame.mixer.init()
+try:
+    pygame.mixer.init()
+except pygame.error:
+    # No audio device (e.g. command-line tools on a server); sound is optional
+    pass
 
 # Constants
 SCREEN_WIDTH = 1200
 SCREEN_HEIGHT = 800
 FPS = 60
 
+# Save data
+SAVE_DIR = os.path.join(os.path.expanduser("~"), ".forest_fishing")
+HISTORY_PATH = os.path.join(SAVE_DIR, "history.jsonl")
+EXPORT_DIR = os.path.join(SAVE_DIR, "exports")
+EXPORT_CHUNK_ROWS = 5000  # Rows buffered before each write during export
+AUTOSAVE_PATH = os.path.join(SAVE_DIR, "autosave.json")
+AUTOSAVE_INTERVAL = 2.0  # Minimum seconds between saves; bursts of changes coalesce
+AUTOSAVE_BUDGET_US = 200  # Main-thread time per frame allowed for snapshotting
+AUTOSAVE_COPY_CHUNK = 512  # Caught fish copied between budget checks
+PROFILE_DB_PATH = os.path.join(SAVE_DIR, "profiles.db")
+PROFILE_ENV = "FISHING_PROFILE"  # "<name>" or "<name>:<database>"; keeps progress per player in SQLite
+PROFILE_FLUSH_INTERVAL = 0.5  # Seconds queued writes wait to be committed together
+PROFILE_PAGE_ROWS = 64  # Catches fetched per query when paging through a profile
+PROFILE_PAGE_CACHE = 32  # Pages kept per sorted/filtered view
+CAPTURE_DIR = os.path.join(SAVE_DIR, "captures")
+CAPTURE_ENV = "FISHING_CAPTURE"  # "png" or "raw", optionally "raw:<directory>"; records from startup
+CAPTURE_POOL_SIZE = 6  # Frame buffers; while all wait for the encoder new frames are dropped
+CAPTURE_EVERY = 2  # Record every Nth drawn frame (30 FPS at 60 FPS)
+CAPTURE_PNG_LEVEL = 1  # zlib level for captured PNGs: fast rather than small
+
+# LAN tournaments (opt-in); the server is tournament_server.py
+TOURNAMENT_ENV = "FISHING_TOURNAMENT"  # "<host>[:<port>]" of a server run with tournament_server.py
+TOURNAMENT_PORT = 8765
+TOURNAMENT_BATCH_INTERVAL = 0.25  # Seconds catches are collected before being sent together
+TOURNAMENT_QUEUE_LIMIT = 10000  # Unsent catches kept while the server is unreachable
+TOURNAMENT_TIMEOUT = 5.0  # Seconds before a connect or send is given up
+TOURNAMENT_RECONNECT_MIN = 1.0  # Backoff between connection attempts, doubling up to the max
+TOURNAMENT_RECONNECT_MAX = 30.0
+TOURNAMENT_AWAITING_LIMIT = 256  # Sent catches watched for a leaderboard placing
+
+# Debug instrumentation (opt-in through environment variables)
+INSTRUMENT_ENV = "FISHING_INSTRUMENT"  # "1" for a summary at exit, or a path for per-frame JSON Lines
+INSTRUMENT_TRACE_DEPTH = 8  # Stack frames kept per traced allocation
+INSTRUMENT_TOP_SITES = 15  # Allocation sites listed by the F9 dump
+TRACE_ENV = "FISHING_TRACE"  # Path prefix for Chrome trace files, e.g. /tmp/fishing-trace
+TRACE_BUFFER_EVENTS = 262144  # Preallocated ring of begin/end events
+TRACE_WINDOW_FRAMES = 120  # Frames per capture window
+TRACE_BUDGET_MS = 1000 / 60  # Frames slower than this trigger an automatic capture
+BLIT_AUDIT_ENV = "FISHING_BLIT_AUDIT"  # "1" reports blits that need per-pixel format conversion
+
+# Garbage collection: long-lived state is frozen and full collections run
+# between frames instead of whenever the collector decides to
+GC_ENV = "FISHING_GC"  # "off" keeps Python's default collector, "stats" prints pause statistics at exit
+GC_THRESHOLDS = (2000, 10, 1000000)  # Young, middle, oldest; the oldest only runs when scheduled
+GC_IDLE_INTERVAL = 5.0  # Seconds between full collections on idle screens
+GC_PLAY_INTERVAL = 60.0  # Seconds between full collections during play, in a frame's spare time
+GC_PAUSE_SAMPLES = 1000  # Recent pauses kept per generation for the statistics
+
+# Scrolling world
+WORLD_WIDTH = SCREEN_WIDTH * 6  # Width of every location in pixels
+CHUNK_WIDTH = 400  # Width of one generated background chunk
+CHUNK_CACHE_BYTES = 64 * 1024 * 1024  # Memory cap for cached chunks
+CHUNK_COLORKEY = (255, 0, 255)  # Transparent pixels in chunk surfaces
+MOUNTAIN_SPACING = 300  # Distance between mountain peaks in the mountain layer
+
+COMPOSITOR_WORKERS = 0  # Threads rendering independent layers; 0 renders them inline
+COMPOSITOR_WORKERS_ENV = "FISHING_COMPOSITOR_WORKERS"  # Overrides COMPOSITOR_WORKERS
+
+MENU_DECORATION_SEED = 7  # Fixed so the menu forest does not change between frames
+
+# Type-ahead search in the inventory and glossary
+SEARCH_NGRAM = 3  # Longest substring indexed; longer queries intersect their n-grams
+SEARCH_HIGHLIGHT = (110, 100, 20)  # Background behind matched text
+
+# Fish portraits, drawn from the species data and cached on disk as one atlas
+PORTRAIT_CACHE_DIR = os.path.join(SAVE_DIR, "cache")
+PORTRAIT_VERSION = 1  # Bump when the drawing changes so cached atlases are rebuilt
+PORTRAIT_SIZES = {"panel": (160, 80), "row": (64, 32)}  # Variants by where they are shown
+PORTRAIT_SHADOW_WIDTHS = (24, 36, 48, 60)  # Silhouettes for fish shadows, which are 20-60 px wide
+PORTRAIT_SHADOW_ALPHAS = 4  # Opacity steps of shadows by depth
+PORTRAIT_SUPERSAMPLE = 2  # The master drawing is this much larger than the panel and scaled down
+PORTRAIT_ATLAS_WIDTH = 512
+
+# Synthesized sound effects, cached on disk as WAV files
+SOUND_CACHE_DIR = os.path.join(SAVE_DIR, "cache")
+SOUND_VERSION = 1  # Bump when the synthesis changes so cached sounds are rebuilt
+SOUND_VOLUME = 0.6  # Master volume applied to every effect
+SOUND_ATTACK = 0.003  # Seconds of fade-in so sounds do not start with a click
+# Missing sounds are synthesized in a worker process. On Linux it is forked,
+# since a spawned one would import this file again, pygame.init() included;
+# elsewhere forking a process with SDL loaded is unsafe and the default is used
+SOUND_PROCESS_CONTEXT = multiprocessing.get_context("fork") if sys.platform.startswith("linux") else None
+
+# Water band and fish population
+WATER_TOP = SCREEN_HEIGHT - 200
+WATER_BAND_HEIGHT = SCREEN_HEIGHT - WATER_TOP
+WAVE_AMPLITUDE = 3  # Pixels the water lines bob up and down
+POPULATION_SIZE = 300  # Fish swimming in each screen width of the lake
+POPULATION_CELL_SIZE = 40  # Spatial-hash cell size in pixels
+POPULATION_REBIN_FRAMES = 30  # Every fish is re-binned at least this often
+BITE_RADIUS = 60  # Fish within this distance of the cast point can bite
+BITE_INTEREST = 0.035  # Per-fish chance contribution to a bite
+SHADOW_DEPTH = 0.3  # Fish shallower than this cast a visible shadow
+MAX_VISIBLE_SHADOWS = 60
+
+CATCH_MESSAGE_SHADE_HEIGHT = 60  # Tallest catch message backing, in pixels
+
+HOOK_LATENCY_SAMPLES = 100  # Recent hook presses kept for the latency readout
+EVENT_POLL_MS = 2  # While waiting for the next frame, input is read this often
+
+# Catch statistics
+SKETCH_K = 256  # KLL accuracy parameter; rank error is roughly 1.7 / k
+STATS_BADGE_MIN_CATCHES = 100  # Catches of a species needed before "top 1%" means anything
+
 # Colors
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -56,6 +203,16 @@ class Rarity(Enum):
     TROPHY = "Trophy"
     RECORD = "Record Fish"
 
+RARITY_COLORS = {
+    Rarity.CARDBOARD: GRAY,
+    Rarity.BRONZE: BRONZE,
+    Rarity.SILVER: SILVER,
+    Rarity.GOLD: GOLD,
+    Rarity.DIAMOND: DIAMOND,
+    Rarity.TROPHY: ORANGE,
+    Rarity.RECORD: PURPLE
+}
+
 # Reward types
 class RewardType(Enum):
     BAIT = "bait"
@@ -174,6 +331,84 @@ FISH_SPECIES = {
     }
 }
 
+# Relative abundance of each rarity in the fish population
+SPECIES_ABUNDANCE = {
+    Rarity.CARDBOARD: 30,
+    Rarity.BRONZE: 20,
+    Rarity.SILVER: 15,
+    Rarity.GOLD: 10,
+    Rarity.DIAMOND: 5,
+    Rarity.TROPHY: 2,
+    Rarity.RECORD: 1
+}
+
+@dataclass
+class IdlePolicy:
+    enabled: bool = True  # Block on input instead of polling when nothing animates
+    wake_ms: int = 1000  # Timer wake-up while idle, for background work
+    redraw_on_wake: bool = False  # Redraw on timer wake-ups even without input
+
+# States not listed here always run at full frame rate
+IDLE_POLICIES = {
+    GameState.MENU: IdlePolicy(),
+    GameState.INVENTORY: IdlePolicy(),
+    GameState.GLOSSARY: IdlePolicy(),
+    GameState.QUEST: IdlePolicy(),
+    GameState.FISH_CAUGHT: IdlePolicy()  # See MODAL_WATER_MS
+}
+
+# Modal screens drawn over a frozen, darkened picture of the world
+MODAL_DARKNESS = {
+    GameState.FISHING: 128,  # 0 keeps the world as is, 255 is black
+    GameState.FISH_CAUGHT: 180
+}
+MODAL_BLUR_SCALE = 1  # Downscale factor for blurring the backdrop; 1 disables the blur
+MODAL_WATER_MS = 0  # Interval between water updates behind modals; 0 freezes the water
+if MODAL_WATER_MS:
+    # Wake up to move the water behind the inspection panel
+    IDLE_POLICIES[GameState.FISH_CAUGHT] = IdlePolicy(wake_ms=MODAL_WATER_MS, redraw_on_wake=True)
+
+@dataclass
+class Location:
+    name: str
+    seed: int  # Scene generation is fully determined by the seed
+    ground_color: Tuple[int, int, int]
+    mountain_color: Tuple[int, int, int]
+    canopy_color: Tuple[int, int, int]
+    trunk_color: Tuple[int, int, int]
+    water_palette: Tuple[int, int, int]  # Base color of the water gradient
+    species: List[str]
+    unlock_reward: Optional[str] = None  # Reward value that unlocks it
+
+LOCATIONS = {
+    "forest": Location("European Forest", 1, DARK_GREEN, (50, 100, 50), GREEN, BROWN,
+                       (0, 100, 150), list(FISH_SPECIES.keys())),
+    "tropical": Location("Tropical Waters", 2, (60, 160, 60), (90, 120, 80), (120, 220, 60),
+                         (160, 110, 60), (0, 130, 150),
+                         [name for name, data in FISH_SPECIES.items()
+                          if data["location"] in ("South America", "Africa", "Deep Ocean", "Abyssal Depths")],
+                         "tropical")
+}
+
+@dataclass
+class ParallaxLayer:
+    name: str
+    parallax: float  # Scroll speed relative to the camera; 1.0 moves with the world
+    top: int  # Screen y of the layer's chunks
+    height: int
+    trees: int = 0  # Trees per screen width, for tree layers
+    depth: int = 0  # Tree layer index, as in the original single-screen forest
+
+# Back to front. The water band is drawn between the trees and the shore.
+PARALLAX_LAYERS = [
+    ParallaxLayer("mountains", 0.25, SCREEN_HEIGHT//2 - 140, 140),
+    ParallaxLayer("trees-far", 0.5, -30, SCREEN_HEIGHT//2 + 80, trees=15, depth=0),
+    ParallaxLayer("trees-mid", 0.75, -30, SCREEN_HEIGHT//2 + 80, trees=10, depth=1),
+    ParallaxLayer("trees-near", 1.0, -30, SCREEN_HEIGHT//2 + 80, trees=5, depth=2),
+    ParallaxLayer("shore", 1.0, WATER_TOP - 30, 60),
+]
+BACKDROP_LAYERS = ("mountains", "trees-far", "trees-mid", "trees-near")
+
 @dataclass
 class Fish:
     species: str
@@ -185,6 +420,517 @@ class Fish:
     catch_time: str
     personal_record: bool = False
 
+class Tracer:
+    # Opt-in timeline tracer. Begin/end events are written into preallocated
+    # ring-buffer lists under a lock that layer workers share with the game
+    # thread, so recording an event costs an uncontended lock and four list
+    # stores, and no allocation. Nothing is written to disk until a capture window is
+    # taken: either on request (F10) for the next TRACE_WINDOW_FRAMES
+    # frames, or automatically when a frame runs over budget, in which case
+    # the window holds the frames leading up to the slow one. Windows are
+    # written as Chrome Trace Event JSON (chrome://tracing, Perfetto) on a
+    # background thread.
+    def __init__(self):
+        self.enabled = False
+        self.null_span = nullcontext()
+        
+    def enable(self, path_prefix, capacity=TRACE_BUFFER_EVENTS, window_frames=TRACE_WINDOW_FRAMES,
+               budget_ms=TRACE_BUDGET_MS):
+        self.path_prefix = path_prefix
+        self.capacity = capacity
+        self.window_frames = window_frames
+        self.budget = budget_ms / 1000
+        self.names = [None] * capacity
+        self.phases = [None] * capacity
+        self.times = [0.0] * capacity
+        self.threads = [0] * capacity
+        # Layer workers record too. An event is written under the lock, so
+        # count only ever grows and every slot below it is complete.
+        self.lock = threading.Lock()
+        self.count = 0  # Total events recorded; slot = count % capacity
+        self.frame_starts = deque(maxlen=window_frames)
+        self.frame_start_time = 0.0
+        self.capture_start = None
+        self.capture_frames_left = 0
+        self.cooldown_frames = 0
+        self.captures = 0
+        self.enabled = True
+        
+    def record(self, name, phase):
+        with self.lock:
+            slot = self.count % self.capacity
+            self.names[slot] = name
+            self.phases[slot] = phase
+            self.times[slot] = time.perf_counter()
+            self.threads[slot] = threading.get_ident()
+            self.count += 1
+        
+    def begin(self, name):
+        if self.enabled:
+            self.record(name, "B")
+            
+    def end(self, name):
+        if self.enabled:
+            self.record(name, "E")
+            
+    def span(self, name):
+        if not self.enabled:
+            return self.null_span
+        return TraceSpan(self, name)
+        
+    def request_capture(self):
+        if self.enabled and self.capture_start is None:
+            self.capture_frames_left = self.window_frames
+            
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        if self.capture_frames_left and self.capture_start is None:
+            self.capture_start = self.count
+        self.frame_starts.append(self.count)
+        self.frame_start_time = time.perf_counter()
+        self.record("frame", "B")
+        
+    def end_frame(self):
+        if not self.enabled:
+            return
+        self.record("frame", "E")
+        if self.cooldown_frames:
+            self.cooldown_frames -= 1
+            
+        if self.capture_start is not None:
+            self.capture_frames_left -= 1
+            if self.capture_frames_left <= 0:
+                self.flush(self.capture_start, "manual")
+                self.capture_start = None
+        elif time.perf_counter() - self.frame_start_time > self.budget and not self.cooldown_frames:
+            # Keep the frames that led up to the slow one
+            self.flush(self.frame_starts[0], "over-budget")
+            self.cooldown_frames = self.window_frames
+            
+    def flush(self, start, reason):
+        # Copied under the lock, so no worker overwrites or half-writes a slot meanwhile
+        with self.lock:
+            start = max(start, self.count - self.capacity)
+            slots = [i % self.capacity for i in range(start, self.count)]
+            events = [(self.names[i], self.phases[i], self.times[i], self.threads[i]) for i in slots]
+        self.captures += 1
+        path = f"{self.path_prefix}-{self.captures:04d}-{reason}.json"
+        threading.Thread(target=write_chrome_trace, args=(path, events), daemon=True).start()
+
+class TraceSpan:
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+        
+    def __enter__(self):
+        self.tracer.record(self.name, "B")
+        
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, "E")
+        return False
+
+def write_chrome_trace(path, events):
+    # Convert raw (name, phase, seconds, thread) records to Trace Event JSON,
+    # dropping end events whose begin fell outside the captured window
+    depth = {}
+    trace_events = []
+    pid = os.getpid()
+    for name, phase, timestamp, thread in events:
+        if phase == "E":
+            if not depth.get(thread):
+                continue
+            depth[thread] -= 1
+        else:
+            depth[thread] = depth.get(thread, 0) + 1
+        trace_events.append({"name": name, "ph": phase, "ts": round(timestamp * 1000000, 1),
+                             "pid": pid, "tid": thread})
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
+
+TRACER = Tracer()
+
+def traced(name):
+    # Record a span around every call while tracing is enabled
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return function(*args, **kwargs)
+            TRACER.record(name, "B")
+            try:
+                return function(*args, **kwargs)
+            finally:
+                TRACER.record(name, "E")
+        return wrapper
+    return decorate
+
+class AssetPipeline:
+    # Every generated or loaded surface goes through here so that it is in
+    # the display's pixel format: opaque surfaces through convert(), per-pixel
+    # alpha through convert_alpha(), and colorkey surfaces through convert()
+    # with RLE acceleration. A surface in any other format makes SDL convert
+    # every pixel on every blit. Long-lived surfaces are tracked and converted
+    # again when the display mode changes; caches register a callback to drop
+    # whatever they built in the old format.
+    def __init__(self):
+        self.tracked = []  # (weakref to owner, attribute, kind)
+        self.listeners = []
+        self.audit = None
+        
+    def ready(self):
+        return pygame.display.get_surface() is not None
+        
+    def prepare(self, surface, kind=None):
+        if kind is None:
+            if surface.get_flags() & pygame.SRCALPHA:
+                kind = "alpha"
+            elif surface.get_colorkey() is not None:
+                kind = "colorkey"
+            else:
+                kind = "opaque"
+        colorkey = surface.get_colorkey()
+        if self.ready():
+            surface = surface.convert_alpha() if kind == "alpha" else surface.convert()
+        if kind == "colorkey":
+            surface.set_colorkey(colorkey, pygame.RLEACCEL)
+        return surface
+        
+    def new(self, size, kind="opaque"):
+        display = pygame.display.get_surface()
+        if kind == "opaque" and display is not None:
+            # Created directly in the display format; nothing to convert
+            return pygame.Surface(size, 0, display)
+        return self.prepare(pygame.Surface(size, pygame.SRCALPHA if kind == "alpha" else 0), kind)
+        
+    def track(self, owner, attribute, kind=None):
+        setattr(owner, attribute, self.prepare(getattr(owner, attribute), kind))
+        self.tracked.append((weakref.ref(owner), attribute, kind))
+        
+    def on_display_change(self, callback):
+        self.listeners.append(callback)
+        
+    def display_changed(self):
+        # Call after pygame.display.set_mode or when the window moved to a
+        # display with a different pixel format
+        alive = []
+        for owner_ref, attribute, kind in self.tracked:
+            owner = owner_ref()
+            if owner is None:
+                continue
+            surface = getattr(owner, attribute)
+            if surface is not None:
+                setattr(owner, attribute, self.prepare(surface, kind))
+            alive.append((owner_ref, attribute, kind))
+        self.tracked = alive
+        for callback in self.listeners:
+            callback()
+            
+    def enable_audit(self):
+        # Debug mode: surfaces created from now on check every blit onto
+        # them. convert() and font.render() return plain Surfaces, so the
+        # game draws into an audited back buffer (see back_buffer) to cover
+        # the blits onto the screen.
+        if self.audit is not None:
+            return
+        audit = self.audit = BlitAudit()
+        base_surface = pygame.Surface
+        
+        class AuditedSurface(base_surface):
+            def blit(self, source, dest, area=None, special_flags=0):
+                audit.check(self, source, special_flags)
+                return super().blit(source, dest, area, special_flags)
+                
+            def blits(self, blit_sequence, doreturn=1):
+                blit_sequence = list(blit_sequence)
+                for item in blit_sequence:
+                    audit.check(self, item[0], item[3] if len(item) > 3 else 0)
+                return super().blits(blit_sequence, doreturn)
+                
+        pygame.Surface = AuditedSurface
+        
+    def back_buffer(self, display, size=None):
+        # The surface the game draws into: the display itself, or while
+        # auditing or when the window is not the logical size, a copy in the
+        # same format that is blitted (scaled if need be) to the display
+        # before each flip
+        size = size or display.get_size()
+        if self.audit is None and size == display.get_size():
+            return display
+        return pygame.Surface(size, 0, display)
+
+class BlitAudit:
+    # Counts blits that miss SDL's fast paths, per call site, and prints
+    # each site the first time it shows up
+    def __init__(self):
+        self.sites = {}  # "file:line function" -> [count, reason]
+        
+    def slow_path(self, target, source, special_flags):
+        if source.get_bitsize() == 8:
+            return "8-bit palette source"
+        if (source.get_bitsize() != target.get_bitsize() or
+                source.get_masks()[:3] != target.get_masks()[:3]):
+            return (f"format {source.get_bitsize()}bpp {source.get_masks()[:3]} onto "
+                    f"{target.get_bitsize()}bpp {target.get_masks()[:3]}")
+        if source.get_colorkey() is not None and not source.get_flags() & pygame.RLEACCELOK:
+            return "colorkey without RLE"
+        return None
+        
+    def check(self, target, source, special_flags):
+        reason = self.slow_path(target, source, special_flags)
+        if reason is None:
+            return
+        caller = sys._getframe(2)
+        site = f"{os.path.basename(caller.f_code.co_filename)}:{caller.f_lineno} {caller.f_code.co_name}"
+        entry = self.sites.get(site)
+        if entry is None:
+            self.sites[site] = [1, reason]
+            print(f"Slow blit at {site}: {reason}")
+        else:
+            entry[0] += 1
+            
+    def report(self):
+        if not self.sites:
+            print("Blit audit: no slow-path blits")
+            return
+        print("Blit audit: slow-path blits by call site")
+        for site, (count, reason) in sorted(self.sites.items(), key=lambda item: -item[1][0]):
+            print(f"  {count:8d}  {site}  ({reason})")
+
+ASSETS = AssetPipeline()
+
+def draw_fish_portrait(name, data, size):
+    # Side view of a fish facing right on a transparent surface. Body depth
+    # follows how heavy the species is for its length, fins and tail take
+    # the rarity color, and the body color and markings are picked from the
+    # name so each species keeps its look between runs.
+    width, height = size
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    rng = random.Random(zlib.crc32(name.encode()))
+    length_m = sum(data["length_range"]) / 200
+    condition = sum(data["weight_range"]) / 2 / length_m ** 3
+    depth = min(0.42, max(0.22, 0.15 + 0.036 * math.sqrt(condition)))
+    accent = pygame.Color(*RARITY_COLORS[data["rarity"]])
+    base = pygame.Color(0)
+    base.hsva = (rng.uniform(0, 360), rng.uniform(30, 60), rng.uniform(55, 75), 100)
+    base = base.lerp(accent, 0.3)
+    back = base.lerp(pygame.Color(0, 0, 0), 0.45)
+    belly = base.lerp(pygame.Color(255, 255, 255), 0.6)
+    outline = base.lerp(pygame.Color(0, 0, 0), 0.7)
+    
+    # Body outline: a head-heavy teardrop from the snout to the tail root
+    nose, root = width * 0.94, width * 0.2
+    mid = height / 2
+    half = height * depth
+    top, bottom = [], []
+    for i in range(25):
+        t = i / 24
+        x = root + (nose - root) * t
+        bulge = math.sin(math.pi * t ** 0.75) * half
+        top.append((x, mid - bulge))
+        bottom.append((x, mid + bulge * 0.9))
+    body = top + bottom[::-1]
+    
+    # Tail: forked on slender, fast fish and fan-shaped on deep ones
+    tail_x = width * 0.03
+    spread = half * (1.1 if condition < 20 else 0.9)
+    if condition < 20:
+        tail = [(root + width * 0.04, mid), (tail_x, mid - spread), (width * 0.1, mid), (tail_x, mid + spread)]
+    else:
+        tail = [(root + width * 0.04, mid), (tail_x, mid - spread), (tail_x + width * 0.02, mid),
+                (tail_x, mid + spread)]
+    pygame.draw.polygon(surface, accent, tail)
+    pygame.draw.polygon(surface, outline, tail, max(1, width // 160))
+    
+    # Dorsal and pelvic fins behind the body
+    fin_start = root + (nose - root) * rng.uniform(0.25, 0.4)
+    fin_end = root + (nose - root) * rng.uniform(0.55, 0.7)
+    dorsal = [(fin_start, mid - half * 0.8), (fin_start + (fin_end - fin_start) * 0.3, mid - half * 1.45),
+              (fin_end, mid - half * 0.85)]
+    pelvic = [(fin_end - width * 0.06, mid + half * 0.75), (fin_end - width * 0.1, mid + half * 1.25),
+              (fin_end + width * 0.02, mid + half * 0.8)]
+    for fin in (dorsal, pelvic):
+        pygame.draw.polygon(surface, accent, fin)
+        pygame.draw.polygon(surface, outline, fin, max(1, width // 160))
+        
+    # Body shaded from back to belly, with stripes or spots, clipped to the
+    # outline by multiplying it into a white silhouette
+    shading = pygame.Surface(size, pygame.SRCALPHA)
+    for y in range(height):
+        t = y / (height - 1)
+        shading.fill(back.lerp(base, min(1, t * 2)) if t < 0.5 else base.lerp(belly, (t - 0.5) * 2),
+                     (0, y, width, 1))
+    markings = rng.choice(("plain", "stripes", "spots"))
+    if markings == "stripes":
+        for i in range(rng.randint(4, 7)):
+            x = root + (nose - root) * (0.15 + i * 0.11)
+            pygame.draw.line(shading, back, (x, mid - half), (x - width * 0.02, mid + half * 0.4), max(2, width // 40))
+    elif markings == "spots":
+        for _ in range(rng.randint(8, 16)):
+            x = rng.uniform(root, nose - width * 0.15)
+            y = rng.uniform(mid - half * 0.7, mid + half * 0.2)
+            pygame.draw.circle(shading, back, (x, y), max(1, width // 80))
+    silhouette = pygame.Surface(size, pygame.SRCALPHA)
+    pygame.draw.polygon(silhouette, WHITE, body)
+    silhouette.blit(shading, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
+    surface.blit(silhouette, (0, 0))
+    pygame.draw.polygon(surface, outline, body, max(1, width // 120))
+    
+    # Gill line and eye
+    gill_x = root + (nose - root) * 0.78
+    pygame.draw.arc(surface, outline, (gill_x - half * 0.5, mid - half * 0.6, half, half * 1.2),
+                    -math.pi / 2.5, math.pi / 2.5, max(1, width // 160))
+    eye = (root + (nose - root) * 0.88, mid - half * 0.25)
+    pygame.draw.circle(surface, WHITE, eye, max(2, width // 45))
+    pygame.draw.circle(surface, BLACK, eye, max(1, width // 90))
+    return surface
+
+class FishPortraits:
+    # Portraits of every species in one atlas surface. The atlas is drawn
+    # the first time a portrait is asked for and written to disk under a
+    # hash of the catalog and drawing settings, so later runs load a single
+    # PNG, and a changed catalog gets a fresh atlas. Each species is drawn
+    # once at PORTRAIT_SUPERSAMPLE times the panel size and scaled down to
+    # every variant: the panel, list rows and shadow silhouettes. The shadow
+    # opacity steps, the left-facing shadows and the not-yet-caught
+    # silhouettes are derived from the atlas when it is loaded, so drawing
+    # any of them is one blit of a ready surface.
+    def __init__(self, catalog=None, cache_dir=PORTRAIT_CACHE_DIR):
+        self.catalog = catalog if catalog is not None else FISH_SPECIES
+        self.cache_dir = cache_dir
+        self.atlas = None
+        self.sprites = None  # (species, variant) -> subsurface of the atlas
+        # species -> (facing left, facing right) -> drawn width -> opacity
+        # step. Read directly by the shadow drawing on a layer worker, which
+        # never loads it; it stays None until load() ran on the main thread.
+        self.shadows = None
+        self.silhouettes = None
+        ASSETS.on_display_change(self.invalidate)
+        
+    def invalidate(self):
+        # The atlas itself is re-converted by the asset pipeline
+        self.sprites = None
+        self.shadows = None
+        self.silhouettes = None
+        
+    def catalog_hash(self):
+        catalog = [[name, data["rarity"].value, RARITY_COLORS[data["rarity"]], data["length_range"],
+                    data["weight_range"]] for name, data in sorted(self.catalog.items())]
+        settings = [PORTRAIT_VERSION, PORTRAIT_SIZES, PORTRAIT_SHADOW_WIDTHS, PORTRAIT_SUPERSAMPLE,
+                    PORTRAIT_ATLAS_WIDTH]
+        return hashlib.sha1(json.dumps([settings, catalog]).encode()).hexdigest()[:16]
+        
+    def variants(self):
+        # (variant, size) for everything stored per species
+        panel_width, panel_height = PORTRAIT_SIZES["panel"]
+        sizes = list(PORTRAIT_SIZES.items())
+        sizes += [(f"shadow{width}", (width, width * panel_height // panel_width))
+                  for width in PORTRAIT_SHADOW_WIDTHS]
+        return sizes
+        
+    def build(self):
+        # Draw every portrait and pack them into shelves, tallest first
+        panel_width, panel_height = PORTRAIT_SIZES["panel"]
+        master_size = (panel_width * PORTRAIT_SUPERSAMPLE, panel_height * PORTRAIT_SUPERSAMPLE)
+        pictures = []
+        for name, data in sorted(self.catalog.items()):
+            master = draw_fish_portrait(name, data, master_size)
+            for variant, size in self.variants():
+                picture = pygame.transform.smoothscale(master, size)
+                if variant.startswith("shadow"):
+                    # Black and cropped to the fish, so shadows blend no empty pixels
+                    picture.fill((0, 0, 0, 255), special_flags=pygame.BLEND_RGBA_MIN)
+                    picture = picture.subsurface(picture.get_bounding_rect()).copy()
+                pictures.append((name, variant, picture))
+        pictures.sort(key=lambda entry: -entry[2].get_height())
+        layout = {}
+        x = y = shelf_height = 0
+        for name, variant, picture in pictures:
+            width, height = picture.get_size()
+            if x + width > PORTRAIT_ATLAS_WIDTH:
+                x, y = 0, y + shelf_height
+                shelf_height = 0
+            layout[f"{name}/{variant}"] = [x, y, width, height]
+            x += width
+            shelf_height = max(shelf_height, height)
+        atlas = pygame.Surface((PORTRAIT_ATLAS_WIDTH, y + shelf_height), pygame.SRCALPHA)
+        for name, variant, picture in pictures:
+            atlas.blit(picture, layout[f"{name}/{variant}"][:2])
+        return atlas, layout
+        
+    def load(self):
+        # Main thread only: reads or builds the atlas and slices the sprites
+        if self.sprites is not None:
+            return
+        if self.atlas is None:
+            catalog_hash = self.catalog_hash()
+            path = os.path.join(self.cache_dir, f"portraits-{catalog_hash}")
+            atlas = layout = None
+            try:
+                with open(path + ".json", encoding="utf-8") as f:
+                    layout = json.load(f)
+                atlas = pygame.image.load(path + ".png")
+            except (OSError, ValueError, pygame.error):
+                atlas = None
+            if atlas is None or layout.get("hash") != catalog_hash:
+                atlas, rects = self.build()
+                layout = {"hash": catalog_hash, "rects": rects}
+                try:
+                    # The cache is only a shortcut; a failed write just means
+                    # the atlas is drawn again next run
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    pygame.image.save(atlas, path + ".tmp.png")
+                    os.replace(path + ".tmp.png", path + ".png")
+                    with open(path + ".json", "w", encoding="utf-8") as f:
+                        json.dump(layout, f)
+                except (OSError, pygame.error):
+                    pass
+            self.atlas = atlas
+            self.layout = layout["rects"]
+            ASSETS.track(self, "atlas", "alpha")
+        self.sprites = {tuple(key.split("/", 1)): self.atlas.subsurface(rect) for key, rect in self.layout.items()}
+        shadows = {}
+        self.silhouettes = {}
+        # Nearest silhouette for every width a shadow can be drawn at
+        nearest = [min(PORTRAIT_SHADOW_WIDTHS, key=lambda w: abs(w - width))
+                   for width in range(PORTRAIT_SHADOW_WIDTHS[-1] + 1)]
+        for name in self.catalog:
+            facing_right = {}
+            for width in PORTRAIT_SHADOW_WIDTHS:
+                shadow = self.sprites[name, f"shadow{width}"]
+                steps = []
+                for step in range(PORTRAIT_SHADOW_ALPHAS):
+                    faded = shadow.copy()
+                    alpha = 100 * (step + 1) // PORTRAIT_SHADOW_ALPHAS
+                    faded.fill((255, 255, 255, alpha), special_flags=pygame.BLEND_RGBA_MULT)
+                    steps.append(ASSETS.prepare(faded, "alpha"))
+                # Full opacity falls in the last step too
+                facing_right[width] = steps + steps[-1:]
+            facing_left = {width: [pygame.transform.flip(shadow, True, False) for shadow in steps]
+                           for width, steps in facing_right.items()}
+            shadows[name] = ([facing_left[width] for width in nearest],
+                             [facing_right[width] for width in nearest])
+            silhouette = self.sprites[name, "row"].copy()
+            silhouette.fill((0, 0, 0), special_flags=pygame.BLEND_RGB_MULT)
+            silhouette.fill((30, 50, 30), special_flags=pygame.BLEND_RGB_ADD)
+            self.silhouettes[name] = ASSETS.prepare(silhouette, "alpha")
+        self.shadows = shadows
+        
+    def portrait(self, species, variant="panel"):
+        self.load()
+        return self.sprites.get((species, variant))
+        
+    def silhouette(self, species):
+        # Row-sized dark shape of a species that has not been caught yet
+        self.load()
+        return self.silhouettes.get(species)
+
+
+PORTRAITS = FishPortraits()
+
 class Sprite:
     def __init__(self, x, y, width, height, color):
         self.x = x
@@ -215,7 +961,7 @@ class HumanCharacter(Sprite):
         self.animation_timer = 0
         self.arm_swing = 1
         
-    def move(self, keys):
+    def move(self, keys, world_width=SCREEN_WIDTH):
         was_moving = False
         if keys[pygame.K_LEFT] or keys[pygame.K_a]:
             self.x -= self.speed
@@ -232,8 +978,8 @@ class HumanCharacter(Sprite):
             self.y += self.speed
             was_moving = True
             
-        # Keep player on screen
-        self.x = max(0, min(self.x, SCREEN_WIDTH - self.width))
+        # Keep player inside the world
+        self.x = max(0, min(self.x, world_width - self.width))
         self.y = max(0, min(self.y, SCREEN_HEIGHT - self.height))
         
         # Update animation state
@@ -268,7 +1014,12 @@ class HumanCharacter(Sprite):
         self.cast_progress = 0
         self.animation_state = "idle"
     
-    def draw(self, screen):
+    @traced("HumanCharacter.draw")
+    def draw(self, screen, camera_x=0):
+        # The character lives in world coordinates; draw it relative to the camera
+        x = self.x - camera_x
+        cast_target = self.cast_target and (self.cast_target[0] - camera_x, self.cast_target[1])
+        
         # Update animation timers
         self.animation_timer += 1
         if self.animation_state == "walking":
@@ -280,22 +1031,22 @@ class HumanCharacter(Sprite):
         # Head with breathing animation
         head_color = (255, 218, 185)  # Skin tone
         head_y_offset = math.sin(self.animation_timer * 0.1) * 1
-        pygame.draw.circle(screen, head_color, (self.x + self.width//2, self.y + 10 + head_y_offset), 12)
+        pygame.draw.circle(screen, head_color, (x + self.width//2, self.y + 10 + head_y_offset), 12)
         
         # Eyes with blinking animation
         if self.animation_timer % 120 < 10:  # Blink every 2 seconds
             eye_color = (0, 0, 0)
         else:
             eye_color = (255, 255, 255)
-        pygame.draw.circle(screen, eye_color, (self.x + self.width//2 - 4, self.y + 8), 2)
-        pygame.draw.circle(screen, eye_color, (self.x + self.width//2 + 4, self.y + 8), 2)
+        pygame.draw.circle(screen, eye_color, (x + self.width//2 - 4, self.y + 8), 2)
+        pygame.draw.circle(screen, eye_color, (x + self.width//2 + 4, self.y + 8), 2)
         
         # Body with breathing animation
         body_color = (70, 130, 180)  # Blue shirt
         body_scale = 1 + math.sin(self.animation_timer * 0.1) * 0.05
         body_width = int(24 * body_scale)
         body_height = int(30 * body_scale)
-        pygame.draw.rect(screen, body_color, (self.x + 8, self.y + 20, body_width, body_height))
+        pygame.draw.rect(screen, body_color, (x + 8, self.y + 20, body_width, body_height))
         
         # Arms with walking/swinging animation
         arm_color = (255, 218, 185)
@@ -305,12 +1056,12 @@ class HumanCharacter(Sprite):
             arm_offset = int(10 * math.sin(cast_angle))
             
             # Left arm
-            pygame.draw.rect(screen, arm_color, (self.x + 5 - arm_offset, self.y + 25, 8, 20))
+            pygame.draw.rect(screen, arm_color, (x + 5 - arm_offset, self.y + 25, 8, 20))
             # Right arm
-            pygame.draw.rect(screen, arm_color, (self.x + 27 + arm_offset, self.y + 25, 8, 20))
+            pygame.draw.rect(screen, arm_color, (x + 27 + arm_offset, self.y + 25, 8, 20))
             
             # Fishing rod with casting animation
-            rod_start = (self.x + self.width//2, self.y + 15)
+            rod_start = (x + self.width//2, self.y + 15)
             rod_angle = -math.pi/4 + (cast_angle * 0.5)  # Start back, swing forward
             rod_length = 40 + int(20 * self.cast_progress)
             rod_end_x = rod_start[0] + math.cos(rod_angle) * rod_length
@@ -319,10 +1070,10 @@ class HumanCharacter(Sprite):
             pygame.draw.line(screen, BROWN, rod_start, (rod_end_x, rod_end_y), 3)
             
             # Fishing line with casting animation
-            if self.cast_target and self.cast_progress > 0.5:
+            if cast_target and self.cast_progress > 0.5:
                 line_progress = (self.cast_progress - 0.5) * 2  # Last 50% of cast
-                line_end_x = rod_end_x + (self.cast_target[0] - rod_end_x) * line_progress
-                line_end_y = rod_end_y + (self.cast_target[1] - rod_end_y) * line_progress
+                line_end_x = rod_end_x + (cast_target[0] - rod_end_x) * line_progress
+                line_end_y = rod_end_y + (cast_target[1] - rod_end_y) * line_progress
                 pygame.draw.line(screen, BLACK, (rod_end_x, rod_end_y), (line_end_x, line_end_y), 1)
                 
                 # Draw splash at target when line reaches
@@ -330,13 +1081,13 @@ class HumanCharacter(Sprite):
                     splash_radius = int(10 * (1 - (self.animation_timer % 30) / 30))
                     if splash_radius > 0:
                         pygame.draw.circle(screen, (255, 255, 255), 
-                                        (int(self.cast_target[0]), int(self.cast_target[1])), splash_radius, 2)
+                                        (int(cast_target[0]), int(cast_target[1])), splash_radius, 2)
         else:
             # Normal arms with walking animation
             left_arm_y = self.y + 30 + self.arm_swing
             right_arm_y = self.y + 30 - self.arm_swing
-            pygame.draw.rect(screen, arm_color, (self.x + 5, left_arm_y, 8, 15))
-            pygame.draw.rect(screen, arm_color, (self.x + 27, right_arm_y, 8, 15))
+            pygame.draw.rect(screen, arm_color, (x + 5, left_arm_y, 8, 15))
+            pygame.draw.rect(screen, arm_color, (x + 27, right_arm_y, 8, 15))
         
         # Legs with walking animation
         leg_color = (25, 25, 112)  # Dark blue pants
@@ -347,8 +1098,8 @@ class HumanCharacter(Sprite):
             left_leg_y = self.y + 50
             right_leg_y = self.y + 50
             
-        pygame.draw.rect(screen, leg_color, (self.x + 10, left_leg_y, 8, 10))
-        pygame.draw.rect(screen, leg_color, (self.x + 22, right_leg_y, 8, 10))
+        pygame.draw.rect(screen, leg_color, (x + 10, left_leg_y, 8, 10))
+        pygame.draw.rect(screen, leg_color, (x + 22, right_leg_y, 8, 10))
         
         # Feet with walking animation
         foot_color = (139, 69, 19)  # Brown shoes
@@ -359,15 +1110,15 @@ class HumanCharacter(Sprite):
             left_foot_y = self.y + 60
             right_foot_y = self.y + 60
             
-        pygame.draw.rect(screen, foot_color, (self.x + 8, left_foot_y, 6, 4))
-        pygame.draw.rect(screen, foot_color, (self.x + 26, right_foot_y, 6, 4))
+        pygame.draw.rect(screen, foot_color, (x + 8, left_foot_y, 6, 4))
+        pygame.draw.rect(screen, foot_color, (x + 26, right_foot_y, 6, 4))
         
         # Draw fishing line when fishing
-        if self.animation_state == "fishing" and self.cast_target:
-            rod_start = (self.x + self.width//2, self.y + 15)
-            rod_end = (self.x + self.width//2 + (30 if self.facing_right else -30), self.y - 20)
+        if self.animation_state == "fishing" and cast_target:
+            rod_start = (x + self.width//2, self.y + 15)
+            rod_end = (x + self.width//2 + (30 if self.facing_right else -30), self.y - 20)
             pygame.draw.line(screen, BROWN, rod_start, rod_end, 3)
-            pygame.draw.line(screen, BLACK, rod_end, self.cast_target, 1)
+            pygame.draw.line(screen, BLACK, rod_end, cast_target, 1)
 
 class FishingMinigame:
     def __init__(self):
@@ -376,43 +1127,48 @@ class FishingMinigame:
         self.hook_bar_pos = 0
         self.target_zone_start = 0
         self.target_zone_end = 0
-        self.bar_speed = 2
-        self.direction = 1
+        self.bar_speed = 2  # Bar units per 60 FPS frame
+        self.start_ms = 0
         self.hook_set = False
-        self.fish_escape_timer = 0
-        self.max_escape_time = 600  # 10 seconds at 60 FPS - much more forgiving
+        self.fish_escape_timer = 0  # Milliseconds since the fish bit
+        self.max_escape_time = 10000  # 10 seconds - much more forgiving
         self.flash_timer = 0
         self.strike_indicator = 0
+        self.latencies = deque(maxlen=HOOK_LATENCY_SAMPLES)  # Press-to-judgement, ms
         
-    def start_fishing(self, fish_species):
+    def start_fishing(self, fish_species, now=None):
         self.is_active = True
         self.fish = fish_species
+        self.start_ms = pygame.time.get_ticks() if now is None else now
         self.hook_bar_pos = 50
         # Make target zone much larger and easier
         self.target_zone_start = random.randint(25, 55)
         self.target_zone_end = self.target_zone_start + random.randint(25, 35)  # Much larger zone
         self.bar_speed = max(1, FISH_SPECIES[fish_species]["difficulty"] - 3)  # Easier speed
-        self.direction = 1
         self.hook_set = False
         self.fish_escape_timer = 0
         self.flash_timer = 0
         self.strike_indicator = 0
         
-    def update(self):
+    def bar_position(self, at_ms):
+        # The bar starts at 50 heading right and bounces between 0 and 100:
+        # a triangle wave over time, so its position at any instant is exact
+        # and does not depend on how often update() ran
+        travelled = (50 + self.bar_speed * FPS / 1000 * (at_ms - self.start_ms)) % 200
+        return travelled if travelled <= 100 else 200 - travelled
+        
+    def update(self, now=None):
         if not self.is_active:
             return
+        if now is None:
+            now = pygame.time.get_ticks()
             
         # Move the hook bar
-        self.hook_bar_pos += self.bar_speed * self.direction
+        self.hook_bar_pos = self.bar_position(now)
         
-        # Bounce off edges
-        if self.hook_bar_pos <= 0 or self.hook_bar_pos >= 100:
-            self.direction *= -1
-            self.hook_bar_pos = max(0, min(100, self.hook_bar_pos))
-            
         # Check if fish escapes
         if not self.hook_set:
-            self.fish_escape_timer += 1
+            self.fish_escape_timer = now - self.start_ms
             if self.fish_escape_timer >= self.max_escape_time:
                 self.is_active = False
                 return "escape"
@@ -426,8 +1182,18 @@ class FishingMinigame:
         
         return None
         
-    def set_hook(self):
-        if self.target_zone_start <= self.hook_bar_pos <= self.target_zone_end:
+    def set_hook(self, pressed_at=None):
+        # Judge the press at the moment it happened, not at the last update().
+        # Without a press time it is judged now, and there is no latency to
+        # record.
+        judged_at = pygame.time.get_ticks()
+        if pressed_at is None:
+            pressed_at = judged_at
+        else:
+            self.latencies.append(judged_at - pressed_at)
+        self.hook_bar_pos = self.bar_position(pressed_at)
+        in_time = pressed_at - self.start_ms < self.max_escape_time
+        if in_time and self.target_zone_start <= self.hook_bar_pos <= self.target_zone_end:
             self.hook_set = True
             self.flash_timer = 30
             return True
@@ -435,16 +1201,11 @@ class FishingMinigame:
             self.is_active = False
             return False
             
+    @traced("FishingMinigame.draw")
     def draw(self, screen):
         if not self.is_active:
             return
             
-        # Draw semi-transparent overlay
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(128)
-        overlay.fill(BLACK)
-        screen.blit(overlay, (0, 0))
-        
         # Draw fish info
         if self.fish:
             fish_data = FISH_SPECIES[self.fish]
@@ -497,13 +1258,13 @@ class FishingMinigame:
         pygame.draw.circle(screen, WHITE, (hook_x, SCREEN_HEIGHT//2 - 35), hook_size, 2)
         
         # Draw time remaining with visual indicator
-        time_left = (self.max_escape_time - self.fish_escape_timer) / 60
+        time_left = max(0, self.max_escape_time - self.fish_escape_timer) / 1000
         time_text = f"Time: {time_left:.1f}s"
         text = pygame.font.Font(None, 36).render(time_text, True, WHITE)
         screen.blit(text, (SCREEN_WIDTH//2 - text.get_width()//2, SCREEN_HEIGHT//2 + 80))
         
         # Visual time indicator
-        time_bar_width = 200 * (time_left / (self.max_escape_time / 60))
+        time_bar_width = 200 * (time_left / (self.max_escape_time / 1000))
         time_bar_color = GREEN if time_left > 5 else YELLOW if time_left > 2 else RED
         pygame.draw.rect(screen, time_bar_color, 
                         (SCREEN_WIDTH//2 - 100, SCREEN_HEIGHT//2 + 100, time_bar_width, 10))
@@ -516,12 +1277,200 @@ class FishingMinigame:
             text = pygame.font.Font(None, 36).render("Hook set! Keep it steady!", True, GREEN)
             screen.blit(text, (SCREEN_WIDTH//2 - text.get_width()//2, SCREEN_HEIGHT//2 + 50))
 
+class EffectsCompositor:
+    # One reusable SRCALPHA layer shared by all translucent effects. Drawing
+    # onto the opaque display ignores the alpha channel, so effects are drawn
+    # here instead and blended onto the screen with a single blit. Only the
+    # regions touched last frame are cleared, which keeps the cost
+    # proportional to the number of live effects rather than the screen size.
+    def __init__(self, width, height):
+        self.layer = ASSETS.new((width, height), "alpha")
+        ASSETS.track(self, "layer", "alpha")
+        self.bounds = self.layer.get_rect()
+        self.dirty_rects = []
+        
+    def begin_frame(self):
+        # Erase whatever was drawn since the last frame
+        for rect in self.dirty_rects:
+            self.layer.fill((0, 0, 0, 0), rect)
+        self.dirty_rects = []
+        
+    def mark_dirty(self, rect):
+        rect = rect.clip(self.bounds)
+        if rect.width and rect.height:
+            self.dirty_rects.append(rect)
+            
+    def circle(self, color, center, radius, width=0):
+        self.mark_dirty(pygame.draw.circle(self.layer, color, center, radius, width))
+        
+    def ellipse(self, color, rect, width=0):
+        self.mark_dirty(pygame.draw.ellipse(self.layer, color, rect, width))
+        
+    def rect(self, color, rect, width=0):
+        self.mark_dirty(pygame.draw.rect(self.layer, color, rect, width))
+        
+    def blit(self, surface, position, special_flags=0):
+        self.mark_dirty(self.layer.blit(surface, position, None, special_flags))
+        
+    def composite(self, screen):
+        if not self.dirty_rects:
+            return
+        # Blend just the bounding box of this frame's effects in one blit
+        area = self.dirty_rects[0].unionall(self.dirty_rects[1:])
+        screen.blit(self.layer, area.topleft, area)
+
+class Layer:
+    # One independently rendered part of the frame. render(surface) draws
+    # the layer into its own surface and may run on a worker thread, so it
+    # must not touch the display or any state the main thread is changing;
+    # present(screen) blends the result and always runs on the main thread.
+    def __init__(self, name, surface=None, position=(0, 0), render=None, present=None):
+        self.name = name
+        self.surface = surface
+        self.position = position
+        self.render = render
+        self.present = present or self.blit
+        self.pending = None
+        
+    def blit(self, screen):
+        screen.blit(self.surface, self.position)
+
+class LayerCompositor:
+    # Renders independent layers on a small thread pool and composites them
+    # on the main thread. Only large fills and blits release the GIL for
+    # long enough to overlap; the water layer is mostly small draw calls
+    # whose Python call overhead holds it, and no speedup has been measured,
+    # so by default there are no workers and every render simply runs
+    # inline in submit(). Either way layers are presented in the order they
+    # were added.
+    def __init__(self, workers=COMPOSITOR_WORKERS):
+        self.layers = OrderedDict()
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="layer") if workers > 0 else None
+        
+    def add(self, layer):
+        self.layers[layer.name] = layer
+        return layer
+        
+    def submit(self, *names):
+        for name in names:
+            layer = self.layers[name]
+            if layer.render is None:
+                continue
+            if self.pool is None:
+                layer.render(layer.surface)
+            else:
+                layer.pending = self.pool.submit(layer.render, layer.surface)
+                
+    def wait(self, layer):
+        if layer.pending is not None:
+            future, layer.pending = layer.pending, None
+            future.result()  # Re-raises anything the worker hit
+            
+    def composite(self, screen, *names):
+        # Present the named layers in their fixed stacking order, whatever
+        # order the caller lists them in
+        names = set(names)
+        for name, layer in self.layers.items():
+            if name in names:
+                self.wait(layer)
+                layer.present(screen)
+                
+    def close(self):
+        for layer in self.layers.values():
+            self.wait(layer)
+        if self.pool is not None:
+            self.pool.shutdown()
+
+class ModalBackdrop:
+    # Frozen picture of the world behind modal screens (the fishing
+    # minigame and the inspection panel). The world is drawn one last time
+    # when the first modal opens; each modal then gets a darkened, optionally
+    # blurred copy, so a frame under a modal is a single blit instead of a
+    # full world redraw. Optionally the water band is re-rendered every
+    # MODAL_WATER_MS between what lies under it and what lies over it, and
+    # put through the same treatment.
+    def __init__(self, blur_scale=MODAL_BLUR_SCALE, water_ms=MODAL_WATER_MS):
+        self.blur_scale = blur_scale
+        self.water_ms = water_ms
+        self.snapshot = None
+        self.backdrops = {}  # darkness -> treated full-screen copy
+        self.water_base = None  # (under, over) the water band
+        self.water_strip = None
+        self.water_strips = {}  # darkness -> treated water band
+        self.water_time = 0
+        ASSETS.on_display_change(self.invalidate)
+        
+    def invalidate(self):
+        self.snapshot = None
+        self.backdrops = {}
+        self.water_base = None
+        self.water_strip = None
+        self.water_strips = {}
+        
+    def capture(self, screen):
+        self.snapshot = ASSETS.new(screen.get_size())
+        self.snapshot.blit(screen, (0, 0))
+        self.backdrops = {}
+        
+    def capture_water(self, water_layer, under, over):
+        # under and over are full-screen pictures of what is drawn before
+        # and after the water; only the band the water covers is kept
+        self.water_area = water_layer.surface.get_rect(topleft=water_layer.position).clip(under.get_rect())
+        self.water_base = (under.subsurface(self.water_area).copy(),
+                           ASSETS.prepare(over.subsurface(self.water_area).copy(), "colorkey"))
+        self.water_strip = None
+        self.water_strips = {}
+        self.water_time = pygame.time.get_ticks()
+        
+    def treat(self, surface, darkness):
+        if self.blur_scale > 1:
+            width, height = surface.get_size()
+            small = pygame.transform.smoothscale(surface, (max(1, width // self.blur_scale),
+                                                           max(1, height // self.blur_scale)))
+            surface = ASSETS.prepare(pygame.transform.smoothscale(small, (width, height)), "opaque")
+        # Multiplying is the same as an alpha-blended black overlay, paid once
+        shade = 255 - darkness
+        surface.fill((shade, shade, shade), special_flags=pygame.BLEND_MULT)
+        return surface
+        
+    def backdrop(self, darkness):
+        backdrop = self.backdrops.get(darkness)
+        if backdrop is None:
+            backdrop = self.backdrops[darkness] = self.treat(self.snapshot.copy(), darkness)
+        return backdrop
+        
+    def update_water(self, water_layer):
+        # Redraw the band over the frozen world every water_ms; the water
+        # itself is advanced by effects.update() in Game.update
+        now = pygame.time.get_ticks()
+        if self.water_strip is not None and now - self.water_time < self.water_ms:
+            return
+        self.water_time = now
+        water_layer.render(water_layer.surface)
+        under, over = self.water_base
+        strip = under.copy()
+        strip.blit(water_layer.surface, (water_layer.position[0] - self.water_area.x,
+                                         water_layer.position[1] - self.water_area.y))
+        strip.blit(over, (0, 0))
+        self.water_strip = strip
+        self.water_strips = {}
+        
+    def draw(self, screen, darkness, water_layer=None):
+        screen.blit(self.backdrop(darkness), (0, 0))
+        if self.water_base is not None:
+            self.update_water(water_layer)
+            strip = self.water_strips.get(darkness)
+            if strip is None:
+                strip = self.water_strips[darkness] = self.treat(self.water_strip.copy(), darkness)
+            screen.blit(strip, self.water_area)
+
 class VisualEffects:
     def __init__(self):
         self.ripples = []
         self.particles = []
-        self.fish_shadows = []
         self.water_animation = 0
+        self.water_palette = LOCATIONS["forest"].water_palette
+        self.compositor = EffectsCompositor(SCREEN_WIDTH, SCREEN_HEIGHT)
         
     def add_ripple(self, x, y):
         self.ripples.append({"x": x, "y": y, "radius": 0, "max_radius": 80, "alpha": 255})
@@ -534,12 +1483,7 @@ class VisualEffects:
             "color": color
         })
         
-    def add_fish_shadow(self, x, y, size):
-        self.fish_shadows.append({
-            "x": x, "y": y, "size": size,
-            "life": 120, "max_life": 120
-        })
-        
+    @traced("VisualEffects.update")
     def update(self):
         # Update ripples
         for ripple in self.ripples[:]:
@@ -556,44 +1500,411 @@ class VisualEffects:
             if particle["life"] <= 0:
                 self.particles.remove(particle)
                 
-        # Update fish shadows
-        for shadow in self.fish_shadows[:]:
-            shadow["life"] -= 1
-            if shadow["life"] <= 0:
-                self.fish_shadows.remove(shadow)
-                
         # Update water animation
         self.water_animation = (self.water_animation + 1) % 360
                 
-    def draw(self, screen):
-        # Draw animated water
-        for i in range(200):
-            wave_offset = math.sin((i + self.water_animation) * 0.1) * 3
-            alpha = int(100 + (i / 200) * 100)
-            color = (0, 100 + alpha//2, 150 + alpha//2)
-            y_pos = SCREEN_HEIGHT - 200 + i
-            pygame.draw.line(screen, color, 
+    def create_water_layer(self):
+        # The wave band overhangs the water line by the wave amplitude
+        surface = ASSETS.new((SCREEN_WIDTH, WATER_BAND_HEIGHT + 2 * WAVE_AMPLITUDE), "alpha")
+        layer = Layer("water", surface, (0, WATER_TOP - WAVE_AMPLITUDE), render=self.draw_water)
+        ASSETS.track(layer, "surface", "alpha")
+        return layer
+        
+    @traced("VisualEffects.draw_water")
+    def draw_water(self, surface):
+        # Animated water; depends only on water_animation and the palette
+        surface.fill((0, 0, 0, 0))
+        for i in range(WATER_BAND_HEIGHT):
+            wave_offset = math.sin((i + self.water_animation) * 0.1) * WAVE_AMPLITUDE
+            alpha = int(100 + (i / WATER_BAND_HEIGHT) * 100)
+            color = (self.water_palette[0], self.water_palette[1] + alpha//2, self.water_palette[2] + alpha//2)
+            y_pos = WAVE_AMPLITUDE + i
+            pygame.draw.line(surface, color, 
                            (0, y_pos + wave_offset), 
                            (SCREEN_WIDTH, y_pos + wave_offset))
+                           
+    @traced("VisualEffects.draw")
+    def draw(self, camera_x=0):
+        # Translucent effects go into the shared alpha layer; the caller
+        # blends it onto the screen with compositor.composite(). Effects are
+        # positioned in world coordinates.
+        layer = self.compositor
+        layer.begin_frame()
         
         # Draw ripples
         for ripple in self.ripples:
             if ripple["alpha"] > 0:
                 color = (0, 100, 200, ripple["alpha"])
-                pygame.draw.circle(screen, color, (ripple["x"], ripple["y"]), ripple["radius"], 3)
+                layer.circle(color, (ripple["x"] - camera_x, ripple["y"]), ripple["radius"], 3)
                 
         # Draw particles
         for particle in self.particles:
             alpha = int(255 * (particle["life"] / particle["max_life"]))
             color = (*particle["color"], alpha)
-            pygame.draw.circle(screen, color, (int(particle["x"]), int(particle["y"])), 3)
+            layer.circle(color, (int(particle["x"] - camera_x), int(particle["y"])), 3)
+
+class FishPopulation:
+    # The fish living in the water band. Agent state is kept in parallel
+    # lists and indexed by a uniform spatial-hash grid so a cast only has to
+    # look at the few cells around the cast point. Fish swim horizontally at
+    # a constant speed and bounce off the banks, which makes every position
+    # an exact function of time: instead of moving every fish every frame we
+    # re-bin a rotating slice of them, and queries widen their search by the
+    # distance a fish can have swum since it was last binned.
+    def __init__(self, bounds, count=POPULATION_SIZE, cell_size=POPULATION_CELL_SIZE,
+                 species_pool=None, seed=None):
+        self.bounds = pygame.Rect(bounds)
+        self.cell_size = cell_size
+        self.cols = max(1, math.ceil(self.bounds.width / cell_size))
+        self.rows = max(1, math.ceil(self.bounds.height / cell_size))
+        self.rng = random.Random(seed)
+        self.frame = 0
+        self.max_speed = 1.0
+        self.rebin_cursor = 0
+        
+        # Agent state (index = agent id)
+        self.species = []
+        self.sizes = []
+        self.depths = []
+        self.anchor_x = []
+        self.anchor_frame = []
+        self.ys = []
+        self.speeds = []
+        self.cell_of = []
+        self.grid = [set() for _ in range(self.cols * self.rows)]
+        
+        self.set_species_pool(species_pool or list(FISH_SPECIES.keys()))
+        for _ in range(count):
+            self.spawn()
+            
+    def set_species_pool(self, species_pool):
+        self.species_pool = list(species_pool)
+        self.species_weights = [SPECIES_ABUNDANCE[FISH_SPECIES[name]["rarity"]]
+                                for name in self.species_pool]
+        
+    def __len__(self):
+        return len(self.species)
+        
+    def spawn(self, agent_id=None):
+        rng = self.rng
+        species = rng.choices(self.species_pool, self.species_weights)[0]
+        rarity_rank = list(Rarity).index(FISH_SPECIES[species]["rarity"])
+        size = rng.random()
+        # Rarer fish tend to keep to deeper water
+        depth = rng.random() ** (1 / (1 + rarity_rank * 0.5))
+        speed = rng.uniform(0.2, self.max_speed) * (1 - size * 0.5)
+        if rng.random() < 0.5:
+            speed = -speed
+        x = rng.uniform(self.bounds.left, self.bounds.right - 1)
+        y = rng.uniform(self.bounds.top + 20, self.bounds.bottom - 50)
+        
+        if agent_id is None:
+            agent_id = len(self.species)
+            for column in (self.species, self.sizes, self.depths, self.anchor_x,
+                           self.anchor_frame, self.ys, self.speeds, self.cell_of):
+                column.append(None)
+        else:
+            self.grid[self.cell_of[agent_id]].discard(agent_id)
+                
+        self.species[agent_id] = species
+        self.sizes[agent_id] = size
+        self.depths[agent_id] = depth
+        self.anchor_x[agent_id] = x
+        self.anchor_frame[agent_id] = self.frame
+        self.ys[agent_id] = y
+        self.speeds[agent_id] = speed
+        cell = self.cell_index(x, y)
+        self.cell_of[agent_id] = cell
+        self.grid[cell].add(agent_id)
+        return agent_id
+        
+    def cell_index(self, x, y):
+        col = min(self.cols - 1, max(0, int((x - self.bounds.left) // self.cell_size)))
+        row = min(self.rows - 1, max(0, int((y - self.bounds.top) // self.cell_size)))
+        return row * self.cols + col
+        
+    def position(self, agent_id):
+        # Bounce between the banks: a triangle wave over the band width
+        span = self.bounds.width - 1
+        travelled = (self.anchor_x[agent_id] - self.bounds.left +
+                     self.speeds[agent_id] * (self.frame - self.anchor_frame[agent_id]))
+        offset = travelled % (2 * span)
+        if offset > span:
+            offset = 2 * span - offset
+        return self.bounds.left + offset, self.ys[agent_id]
+        
+    def locate(self, agent_id):
+        # position() plus whether the fish currently swims to the right
+        span = self.bounds.width - 1
+        speed = self.speeds[agent_id]
+        offset = (self.anchor_x[agent_id] - self.bounds.left +
+                  speed * (self.frame - self.anchor_frame[agent_id])) % (2 * span)
+        if offset > span:
+            return self.bounds.left + 2 * span - offset, self.ys[agent_id], speed < 0
+        return self.bounds.left + offset, self.ys[agent_id], speed > 0
+        
+    def update(self):
+        self.frame += 1
+        count = len(self.species)
+        if not count:
+            return
+            
+        # Re-bin a slice so that every fish is visited once per rebin period
+        batch = min(count, max(1, math.ceil(count / POPULATION_REBIN_FRAMES)))
+        grid = self.grid
+        cell_of = self.cell_of
+        for _ in range(batch):
+            agent_id = self.rebin_cursor
+            self.rebin_cursor = (agent_id + 1) % count
+            x, y = self.position(agent_id)
+            cell = self.cell_index(x, y)
+            if cell != cell_of[agent_id]:
+                grid[cell_of[agent_id]].discard(agent_id)
+                grid[cell].add(agent_id)
+                cell_of[agent_id] = cell
+                
+    def query(self, x, y, radius):
+        # Fish whose current position is within radius of (x, y)
+        if not self.bounds.inflate(radius * 2, radius * 2).collidepoint(x, y):
+            return []
+        slack = self.max_speed * POPULATION_REBIN_FRAMES
+        col_min = max(0, int((x - radius - slack - self.bounds.left) // self.cell_size))
+        col_max = min(self.cols - 1, int((x + radius + slack - self.bounds.left) // self.cell_size))
+        row_min = max(0, int((y - radius - self.bounds.top) // self.cell_size))
+        row_max = min(self.rows - 1, int((y + radius - self.bounds.top) // self.cell_size))
+        
+        radius_sq = radius * radius
+        found = []
+        for row in range(row_min, row_max + 1):
+            for col in range(col_min, col_max + 1):
+                for agent_id in self.grid[row * self.cols + col]:
+                    fx, fy = self.position(agent_id)
+                    if (fx - x) ** 2 + (fy - y) ** 2 <= radius_sq:
+                        found.append(agent_id)
+        return found
+        
+    def choose_biter(self, x, y, bait):
+        # Decide whether anything bites at the cast point, and which fish
+        candidates = self.query(x, y, BITE_RADIUS)
+        if not candidates:
+            return None
+        interests = []
+        for agent_id in candidates:
+            interest = BITE_INTEREST * (1 - self.depths[agent_id] * 0.5)
+            if bait in FISH_SPECIES[self.species[agent_id]]["bait"]:
+                interest *= 2
+            interests.append(interest)
+        if self.rng.random() >= 1 - math.exp(-sum(interests)):
+            return None
+        return self.rng.choices(candidates, interests)[0]
+        
+    def draw_shadows(self, compositor, view):
+        # Shallow fish inside the view rect (world coordinates). Only the grid
+        # columns under the view are visited, so the cost does not grow with
+        # the width of the lake.
+        slack = self.max_speed * POPULATION_REBIN_FRAMES
+        col_min = max(0, int((view.left - slack - self.bounds.left) // self.cell_size))
+        col_max = min(self.cols - 1, int((view.right + slack - self.bounds.left) // self.cell_size))
+        drawn = 0
+        shadows = PORTRAITS.shadows  # None until the portrait atlas is loaded
+        for row in range(self.rows):
+            for col in range(col_min, col_max + 1):
+                for agent_id in self.grid[row * self.cols + col]:
+                    depth = self.depths[agent_id]
+                    if depth >= SHADOW_DEPTH:
+                        continue
+                    x, y, facing_right = self.locate(agent_id)
+                    size = 20 + int(self.sizes[agent_id] * 40)
+                    if x + size // 2 < view.left or x - size // 2 >= view.right:
+                        continue
+                    opacity = 1 - depth / SHADOW_DEPTH
+                    if shadows is not None:
+                        shadow = shadows[self.species[agent_id]][facing_right][size][
+                            int(opacity * PORTRAIT_SHADOW_ALPHAS)]
+                        # Black with alpha: keeping the larger alpha gives the same result
+                        # as blending on the cleared layer, without the per-pixel blend
+                        compositor.blit(shadow, (x - shadow.get_width() // 2 - view.left, y - view.top),
+                                        pygame.BLEND_RGBA_MAX)
+                    else:
+                        compositor.ellipse((0, 0, 0, int(100 * opacity)),
+                                           (x - size // 2 - view.left, y - view.top, size, size // 3))
+                    drawn += 1
+                    if drawn >= MAX_VISIBLE_SHADOWS:
+                        return
+
+class QuantileSketch:
+    # KLL quantile sketch. Values are kept in levels of compactors where an
+    # item at level h stands for 2**h values; when a level fills up it is
+    # sorted and every other item (from a random offset) is promoted to the
+    # next level. Capacities shrink geometrically towards the lower levels,
+    # so memory stays around 3k items however many values are added, and
+    # quantile queries are accurate to about 1.7 / k in rank. Sketches with
+    # the same k merge by concatenating levels and compacting again.
+    def __init__(self, k=SKETCH_K, seed=None):
+        self.k = k
+        self.levels = [[]]
+        self.count = 0
+        self.min = None  # None until a value is added, which keeps to_dict() valid JSON
+        self.max = None
+        self.rng = random.Random(seed)
+        self.sorted = None  # (values, running weights) until the next add or merge
+        
+    def capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+        
+    def add(self, value):
+        self.levels[0].append(value)
+        self.count += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.sorted = None
+        if len(self.levels[0]) >= self.capacity(0):
+            self.compress()
+            
+    def compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) >= self.capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                items.sort()
+                # An odd item out stays behind so total weight is preserved
+                keep = items[-1:] if len(items) % 2 else []
+                paired = items[:len(items) - len(keep)]
+                self.levels[level + 1].extend(paired[self.rng.random() < 0.5::2])
+                self.levels[level] = keep
+            level += 1
+            
+    def merge(self, other):
+        if other.k != self.k:
+            raise ValueError("Cannot merge sketches with different k")
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.count += other.count
+        self.min = min((v for v in (self.min, other.min) if v is not None), default=None)
+        self.max = max((v for v in (self.max, other.max) if v is not None), default=None)
+        self.sorted = None
+        self.compress()
+        
+    def weighted(self):
+        # Sorted values and the running total of their weights. Kept until
+        # the next add or merge, since the inspection panel queries the same
+        # sketch several times a frame
+        if self.sorted is None:
+            items = sorted((value, 1 << level) for level, values in enumerate(self.levels)
+                           for value in values)
+            self.sorted = ([value for value, _ in items],
+                           list(itertools.accumulate(weight for _, weight in items)))
+        return self.sorted
+        
+    def quantile(self, q):
+        if not self.count:
+            return None
+        values, totals = self.weighted()
+        index = bisect.bisect_left(totals, q * totals[-1])
+        if index < len(values):
+            return min(self.max, max(self.min, values[index]))
+        return self.max
+        
+    def rank(self, value):
+        # Fraction of the added values below value
+        if not self.count:
+            return 0.0
+        values, totals = self.weighted()
+        index = bisect.bisect_left(values, value)
+        return (totals[index - 1] if index else 0) / totals[-1]
+        
+    def to_dict(self):
+        return {"k": self.k, "count": self.count, "min": self.min, "max": self.max,
+                "levels": [list(values) for values in self.levels]}
+                
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["k"])
+        sketch.count = data["count"]
+        # Saves written before empty sketches stored None hold +-Infinity
+        sketch.min = data["min"] if sketch.count else None
+        sketch.max = data["max"] if sketch.count else None
+        sketch.levels = [list(values) for values in data["levels"]] or [[]]
+        return sketch
+
+class SpeciesStats:
+    def __init__(self, k=SKETCH_K):
+        self.weight = QuantileSketch(k)
+        self.length = QuantileSketch(k)
+        self.bait_hits = {}  # bait -> catches
+        
+    @property
+    def count(self):
+        return self.weight.count
+        
+    def add(self, fish):
+        self.weight.add(fish.weight)
+        self.length.add(fish.length)
+        self.bait_hits[fish.bait_used] = self.bait_hits.get(fish.bait_used, 0) + 1
+        
+    def merge(self, other):
+        self.weight.merge(other.weight)
+        self.length.merge(other.length)
+        for bait, hits in other.bait_hits.items():
+            self.bait_hits[bait] = self.bait_hits.get(bait, 0) + hits
             
-        # Draw fish shadows
-        for shadow in self.fish_shadows:
-            alpha = int(100 * (shadow["life"] / shadow["max_life"]))
-            color = (0, 0, 0, alpha)
-            pygame.draw.ellipse(screen, color, 
-                              (shadow["x"], shadow["y"], shadow["size"], shadow["size"]//3))
+    def is_top_percent(self, weight):
+        # Top 1% of this species' catches; meaningless for small samples
+        return self.count >= STATS_BADGE_MIN_CATCHES and weight >= self.weight.quantile(0.99)
+        
+    def to_dict(self):
+        return {"weight": self.weight.to_dict(), "length": self.length.to_dict(),
+                "bait_hits": dict(self.bait_hits)}
+                
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.weight = QuantileSketch.from_dict(data["weight"])
+        stats.length = QuantileSketch.from_dict(data["length"])
+        stats.bait_hits = dict(data["bait_hits"])
+        return stats
+
+class CatchStatistics:
+    # Bounded-memory statistics over every catch ever landed (kept or
+    # released): per species weight and length sketches and bait hit
+    # counts. Recording a catch is amortised O(log k), and statistics from
+    # different saves can be merged.
+    def __init__(self):
+        self.species = {}
+        
+    def get(self, species):
+        stats = self.species.get(species)
+        if stats is None:
+            stats = self.species[species] = SpeciesStats()
+        return stats
+        
+    def record(self, fish):
+        self.get(fish.species).add(fish)
+        
+    def merge(self, other):
+        for species, stats in other.species.items():
+            self.get(species).merge(stats)
+            
+    @classmethod
+    def from_catches(cls, caught_fish):
+        statistics = cls()
+        for fish in caught_fish:
+            statistics.record(fish)
+        return statistics
+        
+    def to_dict(self):
+        return {species: stats.to_dict() for species, stats in self.species.items()}
+        
+    @classmethod
+    def from_dict(cls, data):
+        statistics = cls()
+        statistics.species = {species: SpeciesStats.from_dict(stats) for species, stats in data.items()}
+        return statistics
 
 class RewardSystem:
     def __init__(self):
@@ -610,117 +1921,3012 @@ class RewardSystem:
         rewards = list(self.available_rewards.values())
         return random.choice(rewards)
 
-class SoundManager:
-    def __init__(self):
-        self.sounds = {}
-        self.create_sounds()
-        
-    def create_sounds(self):
-        # Simple sound system without numpy dependency
-        self.sounds = {
-            'splash': None,
-            'catch': None,
-            'escape': None,
-            'menu_select': None
-        }
+class Signal:
+    # List-backed stand-in for a numpy array, so the sound recipes below run
+    # unchanged without numpy: arithmetic works elementwise with another
+    # signal or a number
+    __slots__ = ("values",)
     
-    def play_sound(self, sound_name):
-        # Placeholder for sound effects
-        # In a real implementation, you'd load actual sound files
-        pass
+    def __init__(self, values):
+        self.values = values
+        
+    def __len__(self):
+        return len(self.values)
+        
+    def combine(self, other, op):
+        if isinstance(other, Signal):
+            return Signal(list(map(op, self.values, other.values)))
+        return Signal([op(value, other) for value in self.values])
+        
+    def __add__(self, other):
+        return self.combine(other, operator.add)
+        
+    def __sub__(self, other):
+        return self.combine(other, operator.sub)
+        
+    def __mul__(self, other):
+        return self.combine(other, operator.mul)
+        
+    def __truediv__(self, other):
+        return self.combine(other, operator.truediv)
+        
+    def __mod__(self, other):
+        return self.combine(other, operator.mod)
+        
+    def __neg__(self):
+        return Signal([-value for value in self.values])
+        
+    __radd__ = __add__
+    __rmul__ = __mul__
 
-class Game:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("European Forest Fishing Adventure")
-        self.clock = pygame.time.Clock()
-        self.state = GameState.MENU
-        self.player = HumanCharacter(SCREEN_WIDTH//2, SCREEN_HEIGHT//2)
-        self.fishing_minigame = FishingMinigame()
-        self.background = self.create_forest_background()
-        self.font = pygame.font.Font(None, 36)
-        self.small_font = pygame.font.Font(None, 24)
-        self.effects = VisualEffects()
-        self.sound_manager = SoundManager()
-        self.reward_system = RewardSystem()
+class PythonSynth:
+    # Sample-array operations for the recipes, one list comprehension each
+    def __init__(self, rate):
+        self.rate = rate
         
-        # Menu system
-        self.menu_selection = 0
-        self.menu_options = ["Start Game", "Instructions", "Quit"]
+    def time(self, duration):
+        return Signal([i / self.rate for i in range(int(duration * self.rate))])
         
-        # Game state variables
-        self.fish_shadow_timer = 0
-        self.catch_message = ""
-        self.catch_message_timer = 0
-        self.caught_fish = []
-        self.current_bait = "Worm"
-        self.available_baits = ["Worm"]
-        self.quests = self.create_quests()
-        self.rewards_earned = []
+    def sin(self, signal):
+        return Signal(list(map(math.sin, signal.values)))
         
-        # Fish inspection
-        self.inspecting_fish = None
+    def exp(self, signal):
+        return Signal(list(map(math.exp, signal.values)))
         
-        # Casting system
-        self.is_casting = False
-        self.cast_target = None
-        self.mouse_pos = (0, 0)
+    def noise(self, count, seed):
+        rng = random.Random(seed)
+        return Signal([rng.uniform(-1.0, 1.0) for _ in range(count)])
         
-    def create_quests(self):
-        return [
-            Quest("first_fish", "First Catch", "Catch your first fish", 1, 0, 
-                  self.reward_system.get_quest_reward("first_fish"), False),
-            Quest("gold_fish", "Golden Hunter", "Catch 3 gold-tier fish", 3, 0,
-                  self.reward_system.get_quest_reward("gold_fish"), False),
-            Quest("heavy_fish", "Heavy Weight", "Catch a fish over 10kg", 1, 0,
-                  self.reward_system.get_quest_reward("heavy_fish"), False),
-            Quest("species_collector", "Species Collector", "Catch 5 different species", 5, 0,
-                  self.reward_system.get_quest_reward("species_collector"), False),
-            Quest("trophy_hunter", "Trophy Hunter", "Catch a trophy fish", 1, 0,
-                  self.reward_system.get_quest_reward("trophy_hunter"), False)
-        ]
+    def smooth(self, signal, width):
+        # Moving average over width samples: a cheap low-pass filter
+        values = signal.values
+        smoothed = []
+        total = 0.0
+        for i, value in enumerate(values):
+            total += value
+            if i >= width:
+                total -= values[i - width]
+            smoothed.append(total / width)
+        return Signal(smoothed)
         
-    def create_forest_background(self):
-        # Create a parallax forest background
-        background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        background.fill(DARK_GREEN)
-        
-        # Draw distant mountains
-        for i in range(5):
-            x = i * 300
-            points = [(x, SCREEN_HEIGHT//2), (x + 150, SCREEN_HEIGHT//2 - 100), 
-                     (x + 300, SCREEN_HEIGHT//2)]
-            pygame.draw.polygon(background, (50, 100, 50), points)
-        
-        # Draw trees in layers
-        for layer in range(3):
-            tree_count = 15 - layer * 5
-            for i in range(tree_count):
-                x = random.randint(0, SCREEN_WIDTH)
-                y = random.randint(0, SCREEN_HEIGHT//2 - layer * 50)
-                tree_size = 30 - layer * 5
-                # Tree trunk
-                pygame.draw.rect(background, BROWN, (x, y, 15 + layer * 5, 50 + layer * 10))
-                # Tree top
-                pygame.draw.circle(background, GREEN, (x + 7 + layer * 2, y), tree_size)
-            
-        return background
+    def delay(self, signal, seconds, count):
+        # signal starting seconds later, padded with silence to count samples
+        values = [0.0] * int(seconds * self.rate) + signal.values
+        return Signal((values + [0.0] * (count - len(values)))[:count])
         
-    def handle_events(self):
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return False
-                
-            if event.type == pygame.MOUSEMOTION:
-                self.mouse_pos = event.pos
-                
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if event.button == 1:  # Left click
-                    if self.state == GameState.PLAYING and not self.player.is_casting:
+    def ramp(self, t, seconds):
+        return Signal([min(1.0, value / seconds) for value in t.values])
+        
+    def peak(self, signal):
+        return max(map(abs, signal.values), default=0.0)
+        
+    def pcm16(self, signal):
+        samples = array.array("h", [int(max(-1.0, min(1.0, value)) * 32767) for value in signal.values])
+        if sys.byteorder == "big":
+            samples.byteswap()
+        return samples.tobytes()
+
+class NumpySynth:
+    # The same operations on numpy arrays, vectorized
+    def __init__(self, rate):
+        self.rate = rate
+        
+    def time(self, duration):
+        return numpy.arange(int(duration * self.rate)) / self.rate
+        
+    def sin(self, signal):
+        return numpy.sin(signal)
+        
+    def exp(self, signal):
+        return numpy.exp(signal)
+        
+    def noise(self, count, seed):
+        return numpy.random.default_rng(seed).uniform(-1.0, 1.0, count)
+        
+    def smooth(self, signal, width):
+        return numpy.convolve(signal, numpy.full(width, 1.0 / width))[:len(signal)]
+        
+    def delay(self, signal, seconds, count):
+        values = numpy.concatenate((numpy.zeros(int(seconds * self.rate)), signal))
+        return numpy.pad(values, (0, max(0, count - len(values))))[:count]
+        
+    def ramp(self, t, seconds):
+        return numpy.minimum(1.0, t / seconds)
+        
+    def peak(self, signal):
+        return float(numpy.abs(signal).max()) if len(signal) else 0.0
+        
+    def pcm16(self, signal):
+        return (numpy.clip(signal, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+def sweep_phase(xp, t, start_hz, end_hz, duration):
+    # Phase of a tone gliding exponentially from start_hz to end_hz
+    if start_hz == end_hz:
+        return t * (2 * math.pi * start_hz)
+    rate = math.log(end_hz / start_hz) / duration
+    return (xp.exp(t * rate) - 1.0) * (2 * math.pi * start_hz / rate)
+
+def synth_splash(xp, t, params):
+    # Broadband spray over a muffled body and a low plop falling in pitch
+    spray = xp.noise(len(t), params["seed"]) * xp.exp(t * -14.0)
+    body = xp.smooth(xp.noise(len(t), params["seed"] + 1), 12) * xp.exp(t * -6.0) * 3.0
+    plop = xp.sin(sweep_phase(xp, t, *params["pitch"], params["duration"])) * xp.exp(t * -9.0)
+    return spray * 0.35 + body * 0.5 + plop * 0.6
+
+def synth_reel(xp, t, params):
+    # Ratchet clicks: bursts of a high tone, params["rate"] times a second
+    clicks = xp.exp((t % (1.0 / params["rate"])) * -900.0)
+    grit = xp.noise(len(t), params["seed"]) * 0.4 + 0.6
+    return xp.sin(t * (2 * math.pi * params["pitch"])) * clicks * grit * xp.exp(t * -params["decay"])
+
+def synth_chime(xp, t, params):
+    # Notes struck one after another, each ringing out with its octave; a
+    # shimmer of vibrato grows with the catch's rarity
+    out = t * 0.0
+    for i, frequency in enumerate(params["notes"]):
+        start = i * params["step"]
+        local = xp.time(params["duration"] - start)
+        phase = local * (2 * math.pi * frequency) + xp.sin(local * (2 * math.pi * 6.0)) * params["shimmer"]
+        note = (xp.sin(phase) + xp.sin(phase * 2.0) * 0.3) * xp.exp(local * -params["decay"])
+        out = out + xp.delay(note, start, len(t))
+    return out
+
+def synth_sweep(xp, t, params):
+    # A falling tone with a hollow third harmonic
+    phase = sweep_phase(xp, t, *params["pitch"], params["duration"])
+    return (xp.sin(phase) + xp.sin(phase * 3.0) * 0.3) * xp.exp(t * -params["decay"])
+
+def synth_tone(xp, t, params):
+    return xp.sin(t * (2 * math.pi * params["pitch"])) * xp.exp(t * -params["decay"])
+
+SOUND_RECIPES = {
+    "splash": synth_splash,
+    "reel": synth_reel,
+    "chime": synth_chime,
+    "sweep": synth_sweep,
+    "tone": synth_tone
+}
+
+# Catch chimes climb a major arpeggio: rarer fish get more and higher notes
+CATCH_ARPEGGIO = (0, 4, 7, 12, 16, 19, 24, 28, 31)
+
+# name -> (recipe, parameters); every sound is normalized to "volume"
+SOUND_EFFECTS = {
+    "splash": ("splash", {"duration": 0.5, "pitch": (320, 90), "seed": 1, "volume": 0.8}),
+    "reel": ("reel", {"duration": 0.6, "rate": 24, "pitch": 2400, "decay": 2.5, "seed": 2, "volume": 0.5}),
+    "escape": ("sweep", {"duration": 0.5, "pitch": (440, 140), "decay": 3.0, "volume": 0.6}),
+    "menu_select": ("tone", {"duration": 0.07, "pitch": 880, "decay": 45.0, "volume": 0.4})
+}
+SOUND_EFFECTS.update({
+    f"catch-{rarity.name.lower()}": ("chime", {
+        "duration": 0.5 + 0.12 * rank,
+        "notes": [523.25 * 2 ** (step / 12) for step in CATCH_ARPEGGIO[:2 + rank]],
+        "step": 0.07,
+        "decay": 5.0 - 0.4 * rank,
+        "shimmer": 0.1 * rank,
+        "volume": 0.6
+    })
+    for rank, rarity in enumerate(Rarity)
+})
+
+def synthesize_sound(recipe, params, rate):
+    # 16-bit mono WAV file contents for one effect, at rate samples a second
+    xp = NumpySynth(rate) if numpy is not None else PythonSynth(rate)
+    t = xp.time(params["duration"])
+    signal = SOUND_RECIPES[recipe](xp, t, params) * xp.ramp(t, SOUND_ATTACK)
+    peak = xp.peak(signal)
+    if peak > 0:
+        signal = signal * (params["volume"] / peak)
+    data = io.BytesIO()
+    with wave.open(data, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(xp.pcm16(signal))
+    return data.getvalue()
+
+def lower_priority():
+    # Worker processes give way to the game when they share a CPU with it
+    if hasattr(os, "nice"):
+        os.nice(19)
+
+class SoundManager:
+    # Sound effects are synthesized from the recipes in SOUND_EFFECTS and
+    # written to SOUND_CACHE_DIR as WAV files named by a hash of their
+    # recipe, so later launches only load them and changing one effect
+    # re-synthesizes just that one. Cached sounds are loaded up front;
+    # missing ones stay silent until they are ready. Synthesizing them takes
+    # a second or two in pure Python, all of it holding the GIL, so it runs
+    # in a worker process and only the finished WAV data comes back. Playing
+    # a sound is a lookup and Sound.play(). Without an audio device all
+    # sounds stay None and playing does nothing.
+    def __init__(self, cache_dir=SOUND_CACHE_DIR):
+        self.sounds = {}
+        self.cache_dir = cache_dir
+        self.synthesized = 0  # Effects that were not in the cache
+        self.pool = None
+        self.futures = []
+        # Catch chime of each rarity, so playing one builds no name
+        self.catch_names = {rarity: f"catch-{rarity.name.lower()}" for rarity in Rarity}
+        self.create_sounds()
+        
+    def create_sounds(self):
+        self.sounds = {name: None for name in SOUND_EFFECTS}
+        if pygame.mixer.get_init() is None:
+            return
+        # Synthesized at the mixer's rate, so loading needs no resampling
+        self.rate = pygame.mixer.get_init()[0]
+        missing = []
+        for name, (recipe, params) in SOUND_EFFECTS.items():
+            key = hashlib.sha1(json.dumps([SOUND_VERSION, self.rate, recipe, params]).encode()).hexdigest()
+            path = os.path.join(self.cache_dir, f"sound-{name}-{key[:16]}.wav")
+            try:
+                self.sounds[name] = self.prepare(pygame.mixer.Sound(path))
+            except (OSError, pygame.error):
+                missing.append((name, recipe, params, path))
+        if missing:
+            self.synthesize(missing)
+            
+    def prepare(self, sound):
+        sound.set_volume(SOUND_VOLUME)
+        return sound
+        
+    def synthesize(self, missing):
+        try:
+            self.pool = ProcessPoolExecutor(1, mp_context=SOUND_PROCESS_CONTEXT, initializer=lower_priority)
+        except (OSError, ImportError, NotImplementedError):
+            # No worker processes here; a thread at least keeps the work
+            # out of the frame, if not off the GIL
+            self.pool = ThreadPoolExecutor(1, thread_name_prefix="sound-synth")
+        for name, recipe, params, path in missing:
+            future = self.pool.submit(synthesize_sound, recipe, params, self.rate)
+            # Runs on the pool's result thread as each effect arrives
+            future.add_done_callback(functools.partial(self.add_sound, name, path))
+            self.futures.append(future)
+        # Queued effects still run; the worker exits after the last one
+        self.pool.shutdown(wait=False)
+        
+    def add_sound(self, name, path, future):
+        if future.cancelled() or future.exception() is not None:
+            # Stays silent this session
+            return
+        data = future.result()
+        try:
+            # The cache is only a shortcut; without it sounds are
+            # synthesized again next launch
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+        except OSError:
+            pass
+        self.sounds[name] = self.prepare(pygame.mixer.Sound(file=io.BytesIO(data)))
+        self.synthesized += 1
+        
+    def wait(self):
+        # Block until every missing effect has been synthesized
+        concurrent.futures.wait(self.futures)
+        
+    def close(self):
+        # Effects not started yet are dropped rather than waited for at exit
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            
+    def play_sound(self, sound_name, rarity=None):
+        # rarity picks the catch chime's variant
+        if rarity is not None and sound_name == "catch":
+            sound_name = self.catch_names[rarity]
+        sound = self.sounds.get(sound_name)
+        if sound is not None:
+            sound.play()
+
+class SearchIndex:
+    # N-gram index over the names a list can be searched by: species,
+    # locations and baits. Every substring of up to SEARCH_NGRAM characters
+    # maps to the names containing it, so a short query is one lookup and a
+    # longer one intersects the names of its n-grams before confirming the
+    # match. Lists search this small vocabulary and then keep the items that
+    # carry a matching name, so the index does not grow with the catches.
+    def __init__(self, names=()):
+        self.names = set()
+        self.grams = {}
+        for name in names:
+            self.add(name)
+            
+    def add(self, name):
+        if name in self.names:
+            return
+        self.names.add(name)
+        folded = name.lower()
+        for n in range(1, SEARCH_NGRAM + 1):
+            for i in range(len(folded) - n + 1):
+                self.grams.setdefault(folded[i:i + n], set()).add(name)
+                
+    def search(self, query, within=None):
+        # Names containing query, ignoring case. within is the result for a
+        # prefix of query, which already holds every possible match.
+        query = query.lower()
+        if within is not None:
+            return {name for name in within if query in name.lower()}
+        if len(query) <= SEARCH_NGRAM:
+            return set(self.grams.get(query, ()))
+        postings = sorted((self.grams.get(query[i:i + SEARCH_NGRAM], set())
+                           for i in range(len(query) - SEARCH_NGRAM + 1)), key=len)
+        return {name for name in set.intersection(*postings) if query in name.lower()}
+
+def species_matching(names):
+    # Species found by a search: by their own name or by their location
+    return {species for species, data in FISH_SPECIES.items()
+            if species in names or data["location"] in names}
+
+class VirtualListView:
+    # Scrollable, sortable and filterable list that only renders the rows in
+    # view. Each row is described by a tuple of (text, color, y) lines; the
+    # rendered row surface is cached by that description, so a row is only
+    # re-rendered when its data changes. Visible rows are composed into one
+    # window surface that is blitted to the screen in a single call, which
+    # makes scrolling cost the same whatever the number of items. With a
+    # search index, "/" starts a type-ahead search: each query's result is
+    # kept, a query extending an earlier one only narrows that result, and
+    # matches are highlighted in the rows.
+    def __init__(self, rect, row_height, describe_row, sort_modes, filters, font, search=None, icon=None):
+        self.rect = pygame.Rect(rect)
+        self.row_height = row_height
+        self.describe_row = describe_row
+        self.icon = icon  # icon(item) -> Surface drawn left of the row's text, or None
+        self.sort_modes = sort_modes  # [(label, key, reverse)]
+        self.filters = filters  # [(label, predicate or None)]
+        self.font = font
+        self.sort_index = 0
+        self.filter_index = 0
+        self.visible_rows = max(1, self.rect.height // row_height)
+        self.max_cached_rows = self.visible_rows * 4
+        
+        self.items = None
+        self.version = None
+        self.sorted_view = []  # Items after filtering and sorting
+        self.sorted_groups = []  # Search group number of each sorted item
+        self.groups = []  # Group keys by number
+        self.view = []  # Sorted items matching the search
+        # search is (SearchIndex, group, select): group(item) is a hashable
+        # key shared by items that match the same names (a catch's species
+        # and bait), and select(matching names) returns a predicate for the
+        # groups to keep, so a search tests each group once, not each item
+        self.search = search
+        self.query = ""
+        self.typing = False
+        self.results = {}  # query -> (matching names, view, groups)
+        self.first_row = 0
+        self.row_cache = OrderedDict()
+        self.window = ASSETS.new(self.rect.size)
+        self.window_dirty = True
+        self.status_surface = None
+        
+    def formats_changed(self):
+        # Rows were rendered in the old display format
+        self.row_cache.clear()
+        self.window = ASSETS.new(self.rect.size)
+        self.window_dirty = True
+        self.status_surface = None
+        
+    def set_items(self, items, version):
+        # Re-filter and re-sort only when the underlying data changed
+        if items is not self.items or version != self.version:
+            self.items = items
+            self.version = version
+            self.rebuild()
+            
+    def rebuild(self):
+        items = self.items or []
+        label, key, reverse = self.sort_modes[self.sort_index]
+        if hasattr(items, "query"):
+            # Stored catches filter and sort in the database and are fetched
+            # a page at a time as rows scroll into view
+            self.sorted_view = items.query(self.filters[self.filter_index][0], label)
+        else:
+            predicate = self.filters[self.filter_index][1]
+            if predicate is not None:
+                items = [item for item in items if predicate(item)]
+            if key is None:
+                self.sorted_view = list(reversed(items)) if reverse else list(items)
+            else:
+                self.sorted_view = sorted(items, key=key, reverse=reverse)
+        self.results = {}
+        if self.search is not None and not hasattr(self.items, "query"):
+            # Groups are numbered so that narrowing only hashes small ints
+            numbers = {}
+            group = self.search[1]
+            self.sorted_groups = [numbers.setdefault(group(item), len(numbers)) for item in self.sorted_view]
+            self.groups = list(numbers)
+        self.apply_search()
+        
+    def apply_search(self):
+        query = self.query
+        if not query:
+            self.view = self.sorted_view
+        elif query in self.results:
+            self.view = self.results[query][1]
+        else:
+            # Start from the longest earlier query this one extends
+            prefix = next((query[:n] for n in range(len(query) - 1, 0, -1) if query[:n] in self.results), None)
+            if prefix:
+                parent_names, parent, parent_groups = self.results[prefix]
+            else:
+                parent_names, parent, parent_groups = None, self.sorted_view, self.sorted_groups
+            index, _, select = self.search
+            names = index.search(query, parent_names)
+            if names == parent_names:
+                view, groups = parent, parent_groups
+            elif hasattr(self.items, "query"):
+                view, groups = self.items.query(self.filters[self.filter_index][0],
+                                                self.sort_modes[self.sort_index][0], names), None
+            else:
+                keep = select(names)
+                wanted = {number for number, group in enumerate(self.groups) if keep(group)}
+                mask = list(map(wanted.__contains__, parent_groups))
+                view = list(itertools.compress(parent, mask))
+                groups = list(itertools.compress(parent_groups, mask))
+            self.results[query] = (names, view, groups)
+            self.view = view
+        self.scroll_to(self.first_row)
+        self.window_dirty = True
+        self.status_surface = None
+        
+    def set_query(self, query):
+        if query != self.query:
+            self.query = query
+            self.first_row = 0
+            self.apply_search()
+            
+    def handle_search_key(self, event):
+        # Keys typed into the search box; navigation keys fall through
+        if event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+            self.typing = False
+            self.status_surface = None
+        elif event.key == pygame.K_ESCAPE:
+            self.typing = False
+            self.set_query("")
+            self.status_surface = None
+        elif event.key == pygame.K_BACKSPACE:
+            self.set_query(self.query[:-1])
+        elif event.unicode and event.unicode.isprintable():
+            self.set_query(self.query + event.unicode)
+        else:
+            return False
+        return True
+        
+    def scroll_to(self, row):
+        row = max(0, min(row, len(self.view) - self.visible_rows))
+        if row != self.first_row:
+            self.first_row = row
+            self.window_dirty = True
+            self.status_surface = None
+            
+    def handle_event(self, event):
+        if event.type == pygame.MOUSEWHEEL:
+            self.scroll_to(self.first_row - event.y * 3)
+            return True
+        if event.type != pygame.KEYDOWN:
+            return False
+        if self.typing and self.handle_search_key(event):
+            return True
+        if event.key == pygame.K_UP:
+            self.scroll_to(self.first_row - 1)
+        elif event.key == pygame.K_DOWN:
+            self.scroll_to(self.first_row + 1)
+        elif event.key == pygame.K_PAGEUP:
+            self.scroll_to(self.first_row - self.visible_rows)
+        elif event.key == pygame.K_PAGEDOWN:
+            self.scroll_to(self.first_row + self.visible_rows)
+        elif event.key == pygame.K_HOME:
+            self.scroll_to(0)
+        elif event.key == pygame.K_END:
+            self.scroll_to(len(self.view))
+        elif event.key == pygame.K_s:
+            self.sort_index = (self.sort_index + 1) % len(self.sort_modes)
+            self.rebuild()
+        elif event.key == pygame.K_f:
+            self.filter_index = (self.filter_index + 1) % len(self.filters)
+            self.first_row = 0
+            self.rebuild()
+        elif event.key == pygame.K_SLASH and self.search is not None:
+            self.typing = True
+            self.status_surface = None
+        elif event.key == pygame.K_ESCAPE and self.query:
+            # The first ESC clears the search, the next one leaves the list
+            self.set_query("")
+        else:
+            return False
+        return True
+        
+    def row_surface(self, item):
+        description = self.describe_row(item)
+        icon = self.icon(item) if self.icon is not None else None
+        key = (description, self.query.lower(), icon)
+        surface = self.row_cache.get(key)
+        if surface is not None:
+            self.row_cache.move_to_end(key)
+            return surface
+        surface = ASSETS.new((self.rect.width - 12, self.row_height))
+        surface.fill(DARK_GREEN)
+        query = key[1]
+        left = 0
+        if icon is not None:
+            surface.blit(icon, (0, (self.row_height - icon.get_height()) // 2 - 4))
+            left = icon.get_width() + 10
+        for text, color, y in description:
+            rendered = self.font.render(text, True, color)
+            if query:
+                # Mark every occurrence of the query behind the text
+                folded = text.lower()
+                start = folded.find(query)
+                while start >= 0:
+                    x = self.font.size(text[:start])[0]
+                    width = self.font.size(text[start:start + len(query)])[0]
+                    pygame.draw.rect(surface, SEARCH_HIGHLIGHT, (left + x, y, width, rendered.get_height()))
+                    start = folded.find(query, start + len(query))
+            surface.blit(rendered, (left, y))
+        self.row_cache[key] = surface
+        if len(self.row_cache) > self.max_cached_rows:
+            self.row_cache.popitem(last=False)
+        return surface
+        
+    def compose(self):
+        self.window.fill(DARK_GREEN)
+        visible = self.view[self.first_row:self.first_row + self.visible_rows]
+        for i, item in enumerate(visible):
+            self.window.blit(self.row_surface(item), (0, i * self.row_height))
+            
+        # Scrollbar
+        total = len(self.view)
+        if total > self.visible_rows:
+            track_height = self.rect.height
+            thumb_height = max(20, track_height * self.visible_rows // total)
+            thumb_y = (track_height - thumb_height) * self.first_row // (total - self.visible_rows)
+            pygame.draw.rect(self.window, (20, 90, 20), (self.rect.width - 8, 0, 8, track_height))
+            pygame.draw.rect(self.window, LIGHT_GRAY, (self.rect.width - 8, thumb_y, 8, thumb_height))
+        self.window_dirty = False
+        
+    def draw(self, screen, origin=(0, 0)):
+        if self.window_dirty:
+            self.compose()
+        x, y = self.rect.x - origin[0], self.rect.y - origin[1]
+        screen.blit(self.window, (x, y))
+        
+        if self.status_surface is None:
+            total = len(self.view)
+            last = min(total, self.first_row + self.visible_rows)
+            status = (f"Sort: {self.sort_modes[self.sort_index][0]} (S) | "
+                      f"Filter: {self.filters[self.filter_index][0]} (F) | "
+                      f"{self.first_row + 1 if total else 0}-{last} of {total}")
+            if self.typing or self.query:
+                status += f" | Search: {self.query}{'_' if self.typing else ''}"
+            elif self.search is not None:
+                status += " | Search (/)"
+            self.status_surface = ASSETS.prepare(self.font.render(status, True, LIGHT_GRAY), "alpha")
+        screen.blit(self.status_surface, (x, y - 25))
+        
+    def needs_redraw(self):
+        return self.window_dirty or self.status_surface is None
+
+# Columns of an exported history row, in CSV order
+EXPORT_FIELDS = ["time", "event", "species", "weight", "length", "rarity", "difficulty",
+                 "bait", "personal_record", "quest", "reward", "reward_type"]
+
+class ModelEvents:
+    # Minimal publish/subscribe hub. Game code notifies a topic ("catches",
+    # "quests", "rewards", "menu") whenever that part of the model changes;
+    # retained screens subscribe to invalidate the widgets showing it.
+    def __init__(self):
+        self.subscribers = {}
+        
+    def subscribe(self, topic, callback):
+        self.subscribers.setdefault(topic, []).append(callback)
+        
+    def notify(self, topic):
+        for callback in self.subscribers.get(topic, ()):
+            callback()
+
+class Widget:
+    # Base of the retained UI. Widgets keep what they rendered and only tell
+    # their parent to recompose when invalidated. Rects are in screen
+    # coordinates; origin is the screen position of the surface drawn into.
+    def __init__(self, rect):
+        self.rect = pygame.Rect(rect)
+        self.parent = None
+        self.visible = True
+        
+    def invalidate(self):
+        if self.parent is not None:
+            self.parent.invalidate()
+            
+    def set_visible(self, visible):
+        if visible != self.visible:
+            self.visible = visible
+            self.invalidate()
+            
+    def formats_changed(self):
+        # The display format changed: drop or convert what was rendered
+        pass
+        
+    def draw(self, target, origin):
+        pass
+
+class Label(Widget):
+    def __init__(self, pos, text, font, color, center=False):
+        super().__init__((pos, (0, 0)))
+        self.anchor = pos
+        self.center = center
+        self.font = font
+        self.text = text
+        self.color = color
+        self.surface = None
+        
+    def set(self, text=None, color=None):
+        text = self.text if text is None else text
+        color = self.color if color is None else color
+        if text != self.text or color != self.color:
+            self.text = text
+            self.color = color
+            self.surface = None
+            self.invalidate()
+            
+    def formats_changed(self):
+        self.surface = None
+        self.invalidate()
+            
+    def draw(self, target, origin):
+        if self.surface is None:
+            self.surface = ASSETS.prepare(self.font.render(self.text, True, self.color), "alpha")
+            x, y = self.anchor
+            if self.center:
+                x -= self.surface.get_width() // 2
+            self.rect = self.surface.get_rect(topleft=(x, y))
+        target.blit(self.surface, (self.rect.x - origin[0], self.rect.y - origin[1]))
+
+class Image(Widget):
+    def __init__(self, pos, surface):
+        super().__init__(surface.get_rect(topleft=pos))
+        self.surface = ASSETS.prepare(surface)
+        
+    def formats_changed(self):
+        self.surface = ASSETS.prepare(self.surface)
+        self.invalidate()
+        
+    def draw(self, target, origin):
+        target.blit(self.surface, (self.rect.x - origin[0], self.rect.y - origin[1]))
+
+class ListWidget(Widget):
+    # Retained wrapper around a VirtualListView
+    def __init__(self, view):
+        super().__init__(view.rect)
+        self.view = view
+        
+    def handle_event(self, event):
+        if self.view.handle_event(event):
+            self.invalidate()
+            return True
+        return False
+        
+    def set_items(self, items, version):
+        self.view.set_items(items, version)
+        if self.view.needs_redraw():
+            self.invalidate()
+            
+    def formats_changed(self):
+        self.view.formats_changed()
+        self.invalidate()
+            
+    def draw(self, target, origin):
+        self.view.draw(target, origin)
+
+class Panel(Widget):
+    # Container that caches the composition of its children. It is
+    # recomposed only after one of them was invalidated; otherwise drawing
+    # it is a single blit of the cached surface.
+    def __init__(self, rect, background=None, border=None):
+        super().__init__(rect)
+        self.background = background
+        self.border = border
+        self.children = []
+        self.surface = None
+        self.dirty = True
+        
+    def add(self, child):
+        child.parent = self
+        self.children.append(child)
+        self.invalidate()
+        return child
+        
+    def clear(self):
+        for child in self.children:
+            child.parent = None
+        self.children = []
+        self.invalidate()
+        
+    def invalidate(self):
+        if not self.dirty:
+            self.dirty = True
+            super().invalidate()
+            
+    def formats_changed(self):
+        self.surface = None
+        for child in self.children:
+            child.formats_changed()
+        self.invalidate()
+            
+    def render(self):
+        if self.surface is None:
+            self.surface = ASSETS.new(self.rect.size, "alpha" if self.background is None else "opaque")
+        self.surface.fill(self.background or (0, 0, 0, 0))
+        origin = self.rect.topleft
+        for child in self.children:
+            if child.visible:
+                child.draw(self.surface, origin)
+        if self.border:
+            pygame.draw.rect(self.surface, self.border, self.surface.get_rect(), 3)
+        self.dirty = False
+        
+    def draw(self, target, origin):
+        if self.dirty:
+            self.render()
+        target.blit(self.surface, (self.rect.x - origin[0], self.rect.y - origin[1]))
+
+class RetainedScreen(Panel):
+    # Full-screen root panel. Screens that depend on game data set stale
+    # from their model subscriptions and pull fresh data in refresh(), which
+    # runs only when the screen is actually shown.
+    def __init__(self, game):
+        super().__init__((0, 0, SCREEN_WIDTH, SCREEN_HEIGHT), DARK_GREEN)
+        self.game = game
+        self.stale = True
+        ASSETS.on_display_change(self.formats_changed)
+        
+    def mark_stale(self):
+        self.stale = True
+        self.invalidate()
+        
+    def refresh(self):
+        pass
+        
+    def draw(self, screen, origin=(0, 0)):
+        if self.stale:
+            self.stale = False
+            self.refresh()
+        super().draw(screen, origin)
+
+class MenuScreen(RetainedScreen):
+    def __init__(self, game):
+        super().__init__(game)
+        # Forest decoration is generated once from a fixed seed
+        decoration = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT//3 + 20), pygame.SRCALPHA)
+        rng = random.Random(MENU_DECORATION_SEED)
+        for i in range(10):
+            x = rng.randint(0, SCREEN_WIDTH)
+            y = rng.randint(0, SCREEN_HEIGHT//3)
+            pygame.draw.rect(decoration, BROWN, (x, y, 15, 40))
+            pygame.draw.circle(decoration, GREEN, (x + 7, y), 20)
+        self.add(Image((0, 0), decoration))
+        
+        self.add(Label((SCREEN_WIDTH//2 - 250, 100), "European Forest Fishing Adventure", game.font, WHITE))
+        self.add(Label((SCREEN_WIDTH//2 - 100, 140), "A 2D Fishing Adventure", game.small_font, LIGHT_GRAY))
+        self.options = [self.add(Label((SCREEN_WIDTH//2 - 100, 250 + i * 50), option, game.font, WHITE))
+                        for i, option in enumerate(game.menu_options)]
+        self.profile_label = self.add(Label((SCREEN_WIDTH//2, 190), "", game.small_font, YELLOW, center=True))
+        instructions = [
+            "Use UP/DOWN arrows to navigate",
+            "Press ENTER to select",
+            "ESC to return to menu"
+        ]
+        for i, instruction in enumerate(instructions):
+            self.add(Label((SCREEN_WIDTH//2 - 150, SCREEN_HEIGHT - 150 + i * 25), instruction,
+                           game.small_font, LIGHT_GRAY))
+        game.model_events.subscribe("menu", self.mark_stale)
+        
+    def refresh(self):
+        for i, label in enumerate(self.options):
+            label.set(color=YELLOW if i == self.game.menu_selection else WHITE)
+        if self.game.profile_store is not None:
+            self.profile_label.set(f"Profile: {self.game.profile_name} (LEFT/RIGHT to switch, N for new)")
+
+class InventoryScreen(RetainedScreen):
+    def __init__(self, game):
+        super().__init__(game)
+        self.add(Label((SCREEN_WIDTH//2 - 150, 50), "Inventory - Caught Fish", game.font, WHITE))
+        self.empty_label = self.add(Label((SCREEN_WIDTH//2 - 100, 200), "No fish caught yet!", game.font, WHITE))
+        self.list = self.add(ListWidget(game.inventory_list))
+        self.add(Label((SCREEN_WIDTH//2, SCREEN_HEIGHT - 50), "Press ESC to return | UP/DOWN/Wheel: Scroll",
+                       game.font, WHITE, center=True))
+        game.model_events.subscribe("catches", self.mark_stale)
+        
+    def refresh(self):
+        has_fish = bool(self.game.caught_fish)
+        self.empty_label.set_visible(not has_fish)
+        self.list.set_visible(has_fish)
+        self.list.set_items(self.game.caught_fish, self.game.catch_version)
+
+class GlossaryScreen(RetainedScreen):
+    def __init__(self, game):
+        super().__init__(game)
+        self.add(Label((SCREEN_WIDTH//2 - 100, 50), "Fish Glossary", game.font, WHITE))
+        self.list = self.add(ListWidget(game.glossary_list))
+        self.add(Label((SCREEN_WIDTH//2, SCREEN_HEIGHT - 50), "Press ESC to return | UP/DOWN/Wheel: Scroll",
+                       game.font, WHITE, center=True))
+        game.model_events.subscribe("catches", self.mark_stale)
+        
+    def refresh(self):
+        # Rows show whether each species has been caught
+        self.list.set_items(self.game.glossary_list.items, self.game.catch_version)
+
+class QuestScreen(RetainedScreen):
+    def __init__(self, game):
+        super().__init__(game)
+        self.add(Label((SCREEN_WIDTH//2 - 100, 50), "Quests & Rewards", game.font, WHITE))
+        self.entries = self.add(Panel((0, 100, SCREEN_WIDTH, SCREEN_HEIGHT - 160)))
+        self.add(Label((SCREEN_WIDTH//2 - 100, SCREEN_HEIGHT - 50), "Press ESC to return", game.font, WHITE))
+        game.model_events.subscribe("quests", self.mark_stale)
+        game.model_events.subscribe("rewards", self.mark_stale)
+        
+    def refresh(self):
+        game = self.game
+        entries = self.entries
+        entries.clear()
+        y_pos = 120
+        for quest in game.quests:
+            # Quest name and progress
+            color = GREEN if quest.completed else WHITE
+            entries.add(Label((50, y_pos), f"{quest.name}: {quest.current}/{quest.target}", game.font, color))
+            
+            # Quest description
+            entries.add(Label((50, y_pos + 25), quest.description, game.small_font, LIGHT_GRAY))
+            
+            # Reward info
+            if not quest.completed:
+                reward_text = f"Reward: {quest.reward.name} - {quest.reward.description}"
+                entries.add(Label((50, y_pos + 45), reward_text, game.small_font, YELLOW))
+            else:
+                entries.add(Label((50, y_pos + 45), "COMPLETED!", game.small_font, GREEN))
+            y_pos += 80
+            
+        # Show earned rewards
+        if game.rewards_earned:
+            entries.add(Label((50, y_pos + 20), "Earned Rewards:", game.font, GOLD))
+            for i, reward in enumerate(game.rewards_earned):
+                entries.add(Label((50, y_pos + 50 + i * 25), f"{reward.name}: {reward.description}",
+                                  game.small_font, WHITE))
+
+class ChunkCache:
+    # Generated world chunks in an LRU bounded by memory. Chunks the camera
+    # is about to reach are built on a worker thread; a chunk needed for the
+    # current frame that is not ready yet is built inline, which only
+    # happens after a jump such as travel or loading a save.
+    def __init__(self, builder, memory_cap=CHUNK_CACHE_BYTES):
+        self.builder = builder
+        self.memory_cap = memory_cap
+        self.chunks = OrderedDict()  # (location key, layer name, index) -> Surface
+        self.bytes = 0
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="chunk-cache", daemon=True)
+        self.thread.start()
+        ASSETS.on_display_change(self.clear)
+        
+    def clear(self):
+        with self.lock:
+            self.chunks.clear()
+            self.bytes = 0
+        
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.chunks
+            
+    def get(self, key):
+        with self.lock:
+            chunk = self.chunks.get(key)
+            if chunk is not None:
+                self.chunks.move_to_end(key)
+            return chunk
+            
+    def get_now(self, key):
+        chunk = self.get(key)
+        if chunk is None:
+            chunk = self.builder(key)
+            self.store(key, chunk)
+        return chunk
+        
+    def prefetch(self, key):
+        with self.lock:
+            if key in self.chunks or key in self.pending:
+                return
+            self.pending.add(key)
+        self.requests.put(key)
+        
+    def run(self):
+        while True:
+            key = self.requests.get()
+            if key in self:
+                # Built inline while it waited in the queue
+                with self.lock:
+                    self.pending.discard(key)
+                continue
+            try:
+                chunk = self.builder(key)
+            except Exception as e:
+                # Keep the worker alive; the main thread builds this chunk
+                # inline if it is needed, and raises there
+                print(f"Chunk {key} failed to build: {e!r}", file=sys.stderr)
+                with self.lock:
+                    self.pending.discard(key)
+                continue
+            self.store(key, chunk)
+            
+    def store(self, key, chunk):
+        size = chunk.get_width() * chunk.get_height() * chunk.get_bytesize()
+        with self.lock:
+            self.pending.discard(key)
+            if key in self.chunks:
+                return
+            self.chunks[key] = chunk
+            self.bytes += size
+            # Evict least recently used chunks; visible ones are touched every frame
+            while self.bytes > self.memory_cap and len(self.chunks) > 1:
+                _, evicted = self.chunks.popitem(last=False)
+                self.bytes -= evicted.get_width() * evicted.get_height() * evicted.get_bytesize()
+
+class World:
+    # A location wider than the screen. The camera follows the player and
+    # each parallax layer is cut into CHUNK_WIDTH-wide chunks generated from
+    # the location seed, chunk index and layer, so any chunk can be rebuilt
+    # on its own and comes out the same every time. Only chunks overlapping
+    # the view are blitted and the ones just beyond either edge are built
+    # ahead on the chunk worker, so the cost of a frame depends on the screen
+    # size rather than on the size of the world.
+    def __init__(self, location_key, width=WORLD_WIDTH):
+        self.width = width
+        self.camera_x = 0
+        self.layers = {layer.name: layer for layer in PARALLAX_LAYERS}
+        self.chunks = ChunkCache(self.build_chunk)
+        self.set_location(location_key)
+        
+    def set_location(self, key):
+        self.location_key = key
+        self.location = LOCATIONS[key]
+        
+    def follow(self, x):
+        # Centre the camera on x without showing past the world edges
+        self.camera_x = int(max(0, min(x - SCREEN_WIDTH // 2, self.width - SCREEN_WIDTH)))
+        
+    def to_world(self, pos):
+        return pos[0] + self.camera_x, pos[1]
+        
+    def view_rect(self):
+        return pygame.Rect(self.camera_x, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+        
+    def visible_chunks(self, layer):
+        scroll = round(self.camera_x * layer.parallax)
+        first = scroll // CHUNK_WIDTH
+        last = (scroll + SCREEN_WIDTH - 1) // CHUNK_WIDTH
+        return [(index, index * CHUNK_WIDTH - scroll) for index in range(first, last + 1)]
+        
+    def draw_layers(self, screen, names):
+        key = self.location_key
+        for name in names:
+            layer = self.layers[name]
+            visible = self.visible_chunks(layer)
+            for index, x in visible:
+                screen.blit(self.chunks.get_now((key, name, index)), (x, layer.top))
+            # Have the neighbours on both sides ready before they scroll in
+            self.chunks.prefetch((key, name, visible[0][0] - 1))
+            self.chunks.prefetch((key, name, visible[-1][0] + 1))
+            
+    def draw_backdrop(self, screen):
+        screen.fill(self.location.ground_color)
+        self.draw_layers(screen, BACKDROP_LAYERS)
+        
+    def draw_shore(self, screen):
+        self.draw_layers(screen, ("shore",))
+        
+    def view_keys(self, location_key):
+        return [(location_key, layer.name, index)
+                for layer in PARALLAX_LAYERS for index, _ in self.visible_chunks(layer)]
+        
+    def prefetch_view(self, location_key):
+        for key in self.view_keys(location_key):
+            self.chunks.prefetch(key)
+            
+    def view_ready(self, location_key):
+        return all(key in self.chunks for key in self.view_keys(location_key))
+        
+    def build_chunk(self, key):
+        # Runs on the chunk worker or, for a chunk needed this frame, on the
+        # main thread; it only uses seeded generators of its own
+        location_key, name, index = key
+        location = LOCATIONS[location_key]
+        layer = self.layers[name]
+        chunk = ASSETS.new((CHUNK_WIDTH, layer.height))
+        chunk.fill(CHUNK_COLORKEY)
+        chunk.set_colorkey(CHUNK_COLORKEY)
+        if name == "mountains":
+            self.draw_mountains(chunk, location, layer, index)
+        elif layer.trees:
+            self.draw_trees(chunk, location, layer, index)
+        else:
+            self.draw_reeds(chunk, location, layer, index)
+        return ASSETS.prepare(chunk, "colorkey")
+        
+    def draw_mountains(self, chunk, location, layer, index):
+        # Peaks sit on a fixed lattice so they line up across chunk edges
+        left = index * CHUNK_WIDTH
+        for peak in range(left // MOUNTAIN_SPACING - 1, (left + CHUNK_WIDTH) // MOUNTAIN_SPACING + 1):
+            rng = random.Random(f"{location.seed}:mountains:{peak}")
+            height = rng.randint(70, layer.height)
+            x = peak * MOUNTAIN_SPACING - left
+            points = [(x, layer.height), (x + MOUNTAIN_SPACING // 2, layer.height - height),
+                      (x + MOUNTAIN_SPACING, layer.height)]
+            pygame.draw.polygon(chunk, location.mountain_color, points)
+            
+    def tree_positions(self, location, layer, index):
+        rng = random.Random(f"{location.seed}:{layer.name}:{index}")
+        expected = layer.trees * CHUNK_WIDTH / SCREEN_WIDTH
+        count = int(expected) + (rng.random() < expected % 1)
+        return [(index * CHUNK_WIDTH + rng.randint(0, CHUNK_WIDTH - 1),
+                 rng.randint(0, SCREEN_HEIGHT//2 - layer.depth * 50)) for _ in range(count)]
+                 
+    def draw_trees(self, chunk, location, layer, index):
+        depth = layer.depth
+        left = index * CHUNK_WIDTH
+        # Trees near an edge overhang into the neighbouring chunk, so draw
+        # the neighbours' trees too, always in the same order
+        for neighbour in (index - 1, index, index + 1):
+            for x, y in self.tree_positions(location, layer, neighbour):
+                x -= left
+                y -= layer.top
+                tree_size = 30 - depth * 5
+                # Tree trunk
+                pygame.draw.rect(chunk, location.trunk_color, (x, y, 15 + depth * 5, 50 + depth * 10))
+                # Tree top
+                pygame.draw.circle(chunk, location.canopy_color, (x + 7 + depth * 2, y), tree_size)
+                
+    def draw_reeds(self, chunk, location, layer, index):
+        rng = random.Random(f"{location.seed}:{layer.name}:{index}")
+        water_line = WATER_TOP - layer.top
+        pad_color = tuple(c * 3 // 5 for c in location.canopy_color)
+        reed_color = tuple(c * 4 // 5 for c in location.canopy_color)
+        # Lily pads
+        for _ in range(rng.randint(1, 3)):
+            x = rng.randint(10, CHUNK_WIDTH - 40)
+            y = water_line + rng.randint(6, layer.height - water_line - 10)
+            pygame.draw.ellipse(chunk, pad_color, (x, y, rng.randint(18, 30), 8))
+        # Reed clumps along the bank
+        for _ in range(rng.randint(0, 2)):
+            x = rng.randint(10, CHUNK_WIDTH - 40)
+            for blade in range(rng.randint(3, 6)):
+                base_x = x + blade * 4
+                tip = (base_x + rng.randint(-4, 4), water_line - rng.randint(12, 26))
+                pygame.draw.line(chunk, reed_color, (base_x, water_line + 4), tip, 2)
+
+class HistoryJournal:
+    # Append-only JSON Lines log of catches, releases, quest completions and
+    # rewards. Each event is one write of one line, flushed right away; events
+    # come seconds apart, and a crash then loses at most the line being
+    # written. A session starts on a new line, so a line torn by a crash is
+    # never joined to the next one. The journal is the source for history
+    # exports and can grow far beyond what fits in memory.
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.file = open(path, "a", encoding="utf-8", buffering=1 << 16)
+            if self.file.tell() > 0:
+                with open(path, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        self.file.write("\n")
+        except OSError:
+            # History is a convenience; play on without it
+            self.file = None
+            
+    def record(self, event, **fields):
+        if self.file is None:
+            return
+        record = {"time": round(time.time(), 3), "event": event}
+        record.update(fields)
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.file.flush()
+        
+    def record_fish(self, event, fish):
+        self.record(event, species=fish.species, weight=round(fish.weight, 3),
+                    length=round(fish.length, 2), rarity=fish.rarity.value,
+                    difficulty=fish.difficulty, bait=fish.bait_used,
+                    personal_record=fish.personal_record)
+        
+    def record_quest(self, quest):
+        self.record("quest", quest=quest.id)
+        
+    def record_reward(self, reward):
+        self.record("reward", reward=reward.name, reward_type=reward.type.value)
+        
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+            
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+def parse_export_time(value):
+    # Accept epoch seconds or an ISO date/time
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+def export_history(source_path, output, fmt="csv", compress=False, since=None, until=None,
+                   species=None, events=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    # Stream matching journal records into CSV or JSON Lines. Rows are read
+    # one line at a time and written in chunks of chunk_rows, so memory stays
+    # bounded however long the history is. Reading stops at the journal size
+    # seen when the export started, so events appended meanwhile by the game
+    # never produce a torn last line. Lines that are not records, such as
+    # one torn by a crash, are skipped. output may be a path or "-" for
+    # stdout. Returns (rows written, lines skipped).
+    species = set(species) if species else None
+    events = set(events) if events else None
+    end_offset = os.path.getsize(source_path)
+    
+    if output == "-" and compress:
+        # Closing the wrapper finishes the gzip stream but leaves stdout open
+        out = io.TextIOWrapper(gzip.GzipFile(fileobj=sys.stdout.buffer, mode="wb"),
+                               encoding="utf-8", newline="")
+    elif output == "-":
+        out = sys.stdout
+    else:
+        directory = os.path.dirname(output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if compress:
+            out = gzip.open(output, "wt", encoding="utf-8", newline="")
+        else:
+            out = open(output, "w", encoding="utf-8", newline="")
+            
+    rows = 0
+    skipped = 0
+    chunk = []
+    try:
+        if fmt == "csv":
+            writer = csv.DictWriter(out, EXPORT_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            write_chunk = writer.writerows
+        else:
+            def write_chunk(records):
+                out.write("".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records))
+                
+        with open(source_path, "rb") as source:
+            while source.tell() < end_offset:
+                line = source.readline()
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                if not isinstance(record, dict) or not isinstance(record.get("time"), (int, float)):
+                    skipped += 1
+                    continue
+                if events and record.get("event") not in events:
+                    continue
+                if since is not None and record["time"] < since:
+                    continue
+                if until is not None and record["time"] >= until:
+                    continue
+                if species and record.get("species") not in species:
+                    continue
+                chunk.append(record)
+                if len(chunk) >= chunk_rows:
+                    write_chunk(chunk)
+                    rows += len(chunk)
+                    chunk = []
+        if chunk:
+            write_chunk(chunk)
+            rows += len(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return rows, skipped
+
+class ExportJob(threading.Thread):
+    # Runs export_history in the background for the in-game export key
+    def __init__(self, source_path, output_path):
+        super().__init__(daemon=True)
+        self.source_path = source_path
+        self.output_path = output_path
+        self.rows = 0
+        self.skipped = 0
+        self.error = None
+        self.done = False
+        self.reported = False
+        
+    def run(self):
+        try:
+            self.rows, self.skipped = export_history(self.source_path, self.output_path, compress=True)
+        except (OSError, ValueError) as e:
+            self.error = str(e)
+        self.done = True
+
+def export_main(argv):
+    parser = argparse.ArgumentParser(prog="main.py export",
+                                     description="Export the catch history as CSV or JSON Lines")
+    parser.add_argument("output", help="Output file, or - for stdout")
+    parser.add_argument("--input", default=HISTORY_PATH, help="History journal to read")
+    parser.add_argument("--format", choices=["csv", "jsonl"],
+                        help="Output format (default: from the output file name, else csv)")
+    parser.add_argument("--gzip", action="store_true",
+                        help="Compress the output (implied by a .gz output name)")
+    parser.add_argument("--since", type=parse_export_time, help="Only records at or after this time")
+    parser.add_argument("--until", type=parse_export_time, help="Only records before this time")
+    parser.add_argument("--species", action="append", help="Only this species (repeatable)")
+    parser.add_argument("--events", help="Comma-separated event types: catch,release,quest,reward")
+    parser.add_argument("--chunk-rows", type=int, default=EXPORT_CHUNK_ROWS)
+    args = parser.parse_args(argv)
+    
+    name = args.output[:-3] if args.output.endswith(".gz") else args.output
+    fmt = args.format or ("jsonl" if name.endswith((".jsonl", ".json")) else "csv")
+    compress = args.gzip or args.output.endswith(".gz")
+    events = args.events.split(",") if args.events else None
+    if not os.path.exists(args.input):
+        print(f"No history found at {args.input}", file=sys.stderr)
+        return 1
+    rows, skipped = export_history(args.input, args.output, fmt, compress, args.since, args.until,
+                                   args.species, events, args.chunk_rows)
+    print(f"Exported {rows} rows", file=sys.stderr)
+    if skipped:
+        print(f"Skipped {skipped} malformed lines in {args.input}", file=sys.stderr)
+    return 0
+
+class AutosaveWorker:
+    # Crash-safe background saving. The game thread only takes a snapshot:
+    # caught fish are copied by reference in chunks, spread over as many
+    # frames as needed to stay inside budget_us, and the small remaining
+    # state is copied when the last chunk is done. A worker thread then
+    # encodes the snapshot and writes it with write, fsync and atomic rename,
+    # so the save file is always either the old or the new complete state.
+    # Changes arriving faster than interval are coalesced into one save.
+    def __init__(self, path, interval=AUTOSAVE_INTERVAL, budget_us=AUTOSAVE_BUDGET_US):
+        self.path = path
+        self.interval = interval
+        self.budget = budget_us / 1000000
+        self.dirty = False
+        self.last_save_time = 0.0
+        self.copying = None  # Partially copied caught fish, or None
+        self.pending = None  # Latest complete snapshot for the worker
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopping = False
+        
+        # Encoded fish are reused between saves while the list prefix is unchanged
+        self.encoded_source = []
+        self.encoded_fish = []
+        
+        # Statistics
+        self.saves = 0
+        self.last_write_ms = 0.0
+        self.max_tick_us = 0.0
+        self.error = None
+        
+        self.thread = threading.Thread(target=self.run, name="autosave", daemon=True)
+        self.thread.start()
+        
+    def mark_dirty(self):
+        self.dirty = True
+        # A change during a partial copy could invalidate it; start over
+        self.copying = None
+        
+    def tick(self, game):
+        # Called once per frame on the game thread
+        if self.copying is None:
+            if not self.dirty or time.monotonic() - self.last_save_time < self.interval:
+                return
+            self.dirty = False
+            self.copying = []
+            
+        start = time.perf_counter()
+        deadline = start + self.budget
+        source = game.caught_fish
+        copied = self.copying
+        while len(copied) < len(source):
+            copied.extend(source[len(copied):len(copied) + AUTOSAVE_COPY_CHUNK])
+            if time.perf_counter() >= deadline:
+                break
+        else:
+            self.submit(self.snapshot_state(game, copied))
+            self.copying = None
+        self.max_tick_us = max(self.max_tick_us, (time.perf_counter() - start) * 1000000)
+        
+    def snapshot_state(self, game, caught_fish):
+        return {
+            "caught_fish": caught_fish,
+            "player": [game.player.x, game.player.y],
+            "current_bait": game.current_bait,
+            "available_baits": list(game.available_baits),
+            "quests": [[q.id, q.current, q.completed, reward_to_list(q.reward)] for q in game.quests],
+            "rewards": [reward_to_list(r) for r in game.rewards_earned],
+            "locations": list(game.unlocked_locations),
+            "location": game.current_location,
+            "stats": game.statistics.to_dict()
+        }
+        
+    def submit(self, snapshot):
+        with self.lock:
+            self.pending = snapshot
+        self.last_save_time = time.monotonic()
+        self.wake.set()
+        
+    def save_now(self, game):
+        # Synchronous final snapshot, used when the game quits
+        self.submit(self.snapshot_state(game, list(game.caught_fish)))
+        self.close()
+        
+    def close(self):
+        self.stopping = True
+        self.wake.set()
+        self.thread.join()
+        
+    def run(self):
+        while True:
+            self.wake.wait()
+            self.wake.clear()
+            with self.lock:
+                snapshot, self.pending = self.pending, None
+            if snapshot is not None:
+                try:
+                    self.write(snapshot)
+                except OSError as e:
+                    self.error = str(e)
+            if self.stopping and self.pending is None:
+                return
+                
+    def encode_fish(self, caught_fish):
+        # Re-encode only the fish that differ from the previous save
+        reuse = 0
+        previous = self.encoded_source
+        limit = min(len(previous), len(caught_fish))
+        while reuse < limit and previous[reuse] is caught_fish[reuse]:
+            reuse += 1
+        encoded = self.encoded_fish[:reuse]
+        for i in range(reuse, len(caught_fish)):
+            fish = caught_fish[i]
+            encoded.append(json.dumps([fish.species, fish.weight, fish.length, fish.rarity.value,
+                                       fish.difficulty, fish.bait_used, fish.catch_time,
+                                       fish.personal_record]))
+            if i % AUTOSAVE_COPY_CHUNK == 0:
+                # Hand the GIL back so a large first save never holds up a frame
+                time.sleep(0)
+        self.encoded_source = caught_fish
+        self.encoded_fish = encoded
+        return encoded
+        
+    def write(self, snapshot):
+        start = time.perf_counter()
+        fish = self.encode_fish(snapshot.pop("caught_fish"))
+        snapshot["version"] = 1
+        snapshot["saved_at"] = time.time()
+        data = json.dumps(snapshot)[:-1] + ',"caught_fish":[' + ",".join(fish) + "]}"
+        
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        # Make the rename itself durable
+        if hasattr(os, "O_DIRECTORY"):
+            dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        self.saves += 1
+        self.last_write_ms = (time.perf_counter() - start) * 1000
+
+def reward_to_list(reward):
+    return [reward.type.value, reward.name, reward.description, reward.value]
+
+def reward_from_list(data):
+    return Reward(RewardType(data[0]), data[1], data[2], data[3])
+
+def load_autosave(path):
+    # Returns the saved state, or None if there is no usable save
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != 1:
+        return None
+    return data
+
+# Profile database layout. Catch rarity is stored as its position in the
+# Rarity enum so that sorting by it matches the in-memory inventory. The
+# species and rarity indexes also carry the columns searches filter and
+# group by, so those never have to read the catches themselves; they replace
+# the narrower indexes of earlier databases.
+PROFILE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    state TEXT,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS catches (
+    id INTEGER PRIMARY KEY,
+    profile_id INTEGER NOT NULL REFERENCES profiles (id),
+    species TEXT NOT NULL,
+    weight REAL NOT NULL,
+    length REAL NOT NULL,
+    rarity INTEGER NOT NULL,
+    difficulty INTEGER NOT NULL,
+    bait TEXT NOT NULL,
+    catch_time INTEGER,
+    caught_at REAL NOT NULL,
+    personal_record INTEGER NOT NULL
+);
+DROP INDEX IF EXISTS catches_species;
+DROP INDEX IF EXISTS catches_rarity;
+CREATE INDEX IF NOT EXISTS catches_species_bait ON catches (profile_id, species, bait, rarity, weight);
+CREATE INDEX IF NOT EXISTS catches_rarity_weight ON catches (profile_id, rarity, weight, species, bait);
+CREATE INDEX IF NOT EXISTS catches_weight ON catches (profile_id, weight);
+CREATE INDEX IF NOT EXISTS catches_time ON catches (profile_id, caught_at);
+CREATE TABLE IF NOT EXISTS quests (
+    profile_id INTEGER NOT NULL REFERENCES profiles (id),
+    quest TEXT NOT NULL,
+    current INTEGER NOT NULL,
+    completed INTEGER NOT NULL,
+    reward TEXT NOT NULL,
+    PRIMARY KEY (profile_id, quest)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rewards (
+    id INTEGER PRIMARY KEY,
+    profile_id INTEGER NOT NULL REFERENCES profiles (id),
+    type TEXT NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    value
+);
+CREATE INDEX IF NOT EXISTS rewards_profile ON rewards (profile_id);
+"""
+# Catch writes still waiting for the writer thread, mirrored into temporary
+# tables of the game thread's connection so reads can include them without
+# waiting for a commit. write is the number of the queued write.
+UNSAVED_SCHEMA = """
+PRAGMA temp_store=MEMORY;
+CREATE TEMP TABLE unsaved_catches (
+    id INTEGER PRIMARY KEY,
+    profile_id INTEGER NOT NULL,
+    species TEXT NOT NULL,
+    weight REAL NOT NULL,
+    length REAL NOT NULL,
+    rarity INTEGER NOT NULL,
+    difficulty INTEGER NOT NULL,
+    bait TEXT NOT NULL,
+    catch_time INTEGER,
+    caught_at REAL NOT NULL,
+    personal_record INTEGER NOT NULL,
+    write INTEGER NOT NULL
+);
+CREATE TEMP TABLE unsaved_deletes (
+    id INTEGER PRIMARY KEY,
+    write INTEGER NOT NULL
+);
+"""
+CATCH_RARITIES = list(Rarity)
+CATCH_COLUMNS = "species, weight, length, rarity, difficulty, bait, catch_time, personal_record"
+CATCH_INSERT = ("INSERT INTO catches (id, profile_id, species, weight, length, rarity, difficulty, "
+                "bait, catch_time, caught_at, personal_record) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+UNSAVED_INSERT = ("INSERT INTO temp.unsaved_catches (id, profile_id, species, weight, length, rarity, "
+                  "difficulty, bait, catch_time, caught_at, personal_record, write) "
+                  "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+# Inventory sort modes by label; each is served by one of the catch indexes
+CATCH_ORDERS = {
+    "Rarity": "rarity DESC, weight DESC",
+    "Weight": "weight DESC",
+    "Newest": "caught_at DESC, id DESC",
+    "Oldest": "caught_at, id",
+    "Species": "species, id"
+}
+
+def fish_from_row(row):
+    species, weight, length, rarity, difficulty, bait, catch_time, personal_record = row
+    return Fish(species, weight, length, CATCH_RARITIES[rarity], difficulty, bait, catch_time,
+                bool(personal_record))
+
+class ProfileStore:
+    # Per-player progress in a local SQLite database, for shared kiosks.
+    # Catches stay in the database instead of memory: the inventory pages
+    # through them with LIMIT queries and counts, caught species and
+    # personal records come from the indexes, so opening a profile with
+    # 100k catches is a few small queries rather than a full load. The
+    # database runs in WAL mode so the game thread can read while a writer
+    # thread commits queued writes in batches, one transaction per flush.
+    # Reads never wait for that thread: queued catch writes are mirrored into
+    # temporary tables that catch queries merge in, and the last queued
+    # progress and rewards of each profile are kept in memory. Queries are
+    # fixed strings, so sqlite3's statement cache keeps each one prepared
+    # after its first use.
+    def __init__(self, path, flush_interval=PROFILE_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = self.connect()
+        self.db.executescript(PROFILE_SCHEMA)
+        self.db.executescript(UNSAVED_SCHEMA)
+        # Ids are handed out here so a catch can be deleted before it is
+        # written, and so queued rows can be told apart from committed ones
+        self.next_catch_id = (self.db.execute("SELECT MAX(id) FROM catches").fetchone()[0] or 0) + 1
+        self.next_reward_id = (self.db.execute("SELECT MAX(id) FROM rewards").fetchone()[0] or 0) + 1
+        
+        self.pending = []  # (sql, params) waiting for the writer
+        self.writing = False
+        self.writes = 0  # Writes queued so far, numbered from 1
+        self.saved = 0  # Of those, how many the writer has finished
+        self.pruned = 0  # saved when the temporary tables were last pruned
+        self.unsaved = 0  # Rows in the temporary tables
+        self.progress = {}  # profile id -> last queued (state, quests)
+        self.unsaved_rewards = []  # (write, reward row) possibly not committed yet
+        self.changed = threading.Condition()
+        self.flush_now = threading.Event()
+        self.stopping = False
+        
+        # Statistics
+        self.batches = 0
+        self.rows_written = 0
+        self.last_commit_ms = 0.0
+        self.error = None
+        
+        self.thread = threading.Thread(target=self.run, name="profile-store", daemon=True)
+        self.thread.start()
+        
+    def connect(self):
+        db = sqlite3.connect(self.path, timeout=5.0)
+        db.execute("PRAGMA journal_mode=WAL")
+        # With WAL a commit survives a crash of the game without an fsync
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+        
+    def write(self, sql, params):
+        # Returns the number of the write, to compare with saved
+        with self.changed:
+            self.pending.append((sql, params))
+            self.writes += 1
+            self.changed.notify()
+            return self.writes
+            
+    def sync(self):
+        # Wait until every queued write is committed, so the next read sees it
+        with self.changed:
+            if self.pending or self.writing:
+                self.flush_now.set()
+                self.changed.wait_for(lambda: not self.pending and not self.writing)
+                
+    def close(self):
+        with self.changed:
+            self.stopping = True
+            self.changed.notify()
+        self.flush_now.set()
+        self.thread.join()
+        self.db.close()
+        
+    def run(self):
+        db = self.connect()
+        while True:
+            with self.changed:
+                self.changed.wait_for(lambda: self.pending or self.stopping)
+                if not self.pending:
+                    break
+            # Let writes arriving meanwhile join the same transaction
+            self.flush_now.wait(self.flush_interval)
+            with self.changed:
+                batch, self.pending = self.pending, []
+                self.writing = True
+                self.flush_now.clear()
+            try:
+                self.commit(db, batch)
+            except sqlite3.Error as e:
+                self.error = str(e)
+            with self.changed:
+                self.writing = False
+                self.saved += len(batch)
+                self.changed.notify_all()
+        db.close()
+        
+    def commit(self, db, batch):
+        start = time.perf_counter()
+        with db:
+            # Runs of the same statement go to executemany; state documents
+            # are encoded here rather than on the game thread
+            for sql, group in itertools.groupby(batch, key=lambda op: op[0]):
+                db.executemany(sql, [tuple(json.dumps(p) if isinstance(p, dict) else p for p in params)
+                                     for _, params in group])
+        self.batches += 1
+        self.rows_written += len(batch)
+        self.last_commit_ms = (time.perf_counter() - start) * 1000
+        
+    def profiles(self):
+        # Profiles are created on this thread, never through the queue
+        return [name for name, in self.db.execute("SELECT name FROM profiles ORDER BY id")]
+        
+    def open_profile(self, name):
+        # Returns (profile id, whether the profile was just created)
+        self.sync()
+        with self.db:
+            created = self.db.execute("INSERT OR IGNORE INTO profiles (name, updated_at) VALUES (?, ?)",
+                                      (name, time.time())).rowcount == 1
+        profile_id, = self.db.execute("SELECT id FROM profiles WHERE name = ?", (name,)).fetchone()
+        return profile_id, created
+        
+    def load_progress(self, profile_id):
+        # Everything restore_save needs, with the catches left in the database.
+        # A save still in the queue is newer than the database; it is copied
+        # through JSON like the database would, so the game cannot change
+        # the queued write.
+        if profile_id in self.progress:
+            state, quests = json.loads(json.dumps(self.progress[profile_id]))
+            data = state
+            data["quests"] = quests
+        else:
+            state, = self.db.execute("SELECT state FROM profiles WHERE id = ?", (profile_id,)).fetchone()
+            data = json.loads(state) if state else {}
+            data["quests"] = [[quest, current, bool(completed), json.loads(reward)]
+                              for quest, current, completed, reward in self.db.execute(
+                                  "SELECT quest, current, completed, reward FROM quests WHERE profile_id = ?",
+                                  (profile_id,))]
+        data["caught_fish"] = StoredCatches(self, profile_id)
+        # Queued rewards not committed when the query ran are added by id
+        with self.changed:
+            saved = self.saved
+        self.unsaved_rewards = [(write, row) for write, row in self.unsaved_rewards if write > saved]
+        rewards = {reward_id: row for reward_id, *row in self.db.execute(
+            "SELECT id, type, name, description, value FROM rewards WHERE profile_id = ?", (profile_id,))}
+        for _, (reward_id, owner, *row) in self.unsaved_rewards:
+            if owner == profile_id:
+                rewards.setdefault(reward_id, row)
+        data["rewards"] = [rewards[reward_id] for reward_id in sorted(rewards)]
+        return data
+        
+    def save_progress(self, profile_id, state, quests):
+        # state holds the small per-player fields; catches and rewards are
+        # written as they happen
+        self.progress[profile_id] = (state, quests)
+        self.write("UPDATE profiles SET state = ?, updated_at = ? WHERE id = ?",
+                   (state, time.time(), profile_id))
+        for quest_id, current, completed, reward in quests:
+            self.write("INSERT OR REPLACE INTO quests (profile_id, quest, current, completed, reward) "
+                       "VALUES (?, ?, ?, ?, ?)",
+                       (profile_id, quest_id, current, int(completed), json.dumps(reward)))
+            
+    def add_reward(self, profile_id, reward):
+        row = (self.next_reward_id, profile_id, *reward_to_list(reward))
+        self.next_reward_id += 1
+        write = self.write("INSERT INTO rewards (id, profile_id, type, name, description, value) "
+                           "VALUES (?, ?, ?, ?, ?, ?)", row)
+        self.unsaved_rewards.append((write, row))
+        
+    def queue_catch(self, profile_id, fish, caught_at):
+        # Returns the write number and row of the catch
+        row = (self.next_catch_id, profile_id, fish.species, fish.weight, fish.length,
+               CATCH_RARITIES.index(fish.rarity), fish.difficulty, fish.bait_used, fish.catch_time,
+               caught_at, int(fish.personal_record))
+        self.next_catch_id += 1
+        return self.write(CATCH_INSERT, row), row
+        
+    def add_catch(self, profile_id, fish):
+        write, row = self.queue_catch(profile_id, fish, time.time())
+        with self.db:
+            self.db.execute(UNSAVED_INSERT, row + (write,))
+        self.unsaved += 1
+        return row[0]
+        
+    def delete_catch(self, catch_id):
+        write = self.write("DELETE FROM catches WHERE id = ?", (catch_id,))
+        with self.db:
+            self.db.execute("INSERT INTO temp.unsaved_deletes (id, write) VALUES (?, ?)", (catch_id, write))
+        self.unsaved += 1
+        
+    def prune(self):
+        # Forget mirrored writes the writer has finished since the last read
+        with self.changed:
+            saved = self.saved
+        if self.unsaved and saved > self.pruned:
+            with self.db:
+                for table in ("unsaved_catches", "unsaved_deletes"):
+                    self.unsaved -= self.db.execute(f"DELETE FROM temp.{table} WHERE write <= ?",
+                                                    (saved,)).rowcount
+        self.pruned = saved
+        
+    def import_save(self, profile_id, data):
+        # Carry a single-player autosave over into a profile
+        for i, row in enumerate(data["caught_fish"]):
+            species, weight, length, rarity, difficulty, bait, catch_time, personal_record = row
+            # Keep the saved order; the wall-clock time of old catches is
+            # unknown. Nothing reads them before the sync below.
+            self.queue_catch(profile_id, Fish(species, weight, length, Rarity(rarity), difficulty, bait,
+                                              catch_time, personal_record), caught_at=i)
+        state = {key: data[key] for key in ("player", "current_bait", "available_baits", "locations",
+                                            "location", "stats") if key in data}
+        self.save_progress(profile_id, state, data["quests"])
+        for reward in data["rewards"]:
+            self.add_reward(profile_id, reward_from_list(reward))
+        self.sync()
+        
+    def select_catches(self, columns, where, params, group=None, order=None, page=None):
+        # A cursor over the catches matching where, queued writes included;
+        # page is (limit, offset). Without queued writes this is a plain
+        # query. Otherwise committed catches minus queued deletes are
+        # followed by queued catches not committed yet, so a catch the writer
+        # commits meanwhile shows up once either way. Each side is grouped on
+        # its own, and ordering the union lets SQLite merge the two sides
+        # instead of sorting every catch.
+        self.prune()
+        group = f" GROUP BY {group}" if group else ""
+        tail = f" ORDER BY {order}" if order else ""
+        if page is not None:
+            tail += " LIMIT ? OFFSET ?"
+        page = tuple(page or ())
+        if not self.unsaved:
+            return self.db.execute(f"SELECT {columns} FROM catches WHERE {where}{group}{tail}", params + page)
+        return self.db.execute(
+            f"SELECT {columns} FROM main.catches WHERE {where} "
+            f"AND id NOT IN (SELECT id FROM temp.unsaved_deletes){group} "
+            f"UNION ALL SELECT {columns} FROM temp.unsaved_catches WHERE {where} "
+            f"AND id NOT IN (SELECT id FROM temp.unsaved_deletes) "
+            f"AND id NOT IN (SELECT id FROM main.catches){group}{tail}",
+            params + params + page)
+            
+    def count_catches(self, where, params):
+        # Counting through select_catches would check every catch against
+        # the queued deletes; adjust the indexed count by the queued writes
+        # instead, in one statement so all three parts see the same commits
+        self.prune()
+        if not self.unsaved:
+            return self.db.execute(f"SELECT COUNT(*) FROM catches WHERE {where}", params).fetchone()[0]
+        return self.db.execute(
+            f"SELECT (SELECT COUNT(*) FROM main.catches WHERE {where}) "
+            f"- (SELECT COUNT(*) FROM temp.unsaved_deletes CROSS JOIN main.catches USING (id) "
+            f"WHERE {where}) "
+            f"+ (SELECT COUNT(*) FROM temp.unsaved_catches WHERE {where} "
+            f"AND id NOT IN (SELECT id FROM temp.unsaved_deletes) "
+            f"AND id NOT IN (SELECT id FROM main.catches))", params * 3).fetchone()[0]
+
+class CatchQuery:
+    # One filtered and sorted view of a profile's catches. Supports len()
+    # and slicing, which is all VirtualListView needs; rows are fetched
+    # PROFILE_PAGE_ROWS at a time and the most recent pages are kept.
+    def __init__(self, store, profile_id, rarity, order, names=None):
+        self.store = store
+        self.where = "profile_id = ?"
+        self.params = (profile_id,)
+        if rarity is not None:
+            self.where += " AND rarity = ?"
+            self.params += (CATCH_RARITIES.index(rarity),)
+        if names is not None:
+            # Search results: catches of a matching species or with a matching bait
+            species = sorted(species_matching(names))
+            baits = sorted(names)
+            self.where += (f" AND (species IN ({', '.join('?' * len(species))})"
+                           f" OR bait IN ({', '.join('?' * len(baits))}))")
+            self.params += tuple(species) + tuple(baits)
+        self.order = CATCH_ORDERS[order]
+        self.count = None
+        self.pages = OrderedDict()
+        
+    def __len__(self):
+        if self.count is None:
+            self.count = self.store.count_catches(self.where, self.params)
+        return self.count
+        
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("catch index out of range")
+        return self.row(index)
+        
+    def row(self, index):
+        number, offset = divmod(index, PROFILE_PAGE_ROWS)
+        page = self.pages.get(number)
+        if page is None:
+            page = self.pages[number] = self.store.select_catches(
+                f"id, caught_at, {CATCH_COLUMNS}", self.where, self.params, order=self.order,
+                page=(PROFILE_PAGE_ROWS, number * PROFILE_PAGE_ROWS)).fetchall()
+            if len(self.pages) > PROFILE_PAGE_CACHE:
+                self.pages.popitem(last=False)
+        else:
+            self.pages.move_to_end(number)
+        return fish_from_row(page[offset][2:])
+        
+    def id_at(self, index):
+        if index < 0:
+            index += len(self)
+        self.row(index)
+        number, offset = divmod(index, PROFILE_PAGE_ROWS)
+        return self.pages[number][offset][0]
+
+class StoredCatches:
+    # A profile's catches, standing in for Game.caught_fish. Appends and
+    # removals go to the store's write queue; reads are paged queries. Rarity
+    # counts and per-species records are loaded once from the indexes and
+    # then kept up to date as catches are added.
+    def __init__(self, store, profile_id):
+        self.store = store
+        self.profile_id = profile_id
+        self.oldest = CatchQuery(store, profile_id, None, "Oldest")
+        self.count = len(self.oldest)
+        self.last = None  # (id, fish) of the newest catch when known
+        self.summary_counts = None
+        self.summary_records = None
+        self.group_counts = None  # (species, bait, rarity) -> catches, for search result sizes
+        
+    def __len__(self):
+        return self.count
+        
+    def __iter__(self):
+        # Oldest first, like the in-memory list, streamed from one cursor
+        for row in self.store.select_catches(f"id, caught_at, {CATCH_COLUMNS}", "profile_id = ?",
+                                             (self.profile_id,), order=CATCH_ORDERS["Oldest"]):
+            yield fish_from_row(row[2:])
+            
+    def __getitem__(self, index):
+        if index in (-1, self.count - 1) and self.last is not None:
+            return self.last[1]
+        return self.oldest[index]
+        
+    def changed(self):
+        # Views from before the change are out of date
+        self.oldest = CatchQuery(self.store, self.profile_id, None, "Oldest")
+        self.oldest.count = self.count
+        
+    def append(self, fish):
+        self.last = (self.store.add_catch(self.profile_id, fish), fish)
+        self.count += 1
+        self.changed()
+        if self.summary_counts is not None:
+            rarity = fish.rarity.value
+            self.summary_counts[rarity] = self.summary_counts.get(rarity, 0) + 1
+            self.summary_records[fish.species] = max(fish.weight,
+                                                     self.summary_records.get(fish.species, 0.0))
+        if self.group_counts is not None:
+            group = (fish.species, fish.bait_used, CATCH_RARITIES.index(fish.rarity))
+            self.group_counts[group] = self.group_counts.get(group, 0) + 1
+            
+    def pop(self):
+        if self.last is None:
+            self.last = (self.oldest.id_at(-1), self.oldest[-1])
+        catch_id, fish = self.last
+        self.store.delete_catch(catch_id)
+        self.last = None
+        self.count -= 1
+        self.changed()
+        # The removed catch may have been the species record; query again
+        self.summary_counts = None
+        self.group_counts = None
+        return fish
+        
+    def query(self, rarity_label, order, names=None):
+        rarity = None if rarity_label == "All" else Rarity(rarity_label)
+        query = CatchQuery(self.store, self.profile_id, rarity, order, names)
+        if names is not None:
+            # Counting search results in SQL reads every catch; add up the
+            # matching groups instead
+            if self.group_counts is None:
+                self.group_counts = {}
+                for *group, count in self.store.select_catches(
+                        "species, bait, rarity, COUNT(*)", "profile_id = ?", (self.profile_id,),
+                        group="species, bait, rarity"):
+                    group = tuple(group)
+                    self.group_counts[group] = self.group_counts.get(group, 0) + count
+            species = species_matching(names)
+            rank = None if rarity is None else CATCH_RARITIES.index(rarity)
+            query.count = sum(count for (fish_species, bait, fish_rarity), count in self.group_counts.items()
+                              if (fish_species in species or bait in names) and rank in (None, fish_rarity))
+        return query
+        
+    def summary(self):
+        # (catches per rarity in order of first catch, heaviest catch per species)
+        if self.summary_counts is None:
+            # Committed and queued catches come back as separate groups
+            counts = {}
+            first = {}
+            for rarity, count, first_id in self.store.select_catches(
+                    "rarity, COUNT(*), MIN(id)", "profile_id = ?", (self.profile_id,), group="rarity"):
+                counts[rarity] = counts.get(rarity, 0) + count
+                first[rarity] = min(first_id, first.get(rarity, first_id))
+            self.summary_counts = {CATCH_RARITIES[rarity].value: counts[rarity]
+                                   for rarity in sorted(counts, key=first.get)}
+            self.summary_records = {}
+            for species, weight in self.store.select_catches(
+                    "species, MAX(weight)", "profile_id = ?", (self.profile_id,), group="species"):
+                self.summary_records[species] = max(weight, self.summary_records.get(species, weight))
+        return self.summary_counts, self.summary_records
+
+class ProfileAutosave:
+    # Autosave for a profile session, with the same interface as
+    # AutosaveWorker. Catches and rewards reach the store as they happen,
+    # so a save only queues the small remaining state; changes arriving
+    # faster than interval are coalesced the same way.
+    def __init__(self, store, profile_id, interval=AUTOSAVE_INTERVAL):
+        self.store = store
+        self.profile_id = profile_id
+        self.interval = interval
+        self.dirty = False
+        self.last_save_time = 0.0
+        self.copying = None  # Nothing is copied over frames
+        self.saves = 0
+        
+    def mark_dirty(self):
+        self.dirty = True
+        
+    def tick(self, game):
+        if self.dirty and time.monotonic() - self.last_save_time >= self.interval:
+            self.save(game)
+            
+    def save(self, game):
+        self.dirty = False
+        self.last_save_time = time.monotonic()
+        state = {
+            "player": [game.player.x, game.player.y],
+            "current_bait": game.current_bait,
+            "available_baits": list(game.available_baits),
+            "locations": list(game.unlocked_locations),
+            "location": game.current_location,
+            "stats": game.statistics.to_dict()
+        }
+        quests = [[q.id, q.current, q.completed, reward_to_list(q.reward)] for q in game.quests]
+        self.store.save_progress(self.profile_id, state, quests)
+        self.saves += 1
+        
+    def save_now(self, game):
+        self.save(game)
+        self.store.sync()
+
+class TournamentClient:
+    # Reports catches to a tournament server (tournament_server.py) and
+    # receives its leaderboard pushes without ever blocking a frame. The
+    # game thread only appends to the outbox; a background thread owns the
+    # socket, sends everything queued once per batch interval as a single
+    # message, and reconnects with backoff when the server goes away.
+    # Batches stay queued until the server acknowledges them, so catches
+    # made while it is unreachable are sent after the reconnect.
+    def __init__(self, address, kiosk, batch_interval=TOURNAMENT_BATCH_INTERVAL,
+                 queue_limit=TOURNAMENT_QUEUE_LIMIT):
+        host, _, port = address.partition(":")
+        self.address = (host, int(port or TOURNAMENT_PORT))
+        self.kiosk = kiosk
+        self.batch_interval = batch_interval
+        # Catch ids only need to be unique per kiosk and session
+        self.session = f"{kiosk}:{int(time.time() * 1000)}"
+        self.sequence = itertools.count()
+        self.outbox = deque(maxlen=queue_limit)
+        self.unacked = {}  # batch id -> catches sent but not acknowledged
+        self.awaiting = OrderedDict()  # catch id -> species, until it shows on a board
+        self.boards = {}  # species -> top catches, heaviest first
+        self.notices = deque()  # (species, rank, weight) for this kiosk's catches
+        self.connected = False
+        self.stopping = threading.Event()
+        
+        # Statistics
+        self.sent = 0
+        self.batches = 0
+        self.connections = 0
+        self.error = None
+        
+        self.thread = threading.Thread(target=self.run, name="tournament", daemon=True)
+        self.thread.start()
+        
+    def submit(self, fish, player):
+        self.outbox.append({"species": fish.species, "weight": round(fish.weight, 3),
+                            "rarity": fish.rarity.value, "time": round(time.time(), 3),
+                            "player": player, "id": f"{self.session}:{next(self.sequence)}"})
+        
+    def close(self):
+        self.stopping.set()
+        self.thread.join(timeout=2.0)
+        
+    def run(self):
+        delay = TOURNAMENT_RECONNECT_MIN
+        while not self.stopping.is_set():
+            try:
+                sock = socket.create_connection(self.address, timeout=TOURNAMENT_TIMEOUT)
+            except OSError as e:
+                self.error = str(e)
+                self.stopping.wait(delay)
+                delay = min(delay * 2, TOURNAMENT_RECONNECT_MAX)
+                continue
+            delay = TOURNAMENT_RECONNECT_MIN
+            self.connections += 1
+            try:
+                self.talk(sock)
+            except (OSError, ValueError) as e:
+                self.error = str(e)
+            finally:
+                self.connected = False
+                sock.close()
+                # Whatever was not acknowledged goes out again, ahead of newer catches
+                for batch_id in sorted(self.unacked, reverse=True):
+                    self.outbox.extendleft(reversed(self.unacked.pop(batch_id)))
+                    
+    def talk(self, sock):
+        sock.sendall(json.dumps({"type": "hello", "kiosk": self.kiosk}).encode() + b"\n" +
+                     b'{"type":"subscribe"}\n')
+        self.connected = True
+        self.error = None
+        pending = b""
+        next_send = time.monotonic()
+        while True:
+            stopping = self.stopping.is_set()
+            timeout = 0 if stopping else max(0.0, next_send - time.monotonic())
+            readable, _, _ = select.select([sock], [], [], timeout)
+            if readable:
+                data = sock.recv(1 << 16)
+                if not data:
+                    raise ConnectionError("tournament server closed the connection")
+                *lines, pending = (pending + data).split(b"\n")
+                for line in lines:
+                    self.receive(json.loads(line))
+            if stopping or time.monotonic() >= next_send:
+                next_send = time.monotonic() + self.batch_interval
+                self.send_batch(sock)
+            if stopping:
+                return
+                
+    def send_batch(self, sock):
+        catches = []
+        while self.outbox:
+            catches.append(self.outbox.popleft())
+        if not catches:
+            return
+        batch_id = self.batches
+        self.batches += 1
+        self.unacked[batch_id] = catches
+        sock.sendall(json.dumps({"type": "catches", "id": batch_id, "catches": catches},
+                                separators=(",", ":")).encode() + b"\n")
+        self.sent += len(catches)
+        for catch in catches:
+            self.awaiting[catch["id"]] = catch["species"]
+        while len(self.awaiting) > TOURNAMENT_AWAITING_LIMIT:
+            # Never placed on its board
+            self.awaiting.popitem(last=False)
+            
+    def receive(self, message):
+        if message["type"] == "ack":
+            self.unacked.pop(message["id"], None)
+        elif message["type"] == "board":
+            species = message["species"]
+            self.boards[species] = message["top"]
+            for rank, catch in enumerate(message["top"], 1):
+                if self.awaiting.pop(catch.get("id"), None) is not None:
+                    self.notices.append((species, rank, catch["weight"]))
+
+def encode_png(surface, level=CAPTURE_PNG_LEVEL):
+    # Minimal RGB PNG writer. Unlike pygame.image.save it lets the slow part,
+    # zlib, run without holding the GIL.
+    width, height = surface.get_size()
+    pixels = pygame.image.tobytes(surface, "RGB")
+    stride = width * 3
+    # Filter type 0 (none) in front of every row
+    rows = b"".join(b"\x00" + pixels[y * stride:(y + 1) * stride] for y in range(height))
+    
+    def chunk(kind, data):
+        return (struct.pack(">I", len(data)) + kind + data +
+                struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+        
+    return (b"\x89PNG\r\n\x1a\n" +
+            chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)) +
+            chunk(b"IDAT", zlib.compress(rows, level)) +
+            chunk(b"IEND", b""))
+
+class CaptureSystem:
+    # Screenshots and gameplay recording without stalling the frame. The
+    # game thread only copies the finished frame into a pooled buffer of the
+    # same format (one memcpy-speed blit) and queues it; a worker encodes
+    # PNG files or appends raw RGB frames to a stream and hands the buffer
+    # back. When every buffer is still waiting for the encoder the frame is
+    # dropped and counted rather than blocking the game.
+    #
+    # A raw stream is written as <name>.rgb plus <name>.json with its size
+    # and frame times, e.g. for ffmpeg:
+    #   ffmpeg -f rawvideo -pix_fmt rgb24 -s 1200x800 -r 30 -i <name>.rgb out.mp4
+    def __init__(self, directory=CAPTURE_DIR, pool_size=CAPTURE_POOL_SIZE, every=CAPTURE_EVERY):
+        self.directory = directory
+        self.pool_size = pool_size
+        self.every = every
+        self.free = []
+        self.buffers = 0
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.mode = None  # "png" or "raw" while recording
+        self.session = None
+        self.frame = 0
+        self.screenshot_requested = False
+        self.reset_stats()
+        self.error = None
+        self.thread = threading.Thread(target=self.run, name="capture", daemon=True)
+        self.thread.start()
+        ASSETS.on_display_change(self.drop_buffers)
+        
+    def reset_stats(self):
+        self.captured = 0
+        self.dropped = 0
+        self.encoded = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.copy_max_us = 0.0
+        
+    def drop_buffers(self):
+        # Free buffers are in the old display format; busy ones are dropped
+        # when they come back
+        with self.lock:
+            self.buffers -= len(self.free)
+            self.free = []
+            
+    def screenshot(self):
+        self.screenshot_requested = True
+        
+    def start(self, mode="png"):
+        if self.mode is not None:
+            return
+        self.reset_stats()
+        self.mode = mode
+        self.frame = 0
+        self.session = os.path.join(self.directory, f"capture-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        self.queue.put(("start", (mode, self.session), None, None))
+        
+    def stop(self):
+        if self.mode is None:
+            return None
+        self.mode = None
+        self.queue.put(("stop", None, None, None))
+        return self.session
+        
+    def acquire(self, screen):
+        with self.lock:
+            while self.free:
+                buffer = self.free.pop()
+                if buffer.get_size() == screen.get_size():
+                    return buffer
+                self.buffers -= 1
+            if self.buffers >= self.pool_size:
+                return None
+            self.buffers += 1
+        return ASSETS.new(screen.get_size())
+        
+    def release(self, buffer):
+        with self.lock:
+            self.free.append(buffer)
+            
+    def tick(self, screen):
+        # Called on the game thread after a frame has been drawn
+        screenshot = self.screenshot_requested
+        record = self.mode is not None and self.frame % self.every == 0
+        if self.mode is not None:
+            self.frame += 1
+        if not (screenshot or record):
+            return
+        start = time.perf_counter()
+        buffer = self.acquire(screen)
+        if buffer is None:
+            if record:
+                self.dropped += 1
+            return
+        buffer.blit(screen, (0, 0))
+        self.copy_max_us = max(self.copy_max_us, (time.perf_counter() - start) * 1000000)
+        if screenshot:
+            self.screenshot_requested = False
+            path = os.path.join(self.directory, f"screenshot-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.png")
+            self.queue.put(("screenshot", path, buffer, start))
+        else:
+            self.captured += 1
+            self.queue.put(("frame", None, buffer, start))
+            
+    def summary(self):
+        average = self.latency_total / self.encoded if self.encoded else 0.0
+        return (f"{self.encoded} frames encoded, {self.dropped} dropped, encode latency "
+                f"avg {average:.1f} ms max {self.latency_max:.1f} ms, copy max {self.copy_max_us:.0f} us")
+                
+    def close(self):
+        self.stop()
+        self.queue.put(None)
+        self.thread.join()
+        
+    def run(self):
+        stream = None
+        frame_times = []
+        mode = session = None
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            kind, detail, buffer, captured_at = item
+            try:
+                if kind == "start":
+                    mode, session = detail
+                    frame_times = []
+                    os.makedirs(self.directory, exist_ok=True)
+                    if mode == "raw":
+                        stream = open(session + ".rgb", "wb")
+                    else:
+                        os.makedirs(session, exist_ok=True)
+                elif kind == "stop":
+                    if stream is not None:
+                        stream.close()
+                        stream = None
+                    if mode == "raw" and frame_times:
+                        width, height = self.last_size
+                        with open(session + ".json", "w", encoding="utf-8") as f:
+                            json.dump({"width": width, "height": height, "pix_fmt": "rgb24",
+                                       "frames": len(frame_times), "dropped": self.dropped,
+                                       "times": frame_times}, f)
+                elif kind == "screenshot":
+                    os.makedirs(self.directory, exist_ok=True)
+                    with open(detail, "wb") as f:
+                        f.write(encode_png(buffer))
+                else:
+                    self.last_size = buffer.get_size()
+                    if mode == "raw":
+                        stream.write(pygame.image.tobytes(buffer, "RGB"))
+                    else:
+                        with open(os.path.join(session, f"frame-{len(frame_times):06d}.png"), "wb") as f:
+                            f.write(encode_png(buffer))
+                    frame_times.append(round(captured_at, 4))
+                    latency = (time.perf_counter() - captured_at) * 1000
+                    self.encoded += 1
+                    self.latency_total += latency
+                    self.latency_max = max(self.latency_max, latency)
+            except (OSError, pygame.error) as e:
+                self.error = str(e)
+            finally:
+                if buffer is not None and kind in ("frame", "screenshot"):
+                    self.release(buffer)
+
+class GcPolicy:
+    # Keeps the cyclic garbage collector out of gameplay frames. Long-lived
+    # state (catalogs, cached surfaces, the caught fish) is frozen after
+    # startup and after a profile is loaded, so collections no longer scan
+    # it. Automatic collections of the oldest generation are held off by
+    # its threshold and run instead between frames: on idle screens, and
+    # during play once GC_PLAY_INTERVAL has passed, in a frame whose spare
+    # time covers the last full collection's pause, so cycles are still
+    # reclaimed in long sessions. Every pause is recorded through
+    # gc.callbacks for the statistics.
+    def __init__(self, mode=""):
+        self.enabled = mode != "off"
+        self.report_at_exit = mode == "stats"
+        self.default_thresholds = gc.get_threshold()
+        self.pauses = [deque(maxlen=GC_PAUSE_SAMPLES) for _ in range(3)]
+        self.counts = [0, 0, 0]
+        self.totals = [0.0, 0.0, 0.0]
+        self.maxima = [0.0, 0.0, 0.0]
+        self.scheduled = 0  # Full collections run between frames
+        self.scheduling = False
+        self.gc_start = 0.0
+        self.last_full = time.perf_counter()
+        self.full_ms = 0.0  # Pause of the last scheduled full collection
+        gc.callbacks.append(self.on_gc)
+        if self.enabled:
+            gc.set_threshold(*GC_THRESHOLDS)
+            
+    def on_gc(self, phase, info):
+        if phase == "start":
+            self.gc_start = time.perf_counter()
+            return
+        pause_ms = (time.perf_counter() - self.gc_start) * 1000
+        generation = info["generation"]
+        self.pauses[generation].append(pause_ms)
+        self.counts[generation] += 1
+        self.totals[generation] += pause_ms
+        self.maxima[generation] = max(self.maxima[generation], pause_ms)
+        if generation == 2:
+            self.last_full = time.perf_counter()
+            if self.scheduling:
+                self.full_ms = pause_ms
+                
+    def collect(self):
+        self.scheduling = True
+        try:
+            gc.collect()
+        finally:
+            self.scheduling = False
+        self.scheduled += 1
+        
+    def freeze(self):
+        # Called once long-lived state is in place. Objects frozen earlier
+        # are unfrozen first, so that those released since (a previous
+        # profile's catches) are collected rather than kept forever.
+        if not self.enabled:
+            return
+        gc.unfreeze()
+        self.collect()
+        gc.freeze()
+        
+    def between_frames(self, idle, frame_start):
+        # Called after a frame is finished, before waiting for the next one
+        if not self.enabled or gc.get_count()[2] == 0:
+            # Nothing reached the oldest generation since it was last collected
+            return
+        now = time.perf_counter()
+        since = now - self.last_full
+        if idle:
+            due = since >= GC_IDLE_INTERVAL
+        else:
+            spare_ms = (frame_start + 1 / FPS - now) * 1000
+            due = since >= GC_PLAY_INTERVAL and (spare_ms >= self.full_ms or since >= 2 * GC_PLAY_INTERVAL)
+        if due:
+            self.collect()
+            
+    def summary(self):
+        lines = []
+        for generation in range(3):
+            pauses = sorted(self.pauses[generation])
+            if not pauses:
+                continue
+            count = self.counts[generation]
+            lines.append(f"gen{generation}: {count} collections, mean {self.totals[generation] / count:.3f} ms, "
+                         f"p50 {pauses[len(pauses) // 2]:.3f} ms, "
+                         f"p99 {pauses[min(len(pauses) - 1, int(len(pauses) * 0.99))]:.3f} ms, "
+                         f"max {self.maxima[generation]:.3f} ms")
+        lines.append(f"{self.scheduled} scheduled full collections, {gc.get_freeze_count()} objects frozen")
+        return lines
+        
+    def close(self):
+        gc.callbacks.remove(self.on_gc)
+        if self.report_at_exit:
+            for line in self.summary():
+                print(f"GC: {line}")
+        gc.unfreeze()
+        gc.set_threshold(*self.default_thresholds)
+
+class FrameInstrumentation:
+    # Opt-in allocation and GC accounting for the main loop. For every frame
+    # and every phase it records:
+    #   blocks  - net Python memory blocks allocated (sys.getallocatedblocks)
+    #   churn   - bytes allocated on top of the phase's starting point, even if
+    #             freed again before the phase ended (tracemalloc peak)
+    #   surfaces - pygame Surfaces created (constructor, Font.render, copy,
+    #             convert) and fonts - Font objects created
+    #   gc / gc_ms - collections that ran and their total pause
+    # Surfaces and fonts are counted by swapping pygame.Surface and
+    # pygame.font.Font for counting subclasses while instrumentation is on.
+    def __init__(self, output=None):
+        self.enabled = False
+        self.output_path = output
+        self.output = None
+        self.null_phase = nullcontext()
+        self.frame = 0
+        self.frame_record = None
+        self.current_phase = None
+        self.peak_carry = 0  # See InstrumentedPhase
+        self.counters = {"surfaces": 0, "fonts": 0}
+        self.gc_start = 0.0
+        self.totals = {}  # phase -> {metric: [sum, max]}
+        self.frame_totals = {}
+        
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        tracemalloc.start(INSTRUMENT_TRACE_DEPTH)
+        gc.callbacks.append(self.on_gc)
+        self.install_counters()
+        if self.output_path and self.output_path != "1":
+            self.output = open(self.output_path, "w", encoding="utf-8")
+            
+    def install_counters(self):
+        counters = self.counters
+        base_surface = pygame.Surface
+        base_font = pygame.font.Font
+        
+        class CountingSurface(base_surface):
+            def __init__(self, *args, **kwargs):
+                counters["surfaces"] += 1
+                super().__init__(*args, **kwargs)
+                
+            def copy(self):
+                counters["surfaces"] += 1
+                return super().copy()
+                
+            def convert(self, *args):
+                counters["surfaces"] += 1
+                return super().convert(*args)
+                
+            def convert_alpha(self, *args):
+                counters["surfaces"] += 1
+                return super().convert_alpha(*args)
+                
+        class CountingFont(base_font):
+            def __init__(self, *args, **kwargs):
+                counters["fonts"] += 1
+                super().__init__(*args, **kwargs)
+                
+            def render(self, *args, **kwargs):
+                counters["surfaces"] += 1
+                return super().render(*args, **kwargs)
+                
+        self.base_classes = (base_surface, base_font)
+        pygame.Surface = CountingSurface
+        pygame.font.Font = CountingFont
+        
+    def on_gc(self, phase, info):
+        if phase == "start":
+            self.gc_start = time.perf_counter()
+        elif self.frame_record is not None:
+            pause_ms = (time.perf_counter() - self.gc_start) * 1000
+            target = self.frame_record["phases"].get(self.current_phase)
+            for record in (self.frame_record, target):
+                if record is not None:
+                    record["gc"] += 1
+                    record["gc_ms"] += pause_ms
+                    record[f"gc_gen{info['generation']}"] = record.get(f"gc_gen{info['generation']}", 0) + 1
+                    
+    def sample(self):
+        return (sys.getallocatedblocks(), tracemalloc.get_traced_memory()[0],
+                self.counters["surfaces"], self.counters["fonts"], time.perf_counter())
+        
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame += 1
+        self.frame_record = {"frame": self.frame, "gc": 0, "gc_ms": 0.0, "phases": {}}
+        self.frame_start = self.sample()
+        
+    def phase(self, name):
+        if not self.enabled or self.frame_record is None:
+            return self.null_phase
+        return InstrumentedPhase(self, name)
+        
+    def end_frame(self):
+        if not self.enabled or self.frame_record is None:
+            return
+        record = self.frame_record
+        self.fill_deltas(record, self.frame_start, self.sample())
+        record["churn"] = max((p["churn"] for p in record["phases"].values()), default=0)
+        self.accumulate(self.frame_totals, record)
+        for name, phase_record in record["phases"].items():
+            self.accumulate(self.totals.setdefault(name, {}), phase_record)
+        if self.output is not None:
+            self.output.write(json.dumps(record) + "\n")
+        self.frame_record = None
+        
+    def fill_deltas(self, record, before, after):
+        record["blocks"] = after[0] - before[0]
+        record["bytes"] = after[1] - before[1]
+        record["surfaces"] = after[2] - before[2]
+        record["fonts"] = after[3] - before[3]
+        record["ms"] = round((after[4] - before[4]) * 1000, 3)
+        
+    def accumulate(self, totals, record):
+        totals.setdefault("frames", [0, 0])[0] += 1
+        for metric in ("ms", "blocks", "churn", "surfaces", "fonts", "gc", "gc_ms"):
+            entry = totals.setdefault(metric, [0, 0])
+            entry[0] += record[metric]
+            entry[1] = max(entry[1], record[metric])
+            
+    def dump_top_allocations(self, limit=INSTRUMENT_TOP_SITES, stream=None):
+        if not self.enabled:
+            return
+        stream = stream or sys.stderr
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        ))
+        print(f"Top {limit} allocation sites (live memory):", file=stream)
+        for stat in snapshot.statistics("lineno")[:limit]:
+            print(f"  {stat.size / 1024:9.1f} KiB {stat.count:8d} blocks  {stat.traceback[0]}", file=stream)
+            
+    def report(self, stream=None):
+        if not self.enabled:
+            return
+        stream = stream or sys.stderr
+        print("Per-phase averages (max) over instrumented frames:", file=stream)
+        print(f"  {'phase':24} {'ms':>14} {'blocks':>14} {'churn KiB':>16} {'surfaces':>12} "
+              f"{'fonts':>10} {'gc':>10} {'gc ms':>14}", file=stream)
+        rows = [("frame", self.frame_totals)] + sorted(self.totals.items())
+        for name, totals in rows:
+            if not totals:
+                continue
+            count = totals["frames"][0]
+            cells = []
+            for metric, width, scale in (("ms", 14, 1), ("blocks", 14, 1), ("churn", 16, 1024),
+                                         ("surfaces", 12, 1), ("fonts", 10, 1), ("gc", 10, 1),
+                                         ("gc_ms", 14, 1)):
+                total, peak = totals[metric]
+                cells.append(f"{total / count / scale:.1f} ({peak / scale:.0f})".rjust(width))
+            print(f"  {name:24} " + " ".join(cells), file=stream)
+            
+    def close(self):
+        if not self.enabled:
+            return
+        self.report()
+        self.dump_top_allocations()
+        if self.output is not None:
+            self.output.close()
+        gc.callbacks.remove(self.on_gc)
+        pygame.Surface, pygame.font.Font = self.base_classes
+        tracemalloc.stop()
+        self.enabled = False
+
+class InstrumentedPhase:
+    # tracemalloc has a single peak, which each phase resets on entry. A
+    # nested phase hands the peak the enclosing phase had reached (before
+    # and during the nested one) back through instrumentation.peak_carry, so
+    # the outer phase's churn still covers its whole extent.
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+        
+    def __enter__(self):
+        inst = self.instrumentation
+        self.outer_phase = inst.current_phase
+        inst.current_phase = self.name
+        record = {"gc": 0, "gc_ms": 0.0}
+        inst.frame_record["phases"][self.name] = record
+        self.outer_peak = max(tracemalloc.get_traced_memory()[1], inst.peak_carry)
+        inst.peak_carry = 0
+        tracemalloc.reset_peak()
+        self.before = inst.sample()
+        
+    def __exit__(self, *exc):
+        inst = self.instrumentation
+        after = inst.sample()
+        record = inst.frame_record["phases"][self.name]
+        inst.fill_deltas(record, self.before, after)
+        peak = max(tracemalloc.get_traced_memory()[1], inst.peak_carry)
+        record["churn"] = max(0, peak - self.before[1])
+        inst.peak_carry = max(self.outer_peak, peak)
+        inst.current_phase = self.outer_phase
+        return False
+
+class Game:
+    def __init__(self, seed=None, window=None):
+        # Opt-in allocation/GC instrumentation; enabled before anything is drawn
+        self.instrumentation = FrameInstrumentation(os.environ.get(INSTRUMENT_ENV))
+        if os.environ.get(INSTRUMENT_ENV):
+            self.instrumentation.enable()
+        if os.environ.get(TRACE_ENV) and not TRACER.enabled:
+            TRACER.enable(os.environ[TRACE_ENV])
+        # Full collections run between frames; see GcPolicy
+        self.gc_policy = GcPolicy(os.environ.get(GC_ENV, ""))
+        self.draw_phase_names = {state: f"draw:{state.value}" for state in GameState}
+        self.idle_policies = dict(IDLE_POLICIES)
+        # Run limits and measurements set from the command line
+        self.fps_cap = FPS  # 0 runs uncapped
+        self.max_frames = None  # Stop after this many frames
+        self.frames = 0
+        self.frame_times = None  # Per-frame work time in ms when collecting
+        
+        if os.environ.get(BLIT_AUDIT_ENV):
+            ASSETS.enable_audit()
+        # Everything is laid out for SCREEN_WIDTH x SCREEN_HEIGHT; a different
+        # window size scales the finished frame and maps the mouse back
+        self.seed = seed
+        window = window or (SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.pointer_scale = (SCREEN_WIDTH / window[0], SCREEN_HEIGHT / window[1])
+        self.display = pygame.display.set_mode(window)
+        self.screen = ASSETS.back_buffer(self.display, (SCREEN_WIDTH, SCREEN_HEIGHT))
+        ASSETS.display_changed()
+        pygame.display.set_caption("European Forest Fishing Adventure")
+        self.clock = pygame.time.Clock()
+        self.frame_tick = time.perf_counter()  # When the last frame wait ended
+        self.waiting_events = []  # Read during the frame wait, not handled yet
+        self.state = GameState.MENU
+        self.player = HumanCharacter(SCREEN_WIDTH//2, SCREEN_HEIGHT//2)
+        self.fishing_minigame = FishingMinigame()
+        # Locations share one scrolling world whose chunks are generated lazily
+        self.unlocked_locations = ["forest"]
+        self.current_location = "forest"
+        self.travel_target = None
+        self.world = World(self.current_location)
+        self.world.follow(self.player.x + self.player.width // 2)
+        self.font = pygame.font.Font(None, 36)
+        self.small_font = pygame.font.Font(None, 24)
+        self.effects = VisualEffects()
+        # The background, water and effects are separate layers so the ones
+        # that do not depend on each other can render on worker threads
+        workers = int(os.environ.get(COMPOSITOR_WORKERS_ENV, COMPOSITOR_WORKERS))
+        self.layers = LayerCompositor(workers)
+        self.layers.add(Layer("background", present=self.world.draw_backdrop))
+        self.layers.add(self.effects.create_water_layer())
+        self.layers.add(Layer("shore", present=self.world.draw_shore))
+        self.layers.add(Layer("effects", render=self.render_effects,
+                            present=self.effects.compositor.composite))
+        # Translucent backing for the catch message, drawn over the player
+        self.catch_message_shade = ASSETS.new((SCREEN_WIDTH, CATCH_MESSAGE_SHADE_HEIGHT), "alpha")
+        self.catch_message_shade.fill((0, 0, 0, 128))
+        ASSETS.track(self, "catch_message_shade", "alpha")
+        self.modal_backdrop = ModalBackdrop()
+        self.sound_manager = SoundManager()
+        self.reward_system = RewardSystem()
+        self.model_events = ModelEvents()
+        
+        # Menu system
+        self.menu_selection = 0
+        self.menu_options = ["Start Game", "Instructions", "Quit"]
+        
+        # Each location keeps its own fish population
+        self.populations = {}
+        self.fish_population = self.population_for(self.current_location)
+        self.hooked_fish = None
+        
+        # Game state variables
+        self.history = HistoryJournal(HISTORY_PATH)
+        self.export_job = None
+        self.catch_message = ""
+        self.catch_message_timer = 0
+        self.caught_fish = []
+        self.statistics = CatchStatistics()
+        self.current_bait = "Worm"
+        self.available_baits = ["Worm"]
+        self.quests = self.create_quests()
+        self.rewards_earned = []
+        
+        # Fish inspection
+        self.inspecting_fish = None
+        
+        # Scrollable inventory and glossary lists, searchable by species,
+        # location and bait
+        self.search_index = SearchIndex(
+            list(FISH_SPECIES) +
+            [data["location"] for data in FISH_SPECIES.values()] +
+            [bait for data in FISH_SPECIES.values() for bait in data["bait"]] +
+            ["Worm"] + [reward.value for reward in self.reward_system.available_rewards.values()
+                        if reward.type == RewardType.BAIT])
+        self.catch_version = 0  # Bumped whenever caught_fish changes
+        self.summary_version = None
+        self.summary = None
+        self.inventory_list = self.create_inventory_list()
+        self.glossary_list = self.create_glossary_list()
+        
+        # Retained screens re-render only when the model they show changes
+        self.menu_screen = MenuScreen(self)
+        self.inventory_screen = InventoryScreen(self)
+        self.glossary_screen = GlossaryScreen(self)
+        self.quest_screen = QuestScreen(self)
+        
+        # Casting system
+        self.is_casting = False
+        self.cast_target = None
+        self.mouse_pos = (0, 0)
+        
+        # Restore the previous session and keep saving in the background.
+        # Shared kiosks keep each player's progress in a profile database.
+        profile = os.environ.get(PROFILE_ENV)
+        if profile:
+            name, _, path = profile.partition(":")
+            self.profile_store = ProfileStore(path or PROFILE_DB_PATH)
+            self.load_profile(name or "Player 1")
+        else:
+            self.profile_store = None
+            self.profile_name = None
+            # A seeded run starts from a new game so that it repeats
+            if seed is None:
+                self.restore_save(load_autosave(AUTOSAVE_PATH))
+            self.autosave = AutosaveWorker(AUTOSAVE_PATH)
+        
+        # Screenshots (F12) and recording (F11); FISHING_CAPTURE records from startup
+        capture = os.environ.get(CAPTURE_ENV)
+        mode, _, directory = (capture or "").partition(":")
+        self.capture = CaptureSystem(directory or CAPTURE_DIR)
+        if mode:
+            self.capture.start(mode)
+            
+        # Catches are reported to a LAN tournament server when one is configured
+        address = os.environ.get(TOURNAMENT_ENV)
+        self.tournament = TournamentClient(address, socket.gethostname()) if address else None
+        
+        # Everything created so far lives for the whole session
+        self.gc_policy.freeze()
+        
+    def restore_save(self, data):
+        if not data:
+            return
+        try:
+            if isinstance(data["caught_fish"], StoredCatches):
+                caught_fish = data["caught_fish"]
+            else:
+                caught_fish = [Fish(species, weight, length, Rarity(rarity), difficulty, bait,
+                                    catch_time, personal_record)
+                               for species, weight, length, rarity, difficulty, bait, catch_time,
+                               personal_record in data["caught_fish"]]
+            quests = {quest_id: (current, completed, reward_from_list(reward))
+                      for quest_id, current, completed, reward in data["quests"]}
+            rewards = [reward_from_list(r) for r in data["rewards"]]
+            player_x, player_y = data["player"]
+            baits = list(data["available_baits"])
+            current_bait = data["current_bait"]
+            locations = [key for key in data.get("locations", ["forest"]) if key in LOCATIONS]
+            location = data.get("location", "forest")
+            if "stats" in data:
+                statistics = CatchStatistics.from_dict(data["stats"])
+            else:
+                # Saves from before statistics were kept
+                statistics = CatchStatistics.from_catches(caught_fish)
+        except (KeyError, TypeError, ValueError):
+            # Unreadable save: start a fresh session rather than crash
+            return
+            
+        self.caught_fish = caught_fish
+        self.statistics = statistics
+        self.catches_changed()
+        for quest in self.quests:
+            if quest.id in quests:
+                quest.current, quest.completed, quest.reward = quests[quest.id]
+        self.model_events.notify("quests")
+        self.model_events.notify("rewards")
+        self.rewards_earned = rewards
+        self.available_baits = baits
+        self.current_bait = current_bait
+        self.player.x = player_x
+        self.player.y = player_y
+        self.world.follow(self.player.x + self.player.width // 2)
+        for key in locations:
+            self.unlock_location(key)
+        if location in self.unlocked_locations and location != self.current_location:
+            self.travel_target = location
+        
+    def reset_progress(self):
+        # A new player's state, before another profile is restored over it
+        self.caught_fish = []
+        self.statistics = CatchStatistics()
+        self.catches_changed()
+        self.quests = self.create_quests()
+        self.rewards_earned = []
+        self.available_baits = ["Worm"]
+        self.current_bait = "Worm"
+        self.unlocked_locations = ["forest"]
+        self.inspecting_fish = None
+        self.player.x = SCREEN_WIDTH//2
+        self.player.y = SCREEN_HEIGHT//2
+        if self.current_location != "forest":
+            self.travel_target = "forest"
+        self.model_events.notify("quests")
+        self.model_events.notify("rewards")
+            
+    def load_profile(self, name):
+        store = self.profile_store
+        profile_id, created = store.open_profile(name)
+        if created and store.profiles() == [name]:
+            # First profile on this machine: carry over the single-player save
+            legacy = load_autosave(AUTOSAVE_PATH)
+            if legacy:
+                store.import_save(profile_id, legacy)
+        self.profile_name = name
+        self.profile_id = profile_id
+        self.autosave = ProfileAutosave(store, profile_id)
+        self.reset_progress()
+        data = {"player": [self.player.x, self.player.y], "current_bait": "Worm",
+                "available_baits": ["Worm"]}
+        data.update(store.load_progress(profile_id))
+        self.restore_save(data)
+        if "stats" not in data:
+            # Statistics were rebuilt from the catches; keep them
+            self.autosave.mark_dirty()
+        self.model_events.notify("menu")
+        
+    def switch_profile(self, step=0, new=False):
+        # Cycle through the profiles in the store, or start a new one
+        names = self.profile_store.profiles()
+        if new:
+            number = len(names) + 1
+            while f"Player {number}" in names:
+                number += 1
+            name = f"Player {number}"
+        else:
+            name = names[(names.index(self.profile_name) + step) % len(names)]
+        if name != self.profile_name:
+            self.autosave.save(self)
+            self.load_profile(name)
+            self.gc_policy.freeze()
+            
+    def catch_summary(self):
+        # (catches per rarity in order of first catch, heaviest catch per
+        # species), recomputed only when the catches change
+        if self.summary_version != self.catch_version:
+            if isinstance(self.caught_fish, StoredCatches):
+                self.summary = self.caught_fish.summary()
+            else:
+                counts = {}
+                records = {}
+                for fish in self.caught_fish:
+                    counts[fish.rarity.value] = counts.get(fish.rarity.value, 0) + 1
+                    records[fish.species] = max(fish.weight, records.get(fish.species, 0.0))
+                self.summary = (counts, records)
+            self.summary_version = self.catch_version
+        return self.summary
+        
+    def create_quests(self):
+        return [
+            Quest("first_fish", "First Catch", "Catch your first fish", 1, 0, 
+                  self.reward_system.get_quest_reward("first_fish"), False),
+            Quest("gold_fish", "Golden Hunter", "Catch 3 gold-tier fish", 3, 0,
+                  self.reward_system.get_quest_reward("gold_fish"), False),
+            Quest("heavy_fish", "Heavy Weight", "Catch a fish over 10kg", 1, 0,
+                  self.reward_system.get_quest_reward("heavy_fish"), False),
+            Quest("species_collector", "Species Collector", "Catch 5 different species", 5, 0,
+                  self.reward_system.get_quest_reward("species_collector"), False),
+            Quest("trophy_hunter", "Trophy Hunter", "Catch a trophy fish", 1, 0,
+                  self.reward_system.get_quest_reward("trophy_hunter"), False)
+        ]
+        
+    def create_inventory_list(self):
+        rarity_order = list(Rarity)
+        
+        def describe(fish):
+            record = " - RECORD" if fish.personal_record else ""
+            return (
+                (f"{fish.species} - {fish.weight:.1f}kg ({fish.rarity.value}){record}",
+                 RARITY_COLORS[fish.rarity], 0),
+                (f"Bait: {fish.bait_used} | Length: {fish.length:.1f}cm", LIGHT_GRAY, 18)
+            )
+            
+        sort_modes = [
+            ("Rarity", lambda f: (rarity_order.index(f.rarity), f.weight), True),
+            ("Weight", lambda f: f.weight, True),
+            ("Newest", None, True),
+            ("Species", lambda f: f.species, False)
+        ]
+        filters = [("All", None)] + [(rarity.value, lambda f, r=rarity: f.rarity == r)
+                                     for rarity in Rarity]
+        
+        def select(names):
+            species = species_matching(names)
+            return lambda group: group[0] in species or group[1] in names
+            
+        search = (self.search_index, lambda f: (f.species, f.bait_used), select)
+        return VirtualListView((40, 120, SCREEN_WIDTH - 80, SCREEN_HEIGHT - 200), 45,
+                               describe, sort_modes, filters, self.small_font, search,
+                               lambda f: PORTRAITS.portrait(f.species, "row"))
+        
+    def create_glossary_list(self):
+        rarity_order = list(Rarity)
+        
+        def describe(entry):
+            species, data = entry
+            best = self.catch_summary()[1].get(species)
+            caught = f"Best: {best:.1f}kg" if best is not None else "Not caught yet"
+            return (
+                (f"{species} - {data['rarity'].value} - {caught}", RARITY_COLORS[data['rarity']], 0),
+                (f"Location: {data['location']} | Weight: {data['weight_range'][0]}-{data['weight_range'][1]}kg | Difficulty: {data['difficulty']}",
+                 LIGHT_GRAY, 20),
+                (f"Bait: {', '.join(data['bait'])}", LIGHT_GRAY, 38)
+            )
+            
+        sort_modes = [
+            ("Rarity", lambda e: rarity_order.index(e[1]['rarity']), True),
+            ("Name", lambda e: e[0], False),
+            ("Difficulty", lambda e: e[1]['difficulty'], True)
+        ]
+        filters = [("All", None)] + [(rarity.value, lambda e, r=rarity: e[1]['rarity'] == r)
+                                     for rarity in Rarity]
+        
+        def select(names):
+            return lambda species: (species in names or FISH_SPECIES[species]['location'] in names or
+                                    any(bait in names for bait in FISH_SPECIES[species]['bait']))
+            
+        def icon(entry):
+            # Species not caught yet show only their outline
+            if entry[0] in self.catch_summary()[1]:
+                return PORTRAITS.portrait(entry[0], "row")
+            return PORTRAITS.silhouette(entry[0])
+            
+        search = (self.search_index, lambda e: e[0], select)
+        glossary = VirtualListView((40, 120, SCREEN_WIDTH - 80, SCREEN_HEIGHT - 200), 65,
+                                   describe, sort_modes, filters, self.small_font, search, icon)
+        glossary.set_items(list(FISH_SPECIES.items()), 0)
+        return glossary
+        
+    def population_for(self, key):
+        population = self.populations.get(key)
+        if population is None:
+            population = FishPopulation((0, WATER_TOP, self.world.width, SCREEN_HEIGHT - WATER_TOP),
+                                        count=POPULATION_SIZE * self.world.width // SCREEN_WIDTH,
+                                        species_pool=LOCATIONS[key].species,
+                                        seed=None if self.seed is None else f"{self.seed}:{key}")
+            self.populations[key] = population
+        return population
+        
+    def unlock_location(self, key):
+        if key not in self.unlocked_locations:
+            self.unlocked_locations.append(key)
+        # The player will likely go there next: start building it now
+        self.world.prefetch_view(key)
+        
+    def travel_to_next_location(self):
+        if len(self.unlocked_locations) < 2 or self.player.is_casting or self.travel_target is not None:
+            return
+        index = self.unlocked_locations.index(self.current_location)
+        self.travel_target = self.unlocked_locations[(index + 1) % len(self.unlocked_locations)]
+        
+    def update_travel(self):
+        # Switch only once the chunks in view at the destination are ready,
+        # so travel never stalls a frame on chunk generation
+        if not self.world.view_ready(self.travel_target):
+            self.world.prefetch_view(self.travel_target)
+            return
+        key = self.travel_target
+        self.travel_target = None
+        self.current_location = key
+        self.world.set_location(key)
+        self.effects.water_palette = LOCATIONS[key].water_palette
+        self.fish_population = self.population_for(key)
+        self.player.stop_fishing()
+        self.is_casting = False
+        self.cast_target = None
+        self.catch_message = f"Welcome to {LOCATIONS[key].name}!"
+        self.catch_message_timer = 180
+        
+        # Prefetch the next destination in the travel cycle
+        index = self.unlocked_locations.index(key)
+        self.world.prefetch_view(self.unlocked_locations[(index + 1) % len(self.unlocked_locations)])
+        
+    @traced("Game.handle_events")
+    def read_events(self):
+        # pygame events carry no time of their own, so each one is stamped
+        # with when it was taken off the queue. The frame wait reads the
+        # queue every EVENT_POLL_MS, which keeps the stamp of a key pressed
+        # meanwhile within a few ms of the press, at any frame rate.
+        now = pygame.time.get_ticks()
+        events = pygame.event.get()
+        for event in events:
+            event.received_at = now
+        return events
+        
+    def wait_for_frame(self):
+        # clock.tick(fps_cap), reading input while it waits; what is read is
+        # handled at the start of the next frame
+        if self.fps_cap:
+            end = self.frame_tick + 1 / self.fps_cap
+            while True:
+                self.waiting_events.extend(self.read_events())
+                remaining = end - time.perf_counter()
+                if remaining <= 0:
+                    break
+                time.sleep(min(remaining, EVENT_POLL_MS / 1000))
+        self.clock.tick()
+        self.frame_tick = time.perf_counter()
+        
+    def handle_events(self, events=None):
+        if events is None:
+            events = self.read_events()
+        # Input is judged at the time it was read, not when it is handled
+        for event in events:
+            if event.type == pygame.QUIT:
+                return False
+                
+            if event.type == pygame.MOUSEMOTION:
+                self.mouse_pos = self.logical_pos(event.pos)
+                
+            if event.type == pygame.WINDOWDISPLAYCHANGED:
+                # The new display may use another pixel format
+                ASSETS.display_changed()
+                
+            # Scrolling, sorting and filtering in the list screens
+            if self.state == GameState.INVENTORY and self.inventory_screen.list.handle_event(event):
+                continue
+            if self.state == GameState.GLOSSARY and self.glossary_screen.list.handle_event(event):
+                continue
+                
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                if event.button == 1:  # Left click
+                    if self.state == GameState.PLAYING and not self.player.is_casting:
                         # Start casting to mouse position
                         self.is_casting = True
-                        self.cast_target = event.pos
-                        self.player.start_casting(event.pos[0], event.pos[1])
+                        self.cast_target = self.world.to_world(self.logical_pos(event.pos))
+                        self.player.start_casting(*self.cast_target)
                         
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
@@ -735,7 +4941,8 @@ class Game:
                         
                 if event.key == pygame.K_SPACE:
                     if self.state == GameState.FISHING:
-                        if self.fishing_minigame.set_hook():
+                        if self.fishing_minigame.set_hook(getattr(event, "received_at", None)):
+                            self.sound_manager.play_sound('reel')
                             self.catch_fish()
                         else:
                             self.state = GameState.PLAYING
@@ -743,7 +4950,7 @@ class Game:
                         self.state = GameState.PLAYING
                     elif self.state == GameState.PLAYING and not self.player.is_casting:
                         # Cast to center of water area
-                        target_x = SCREEN_WIDTH // 2
+                        target_x = self.world.camera_x + SCREEN_WIDTH // 2
                         target_y = SCREEN_HEIGHT - 100
                         self.is_casting = True
                         self.cast_target = (target_x, target_y)
@@ -755,6 +4962,28 @@ class Game:
                     self.is_casting = False
                     self.cast_target = None
                         
+                if event.key == pygame.K_F9:
+                    self.instrumentation.dump_top_allocations()
+                if event.key == pygame.K_F10:
+                    TRACER.request_capture()
+                if event.key == pygame.K_F12:
+                    self.capture.screenshot()
+                if event.key == pygame.K_F11:
+                    if self.capture.mode is None:
+                        self.capture.start()
+                        self.catch_message = "Recording (F11 to stop)"
+                    else:
+                        self.capture.stop()
+                        self.catch_message = (f"Recording stopped: {self.capture.captured} frames, "
+                                              f"{self.capture.dropped} dropped")
+                    self.catch_message_timer = 180
+                    
+                if event.key == pygame.K_l and self.state == GameState.PLAYING:
+                    self.travel_to_next_location()
+                    
+                if event.key == pygame.K_e and self.state == GameState.PLAYING:
+                    self.start_export()
+                    
                 if event.key == pygame.K_i and self.state == GameState.PLAYING:
                     self.state = GameState.INVENTORY
                     
@@ -769,15 +4998,26 @@ class Game:
                     if event.key == pygame.K_k:  # Keep fish
                         self.state = GameState.PLAYING
                     elif event.key == pygame.K_r:  # Release fish
-                        self.caught_fish.pop()  # Remove the last caught fish
+                        released = self.caught_fish.pop()  # Remove the last caught fish
+                        self.catches_changed()
+                        self.history.record_fish("release", released)
+                        self.autosave.mark_dirty()
                         self.state = GameState.PLAYING
                     
                 # Menu navigation
                 if self.state == GameState.MENU:
                     if event.key == pygame.K_UP:
                         self.menu_selection = (self.menu_selection - 1) % len(self.menu_options)
+                        self.model_events.notify("menu")
+                        self.sound_manager.play_sound('menu_select')
                     elif event.key == pygame.K_DOWN:
                         self.menu_selection = (self.menu_selection + 1) % len(self.menu_options)
+                        self.model_events.notify("menu")
+                        self.sound_manager.play_sound('menu_select')
+                    elif event.key in (pygame.K_LEFT, pygame.K_RIGHT) and self.profile_store is not None:
+                        self.switch_profile(1 if event.key == pygame.K_RIGHT else -1)
+                    elif event.key == pygame.K_n and self.profile_store is not None:
+                        self.switch_profile(new=True)
                     elif event.key == pygame.K_RETURN:
                         if self.menu_selection == 0:  # Start Game
                             self.state = GameState.PLAYING
@@ -789,12 +5029,19 @@ class Game:
                     
         return True
         
+    @traced("Game.catch_fish")
     def catch_fish(self):
         fish_species = self.fishing_minigame.fish
         fish_data = FISH_SPECIES[fish_species]
         
-        # Calculate weight based on rarity and species
-        base_weight = random.uniform(*fish_data["weight_range"])
+        # Calculate weight based on rarity, species and the size of the fish
+        # that took the bait
+        if self.hooked_fish is not None:
+            size = self.fish_population.sizes[self.hooked_fish]
+        else:
+            size = random.random()
+        min_weight, max_weight = fish_data["weight_range"]
+        base_weight = min_weight + (max_weight - min_weight) * size
         rarity_multiplier = {
             Rarity.CARDBOARD: 1.0,
             Rarity.BRONZE: 1.2,
@@ -806,14 +5053,14 @@ class Game:
         }
         
         weight = base_weight * rarity_multiplier[fish_data["rarity"]]
-        length = random.uniform(*fish_data["length_range"])
+        min_length, max_length = fish_data["length_range"]
+        length_fraction = min(1.0, max(0.0, size + random.uniform(-0.1, 0.1)))
+        length = min_length + (max_length - min_length) * length_fraction
         
-        # Check if it's a personal record
-        personal_record = True
-        for fish in self.caught_fish:
-            if fish.species == fish_species and fish.weight >= weight:
-                personal_record = False
-                break
+        # Check if it's a personal record against the kept catches, the same
+        # records the glossary shows as "Best"
+        best = self.catch_summary()[1].get(fish_species)
+        personal_record = best is None or weight > best
         
         # Create fish object
         fish = Fish(
@@ -828,30 +5075,43 @@ class Game:
         )
         
         self.caught_fish.append(fish)
+        self.statistics.record(fish)
+        self.catches_changed()
+        self.history.record_fish("catch", fish)
+        self.autosave.mark_dirty()
+        if self.tournament is not None:
+            self.tournament.submit(fish, self.profile_name or self.tournament.kiosk)
         self.fishing_minigame.is_active = False
+        
+        # The landed fish leaves the lake; a new one takes its place
+        if self.hooked_fish is not None:
+            self.fish_population.spawn(self.hooked_fish)
+            self.hooked_fish = None
         self.state = GameState.FISH_CAUGHT
         
         # Add catch effects
         self.catch_message = f"Caught {fish_species} ({weight:.1f}kg)!"
         self.catch_message_timer = 180  # 3 seconds at 60 FPS
         
-        # Play catch sound
-        self.sound_manager.play_sound('catch')
+        # Play catch sound, brighter for rarer fish
+        self.sound_manager.play_sound('catch', fish.rarity)
         
         # Add celebration particles
         for _ in range(15):
             self.effects.add_particle(
-                SCREEN_WIDTH//2, SCREEN_HEIGHT//2,
+                self.world.camera_x + SCREEN_WIDTH//2, SCREEN_HEIGHT//2,
                 (255, 255, 0),
                 (random.uniform(-8, 8), random.uniform(-8, 8))
             )
             
         # Add ripple effect
-        self.effects.add_ripple(SCREEN_WIDTH//2, SCREEN_HEIGHT - 100)
+        self.effects.add_ripple(self.world.camera_x + SCREEN_WIDTH//2, SCREEN_HEIGHT - 100)
         
         # Update quests
         self.update_quests(fish)
+        self.model_events.notify("quests")
         
+    @traced("Game.update_quests")
     def update_quests(self, fish):
         for quest in self.quests:
             if quest.completed:
@@ -860,37 +5120,46 @@ class Game:
             if quest.id == "first_fish":
                 quest.current = len(self.caught_fish)
                 if quest.current >= quest.target:
-                    quest.completed = True
-                    self.give_reward(quest.reward)
+                    self.complete_quest(quest)
                     
             elif quest.id == "gold_fish":
-                gold_count = len([f for f in self.caught_fish if f.rarity == Rarity.GOLD])
+                gold_count = self.catch_summary()[0].get(Rarity.GOLD.value, 0)
                 quest.current = gold_count
                 if quest.current >= quest.target:
-                    quest.completed = True
-                    self.give_reward(quest.reward)
+                    self.complete_quest(quest)
                     
             elif quest.id == "heavy_fish":
                 if fish.weight >= 10:
                     quest.current = 1
-                    quest.completed = True
-                    self.give_reward(quest.reward)
+                    self.complete_quest(quest)
                     
             elif quest.id == "species_collector":
-                unique_species = len(set(f.species for f in self.caught_fish))
+                unique_species = len(self.catch_summary()[1])
                 quest.current = unique_species
                 if quest.current >= quest.target:
-                    quest.completed = True
-                    self.give_reward(quest.reward)
+                    self.complete_quest(quest)
                     
             elif quest.id == "trophy_hunter":
                 if fish.rarity == Rarity.TROPHY:
                     quest.current = 1
-                    quest.completed = True
-                    self.give_reward(quest.reward)
+                    self.complete_quest(quest)
                     
+    def catches_changed(self):
+        self.catch_version += 1
+        self.model_events.notify("catches")
+        
+    def complete_quest(self, quest):
+        quest.completed = True
+        self.history.record_quest(quest)
+        self.give_reward(quest.reward)
+        
     def give_reward(self, reward):
         self.rewards_earned.append(reward)
+        if self.profile_store is not None:
+            self.profile_store.add_reward(self.profile_id, reward)
+        self.history.record_reward(reward)
+        self.model_events.notify("rewards")
+        self.autosave.mark_dirty()
         
         if reward.type == RewardType.BAIT:
             if reward.value not in self.available_baits:
@@ -900,17 +5169,23 @@ class Game:
             # Could implement rod upgrades
             pass
         elif reward.type == RewardType.LOCATION:
-            # Could implement new locations
-            pass
+            for key, location in LOCATIONS.items():
+                if location.unlock_reward == reward.value:
+                    self.unlock_location(key)
         elif reward.type == RewardType.COSMETIC:
             # Could implement cosmetic upgrades
             pass
             
+    @traced("Game.start_fishing")
     def start_fishing(self):
-        # Random chance to get a fish based on location and bait
-        if random.random() < 0.4:  # 40% chance - increased for easier gameplay
-            available_fish = list(FISH_SPECIES.keys())
-            fish_species = random.choice(available_fish)
+        # A fish swimming near where the line landed may bite, depending on
+        # how many are around, how deep they are and the bait
+        self.hooked_fish = None
+        if self.cast_target:
+            self.hooked_fish = self.fish_population.choose_biter(
+                self.cast_target[0], self.cast_target[1], self.current_bait)
+        if self.hooked_fish is not None:
+            fish_species = self.fish_population.species[self.hooked_fish]
             self.fishing_minigame.start_fishing(fish_species)
             self.state = GameState.FISHING
             
@@ -932,6 +5207,19 @@ class Game:
             if self.cast_target:
                 self.effects.add_ripple(self.cast_target[0], self.cast_target[1])
             
+    def start_export(self):
+        # Export the catch history on a worker thread so the frame never waits
+        if self.export_job and not self.export_job.done:
+            return
+        self.history.flush()
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output_path = os.path.join(EXPORT_DIR, f"catches-{stamp}.csv.gz")
+        self.export_job = ExportJob(self.history.path, output_path)
+        self.export_job.start()
+        self.catch_message = "Exporting catch history..."
+        self.catch_message_timer = 180
+        
+    @traced("Game.draw_fish_caught")
     def draw_fish_caught(self):
         if not self.caught_fish:
             return
@@ -939,12 +5227,6 @@ class Game:
         fish = self.caught_fish[-1]  # Get the last caught fish
         fish_data = FISH_SPECIES[fish.species]
         
-        # Draw semi-transparent overlay
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(180)
-        overlay.fill(BLACK)
-        self.screen.blit(overlay, (0, 0))
-        
         # Draw fish inspection panel
         panel_rect = pygame.Rect(SCREEN_WIDTH//2 - 300, SCREEN_HEIGHT//2 - 250, 600, 500)
         pygame.draw.rect(self.screen, DARK_GREEN, panel_rect)
@@ -962,18 +5244,31 @@ class Game:
         
         title = self.font.render(fish.species, True, color)
         self.screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, SCREEN_HEIGHT//2 - 220))
+        portrait = PORTRAITS.portrait(fish.species)
+        if portrait is not None:
+            self.screen.blit(portrait, (panel_rect.x + 15, panel_rect.y + 10))
         
-        # Rarity badge
+        # Rarity badge, plus a top 1% badge against all catches of the species
+        species_stats = self.statistics.get(fish.species)
         rarity_text = self.small_font.render(fish.rarity.value, True, WHITE)
-        self.screen.blit(rarity_text, (SCREEN_WIDTH//2 - rarity_text.get_width()//2, SCREEN_HEIGHT//2 - 190))
-        
+        rarity_x = SCREEN_WIDTH//2 - rarity_text.get_width()//2
+        self.screen.blit(rarity_text, (rarity_x, SCREEN_HEIGHT//2 - 190))
+        if species_stats.is_top_percent(fish.weight):
+            badge_text = self.small_font.render("TOP 1%", True, GOLD)
+            self.screen.blit(badge_text, (rarity_x + rarity_text.get_width() + 15, SCREEN_HEIGHT//2 - 190))
+            
         # Fish stats
         y_offset = SCREEN_HEIGHT//2 - 150
+        weight_rank = species_stats.weight.rank(fish.weight) * 100
+        length_rank = species_stats.length.rank(fish.length) * 100
+        bait_hits = species_stats.bait_hits.get(fish.bait_used, 0)
         stats = [
-            f"Weight: {fish.weight:.1f} kg",
-            f"Length: {fish.length:.1f} cm",
+            f"Weight: {fish.weight:.1f} kg (heavier than {weight_rank:.0f}%)",
+            f"Length: {fish.length:.1f} cm (longer than {length_rank:.0f}%)",
+            f"Your {species_stats.count} catches: p50 {species_stats.weight.quantile(0.5):.1f} | "
+            f"p90 {species_stats.weight.quantile(0.9):.1f} | p99 {species_stats.weight.quantile(0.99):.1f} kg",
             f"Location: {fish_data['location']}",
-            f"Bait Used: {fish.bait_used}",
+            f"Bait Used: {fish.bait_used} ({bait_hits} of {species_stats.count} catches)",
             f"Difficulty: {fish.difficulty}/10"
         ]
         
@@ -1012,108 +5307,85 @@ class Game:
         release_text = self.font.render("Press R to RELEASE", True, RED)
         continue_text = self.font.render("Press SPACE to continue", True, WHITE)
         
+        # Input-to-judgement latency of the hook press
+        latencies = self.fishing_minigame.latencies
+        if latencies:
+            latency_text = self.small_font.render(
+                f"Hook judged {latencies[-1]} ms after the key press was read "
+                f"(avg {sum(latencies) / len(latencies):.1f} ms, max {max(latencies)} ms)", True, LIGHT_GRAY)
+            self.screen.blit(latency_text, (SCREEN_WIDTH//2 - latency_text.get_width()//2, SCREEN_HEIGHT//2 + 225))
+        
         self.screen.blit(keep_text, (SCREEN_WIDTH//2 - 250, SCREEN_HEIGHT//2 + 150))
         self.screen.blit(release_text, (SCREEN_WIDTH//2 + 50, SCREEN_HEIGHT//2 + 150))
         self.screen.blit(continue_text, (SCREEN_WIDTH//2 - continue_text.get_width()//2, SCREEN_HEIGHT//2 + 200))
         
+    @traced("Game.draw_quest")
     def draw_quest(self):
-        self.screen.fill(DARK_GREEN)
-        
-        title = self.font.render("Quests & Rewards", True, WHITE)
-        self.screen.blit(title, (SCREEN_WIDTH//2 - 100, 50))
-        
-        y_pos = 120
-        for quest in self.quests:
-            # Quest name and progress
-            color = GREEN if quest.completed else WHITE
-            quest_text = f"{quest.name}: {quest.current}/{quest.target}"
-            text = self.font.render(quest_text, True, color)
-            self.screen.blit(text, (50, y_pos))
-            
-            # Quest description
-            desc_text = self.small_font.render(quest.description, True, LIGHT_GRAY)
-            self.screen.blit(desc_text, (50, y_pos + 25))
-            
-            # Reward info
-            if not quest.completed:
-                reward_text = f"Reward: {quest.reward.name} - {quest.reward.description}"
-                text = self.small_font.render(reward_text, True, YELLOW)
-                self.screen.blit(text, (50, y_pos + 45))
-            else:
-                completed_text = "COMPLETED!"
-                text = self.small_font.render(completed_text, True, GREEN)
-                self.screen.blit(text, (50, y_pos + 45))
-                
-            y_pos += 80
-            
-        # Show earned rewards
-        if self.rewards_earned:
-            rewards_title = self.font.render("Earned Rewards:", True, GOLD)
-            self.screen.blit(rewards_title, (50, y_pos + 20))
-            
-            for i, reward in enumerate(self.rewards_earned):
-                reward_text = f"{reward.name}: {reward.description}"
-                text = self.small_font.render(reward_text, True, WHITE)
-                self.screen.blit(text, (50, y_pos + 50 + i * 25))
-                
-        back_text = self.font.render("Press ESC to return", True, WHITE)
-        self.screen.blit(back_text, (SCREEN_WIDTH//2 - 100, SCREEN_HEIGHT - 50))
+        self.quest_screen.draw(self.screen)
         
+    @traced("Game.draw_menu")
     def draw_menu(self):
-        self.screen.fill(DARK_GREEN)
-        
-        # Draw forest background elements
-        for i in range(10):
-            x = random.randint(0, SCREEN_WIDTH)
-            y = random.randint(0, SCREEN_HEIGHT//3)
-            pygame.draw.rect(self.screen, BROWN, (x, y, 15, 40))
-            pygame.draw.circle(self.screen, GREEN, (x + 7, y), 20)
-        
-        title = self.font.render("European Forest Fishing Adventure", True, WHITE)
-        self.screen.blit(title, (SCREEN_WIDTH//2 - 250, 100))
-        
-        subtitle = self.small_font.render("A 2D Fishing Adventure", True, LIGHT_GRAY)
-        self.screen.blit(subtitle, (SCREEN_WIDTH//2 - 100, 140))
-        
-        for i, option in enumerate(self.menu_options):
-            color = YELLOW if i == self.menu_selection else WHITE
-            text = self.font.render(option, True, color)
-            self.screen.blit(text, (SCREEN_WIDTH//2 - 100, 250 + i * 50))
+        self.menu_screen.draw(self.screen)
             
-        # Draw instructions
-        instructions = [
-            "Use UP/DOWN arrows to navigate",
-            "Press ENTER to select",
-            "ESC to return to menu"
-        ]
+    @traced("Game.draw_modal_backdrop")
+    def draw_modal_backdrop(self):
+        if self.modal_backdrop.snapshot is None:
+            # First modal frame: draw the world one last time and freeze it
+            self.draw_playing()
+            self.modal_backdrop.capture(self.screen)
+            if self.modal_backdrop.water_ms:
+                # The shore and the player overlap the water band; keep them
+                # apart from the background so the water can move in between
+                under = ASSETS.new(self.screen.get_size())
+                self.world.draw_backdrop(under)
+                over = ASSETS.new(self.screen.get_size())
+                over.fill(CHUNK_COLORKEY)
+                over.set_colorkey(CHUNK_COLORKEY)
+                self.world.draw_shore(over)
+                self.player.draw(over, self.world.camera_x)
+                self.modal_backdrop.capture_water(self.layers.layers["water"], under, over)
+        self.modal_backdrop.draw(self.screen, MODAL_DARKNESS[self.state], self.layers.layers["water"])
         
-        for i, instruction in enumerate(instructions):
-            text = self.small_font.render(instruction, True, LIGHT_GRAY)
-            self.screen.blit(text, (SCREEN_WIDTH//2 - 150, SCREEN_HEIGHT - 150 + i * 25))
+    def render_effects(self, surface):
+        # Runs on a layer worker; only reads simulation state, which the
+        # main thread leaves alone until the layer is composited. Draws
+        # into the effects compositor's own layer.
+        self.effects.draw(self.world.camera_x)
+        # Shadows of the fish swimming near the surface
+        self.fish_population.draw_shadows(self.effects.compositor, self.world.view_rect())
             
+    @traced("Game.draw_playing")
     def draw_playing(self):
-        # Draw background
-        self.screen.blit(self.background, (0, 0))
+        # Water and effects render on the pool while this thread renders the
+        # text and draws the background chunks; each is only waited for when
+        # it is composited. Fish shadows come from the portrait atlas, which
+        # only the main thread may load.
+        PORTRAITS.load()
+        self.layers.submit("water", "effects")
         
-        # Update and draw visual effects
-        self.effects.update()
-        self.effects.draw(self.screen)
-        
-        # Add random fish shadows in water
-        self.fish_shadow_timer += 1
-        if self.fish_shadow_timer > 120:  # Every 2 seconds
-            self.fish_shadow_timer = 0
-            if random.random() < 0.3:  # 30% chance
-                x = random.randint(100, SCREEN_WIDTH - 100)
-                y = random.randint(SCREEN_HEIGHT - 180, SCREEN_HEIGHT - 50)
-                size = random.randint(20, 60)
-                self.effects.add_fish_shadow(x, y, size)
+        # Text is rendered here because fonts are not thread-safe
+        text_surface = None
+        if self.catch_message_timer > 0:
+            alpha = int(255 * (self.catch_message_timer / 180))
+            if alpha > 0:
+                text_surface = self.font.render(self.catch_message, True, WHITE)
+                text_rect = text_surface.get_rect(center=(SCREEN_WIDTH//2, 100))
+                message_box = pygame.Rect(text_rect.x - 10, text_rect.y - 5,
+                                          text_rect.width + 20, text_rect.height + 10)
+        hud = self.render_hud()
+        
+        self.layers.composite(self.screen, "background", "water", "shore")
+        camera_x = self.world.camera_x
+        
+        # Effects stay under the player and the HUD, as they always were
+        self.layers.composite(self.screen, "effects")
         
         # Draw casting target indicator
         if self.is_casting and self.cast_target:
             # Draw target circle
-            pygame.draw.circle(self.screen, (255, 255, 0), self.cast_target, 15, 2)
-            pygame.draw.circle(self.screen, (255, 255, 0), self.cast_target, 5)
+            target = (self.cast_target[0] - camera_x, self.cast_target[1])
+            pygame.draw.circle(self.screen, (255, 255, 0), target, 15, 2)
+            pygame.draw.circle(self.screen, (255, 255, 0), target, 5)
             
         # Draw mouse cursor when not casting
         if self.state == GameState.PLAYING and not self.player.is_casting:
@@ -1123,31 +5395,28 @@ class Game:
             pygame.draw.line(self.screen, WHITE, (x, y - 10), (x, y + 10), 2)
             
         # Draw player
-        self.player.draw(self.screen)
+        self.player.draw(self.screen, camera_x)
         
-        # Draw catch message
-        if self.catch_message_timer > 0:
-            self.catch_message_timer -= 1
-            alpha = int(255 * (self.catch_message_timer / 180))
-            if alpha > 0:
-                # Draw background for message
-                text_surface = self.font.render(self.catch_message, True, WHITE)
-                text_rect = text_surface.get_rect(center=(SCREEN_WIDTH//2, 100))
-                pygame.draw.rect(self.screen, (0, 0, 0, 128), 
-                               (text_rect.x - 10, text_rect.y - 5, text_rect.width + 20, text_rect.height + 10))
-                self.screen.blit(text_surface, text_rect)
+        if text_surface is not None:
+            # Draw background for message
+            self.screen.blit(self.catch_message_shade, message_box,
+                             (0, 0, message_box.width, message_box.height))
+            self.screen.blit(text_surface, text_rect)
+        
+        for text, position in hud:
+            self.screen.blit(text, position)
+            
+    def render_hud(self):
+        # (surface, position) for the status lines drawn over the world
+        hud = []
         
         # Draw UI with rarity colors
-        info_text = f"Fish Caught: {len(self.caught_fish)} | Bait: {self.current_bait}"
-        text = self.small_font.render(info_text, True, WHITE)
-        self.screen.blit(text, (10, 10))
+        info_text = (f"Fish Caught: {len(self.caught_fish)} | Bait: {self.current_bait} | "
+                     f"Location: {LOCATIONS[self.current_location].name}")
+        hud.append((self.small_font.render(info_text, True, WHITE), (10, 10)))
         
         # Draw rarity statistics
-        rarity_counts = {}
-        for fish in self.caught_fish:
-            rarity = fish.rarity.value
-            rarity_counts[rarity] = rarity_counts.get(rarity, 0) + 1
-            
+        rarity_counts = self.catch_summary()[0]
         y_offset = 30
         for rarity, count in rarity_counts.items():
             color = WHITE
@@ -1160,157 +5429,351 @@ class Game:
             elif rarity == "Record Fish": color = PURPLE
             
             rarity_text = f"{rarity}: {count}"
-            text = self.small_font.render(rarity_text, True, color)
-            self.screen.blit(text, (10, y_offset))
+            hud.append((self.small_font.render(rarity_text, True, color), (10, y_offset)))
             y_offset += 20
         
         # Draw controls
-        controls = "WASD: Move | SPACE: Cast | Mouse: Aim | C: Cancel | I: Inventory | G: Glossary | Q: Quests"
-        text = self.small_font.render(controls, True, WHITE)
-        self.screen.blit(text, (10, SCREEN_HEIGHT - 30))
+        controls = "WASD: Move | SPACE: Cast | Mouse: Aim | C: Cancel | I: Inventory | G: Glossary | Q: Quests | L: Travel"
+        hud.append((self.small_font.render(controls, True, WHITE), (10, SCREEN_HEIGHT - 30)))
         
         # Draw casting status
         if self.player.is_casting:
             cast_text = f"Casting... {int(self.player.cast_progress * 100)}%"
-            text = self.small_font.render(cast_text, True, YELLOW)
-            self.screen.blit(text, (SCREEN_WIDTH - 200, 10))
+            hud.append((self.small_font.render(cast_text, True, YELLOW), (SCREEN_WIDTH - 200, 10)))
         elif self.player.animation_state == "fishing":
             fish_text = "Fishing... Press C to stop"
-            text = self.small_font.render(fish_text, True, GREEN)
-            self.screen.blit(text, (SCREEN_WIDTH - 200, 10))
+            hud.append((self.small_font.render(fish_text, True, GREEN), (SCREEN_WIDTH - 200, 10)))
+        return hud
         
+    @traced("Game.draw_inventory")
     def draw_inventory(self):
-        self.screen.fill(DARK_GREEN)
-        
-        title = self.font.render("Inventory - Caught Fish", True, WHITE)
-        self.screen.blit(title, (SCREEN_WIDTH//2 - 150, 50))
-        
-        if not self.caught_fish:
-            text = self.font.render("No fish caught yet!", True, WHITE)
-            self.screen.blit(text, (SCREEN_WIDTH//2 - 100, 200))
-        else:
-            # Sort fish by rarity
-            sorted_fish = sorted(self.caught_fish, key=lambda f: list(Rarity).index(f.rarity), reverse=True)
-            
-            for i, fish in enumerate(sorted_fish[-15:]):  # Show last 15
-                y_pos = 120 + i * 50
-                if y_pos < SCREEN_HEIGHT - 100:
-                    # Color based on rarity
-                    color = WHITE
-                    if fish.rarity == Rarity.CARDBOARD: color = GRAY
-                    elif fish.rarity == Rarity.BRONZE: color = BRONZE
-                    elif fish.rarity == Rarity.SILVER: color = SILVER
-                    elif fish.rarity == Rarity.GOLD: color = GOLD
-                    elif fish.rarity == Rarity.DIAMOND: color = DIAMOND
-                    elif fish.rarity == Rarity.TROPHY: color = ORANGE
-                    elif fish.rarity == Rarity.RECORD: color = PURPLE
-                    
-                    fish_text = f"{fish.species} - {fish.weight:.1f}kg ({fish.rarity.value})"
-                    text = self.small_font.render(fish_text, True, color)
-                    self.screen.blit(text, (50, y_pos))
-                    
-                    # Show bait used
-                    bait_text = f"Bait: {fish.bait_used}"
-                    text = self.small_font.render(bait_text, True, LIGHT_GRAY)
-                    self.screen.blit(text, (50, y_pos + 15))
-                    
-        back_text = self.font.render("Press ESC to return", True, WHITE)
-        self.screen.blit(back_text, (SCREEN_WIDTH//2 - 100, SCREEN_HEIGHT - 50))
+        self.inventory_screen.draw(self.screen)
         
+    @traced("Game.draw_glossary")
     def draw_glossary(self):
-        self.screen.fill(DARK_GREEN)
-        
-        title = self.font.render("Fish Glossary", True, WHITE)
-        self.screen.blit(title, (SCREEN_WIDTH//2 - 100, 50))
-        
-        # Sort by rarity
-        sorted_species = sorted(FISH_SPECIES.items(), 
-                              key=lambda x: list(Rarity).index(x[1]['rarity']), reverse=True)
-        
-        y_pos = 120
-        for species, data in sorted_species:
-            if y_pos < SCREEN_HEIGHT - 100:
-                # Color based on rarity
-                color = WHITE
-                if data['rarity'] == Rarity.CARDBOARD: color = GRAY
-                elif data['rarity'] == Rarity.BRONZE: color = BRONZE
-                elif data['rarity'] == Rarity.SILVER: color = SILVER
-                elif data['rarity'] == Rarity.GOLD: color = GOLD
-                elif data['rarity'] == Rarity.DIAMOND: color = DIAMOND
-                elif data['rarity'] == Rarity.TROPHY: color = ORANGE
-                elif data['rarity'] == Rarity.RECORD: color = PURPLE
-                
-                species_text = f"{species} - {data['rarity'].value}"
-                text = self.small_font.render(species_text, True, color)
-                self.screen.blit(text, (50, y_pos))
-                
-                desc_text = f"Location: {data['location']} | Weight: {data['weight_range'][0]}-{data['weight_range'][1]}kg | Difficulty: {data['difficulty']}"
-                text = self.small_font.render(desc_text, True, LIGHT_GRAY)
-                self.screen.blit(text, (50, y_pos + 20))
-                
-                bait_text = f"Bait: {', '.join(data['bait'])}"
-                text = self.small_font.render(bait_text, True, LIGHT_GRAY)
-                self.screen.blit(text, (50, y_pos + 35))
-                
-                y_pos += 80
-                
-        back_text = self.font.render("Press ESC to return", True, WHITE)
-        self.screen.blit(back_text, (SCREEN_WIDTH//2 - 100, SCREEN_HEIGHT - 50))
+        self.glossary_screen.draw(self.screen)
         
     def run(self):
+        instrumentation = self.instrumentation
         running = True
+        drawn_state = None
         while running:
-            running = self.handle_events()
-            
-            keys = pygame.key.get_pressed()
+            # Idle screens block until input or a timer instead of spinning
+            policy = self.idle_policies.get(self.state)
+            idle = policy is not None and policy.enabled and not self.is_animating()
+            events = self.waiting_events
+            self.waiting_events = []
+            redraw = True
+            if idle and not events:
+                event = pygame.event.wait(policy.wake_ms)
+                event.received_at = pygame.time.get_ticks()
+                events = self.read_events()
+                if event.type == pygame.NOEVENT:
+                    redraw = bool(events) or policy.redraw_on_wake
+                else:
+                    events.insert(0, event)
+            else:
+                events += self.read_events()
+            frame_start = time.perf_counter()
+                    
+            instrumentation.begin_frame()
+            TRACER.begin_frame()
+            with instrumentation.phase("events"):
+                running = self.handle_events(events)
             
-            if self.state == GameState.PLAYING:
-                self.player.move(keys)
+            with instrumentation.phase("update"):
+                self.update()
                 
-                # Update casting
-                if self.player.is_casting:
-                    if self.player.update_casting():
-                        self.start_fishing()
-                    
-            elif self.state == GameState.FISHING:
-                result = self.fishing_minigame.update()
-                if result == "escape":
-                    self.state = GameState.PLAYING
-                    self.player.stop_fishing()
-                    # Play escape sound
-                    self.sound_manager.play_sound('escape')
-                    # Add escape effect
-                    for _ in range(5):
-                        self.effects.add_particle(
-                            SCREEN_WIDTH//2, SCREEN_HEIGHT//2,
-                            (255, 0, 0),
-                            (random.uniform(-5, 5), random.uniform(-5, 5))
-                        )
-                    
-            # Draw
-            if self.state == GameState.MENU:
-                self.draw_menu()
-            elif self.state == GameState.PLAYING:
-                self.draw_playing()
-            elif self.state == GameState.FISHING:
-                self.draw_playing()
-                self.fishing_minigame.draw(self.screen)
-            elif self.state == GameState.FISH_CAUGHT:
-                self.draw_playing()
-                self.draw_fish_caught()
-            elif self.state == GameState.INVENTORY:
-                self.draw_inventory()
-            elif self.state == GameState.GLOSSARY:
-                self.draw_glossary()
-            elif self.state == GameState.QUEST:
-                self.draw_quest()
+            # Snapshot changed state for the background saver (bounded per frame)
+            with instrumentation.phase("autosave"), TRACER.span("AutosaveWorker.tick"):
+                self.autosave.tick(self)
                 
-            pygame.display.flip()
-            self.clock.tick(FPS)
+            if not redraw and self.state == drawn_state:
+                # Nothing changed on screen: skip drawing and the flip
+                instrumentation.end_frame()
+                TRACER.end_frame()
+                self.gc_policy.between_frames(idle, frame_start)
+                running = self.frame_done(frame_start) and running
+                self.clock.tick()
+                self.frame_tick = time.perf_counter()
+                continue
+            drawn_state = self.state
+            if self.state not in MODAL_DARKNESS and self.modal_backdrop.snapshot is not None:
+                # Modals opened after this see the world as it is then
+                self.modal_backdrop.invalidate()
+            
+            # Draw
+            with instrumentation.phase(self.draw_phase_names[self.state]):
+                if self.state == GameState.MENU:
+                    self.draw_menu()
+                elif self.state == GameState.PLAYING:
+                    self.draw_playing()
+                elif self.state == GameState.FISHING:
+                    self.draw_modal_backdrop()
+                    with instrumentation.phase("draw:minigame"):
+                        self.fishing_minigame.draw(self.screen)
+                elif self.state == GameState.FISH_CAUGHT:
+                    self.draw_modal_backdrop()
+                    with instrumentation.phase("draw:inspection"):
+                        self.draw_fish_caught()
+                elif self.state == GameState.INVENTORY:
+                    self.draw_inventory()
+                elif self.state == GameState.GLOSSARY:
+                    self.draw_glossary()
+                elif self.state == GameState.QUEST:
+                    self.draw_quest()
+            
+            with TRACER.span("CaptureSystem.tick"):
+                self.capture.tick(self.screen)
+            with instrumentation.phase("flip"), TRACER.span("display.flip"):
+                if self.screen.get_size() != self.display.get_size():
+                    pygame.transform.scale(self.screen, self.display.get_size(), self.display)
+                elif self.screen is not self.display:
+                    self.display.blit(self.screen, (0, 0))
+                pygame.display.flip()
+            instrumentation.end_frame()
+            TRACER.end_frame()
+            self.gc_policy.between_frames(idle, frame_start)
+            running = self.frame_done(frame_start) and running
+            if idle:
+                # The wait already paced this frame; just restart the frame timer
+                self.clock.tick()
+                self.frame_tick = time.perf_counter()
+            else:
+                self.wait_for_frame()
             
+        self.autosave.save_now(self)
+        if self.profile_store is not None:
+            self.profile_store.close()
+        self.history.close()
+        self.layers.close()
+        self.capture.close()
+        self.sound_manager.close()
+        if self.tournament is not None:
+            self.tournament.close()
+        if self.capture.encoded or self.capture.dropped:
+            print(f"Capture: {self.capture.summary()}")
+        instrumentation.close()
+        self.gc_policy.close()
+        if ASSETS.audit is not None:
+            ASSETS.audit.report()
         pygame.quit()
         sys.exit()
+        
+    def frame_done(self, frame_start):
+        # Counts the frame, drawn or not, and records its work time (not the
+        # wait for the next one). Returns False once max_frames is reached
+        self.frames += 1
+        if self.frame_times is not None:
+            self.frame_times.append((time.perf_counter() - frame_start) * 1000)
+        return self.max_frames is None or self.frames < self.max_frames
+        
+    def frame_stats(self):
+        times = sorted(self.frame_times or ())
+        if not times:
+            return {"frames": self.frames}
+        def percentile(fraction):
+            return round(times[min(len(times) - 1, int(fraction * len(times)))], 3)
+        mean = sum(times) / len(times)
+        return {
+            "frames": len(times),
+            "mean_ms": round(mean, 3),
+            "p50_ms": percentile(0.5),
+            "p90_ms": percentile(0.9),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(times[-1], 3),
+            "work_fps": round(1000 / mean, 1) if mean else None
+        }
+        
+    def logical_pos(self, pos):
+        # Window coordinates to the SCREEN_WIDTH x SCREEN_HEIGHT layout
+        return int(pos[0] * self.pointer_scale[0]), int(pos[1] * self.pointer_scale[1])
+        
+    def is_animating(self):
+        # Whether the current screen has anything moving or pending that
+        # needs frames at full rate
+        return (self.catch_message_timer > 0 or
+                bool(self.effects.ripples) or
+                bool(self.effects.particles) or
+                self.player.is_casting or
+                self.autosave.copying is not None or
+                (self.export_job is not None and not self.export_job.reported))
+        
+    @traced("Game.update")
+    def update(self):
+        keys = pygame.key.get_pressed()
+        
+        # Fish keep swimming and effects and the catch message run down
+        # whatever screen is shown, so nothing is left over behind a modal
+        self.fish_population.update()
+        self.effects.update()
+        if self.catch_message_timer > 0:
+            self.catch_message_timer -= 1
+        
+        if self.export_job and self.export_job.done and not self.export_job.reported:
+            self.export_job.reported = True
+            if self.export_job.error:
+                self.catch_message = f"Export failed: {self.export_job.error}"
+            else:
+                self.catch_message = f"Exported {self.export_job.rows} rows"
+                if self.export_job.skipped:
+                    self.catch_message += f", skipped {self.export_job.skipped} damaged lines"
+            self.catch_message_timer = 180
+            
+        if self.tournament is not None and self.tournament.notices:
+            # Announce the best placing since the last frame
+            notices = self.tournament.notices
+            species, rank, weight = min((notices.popleft() for _ in range(len(notices))),
+                                        key=lambda notice: notice[1])
+            self.catch_message = f"Tournament: #{rank} on the {species} board ({weight:.1f}kg)!"
+            self.catch_message_timer = 180
+        
+        if self.travel_target is not None:
+            self.update_travel()
+            
+        if self.state == GameState.PLAYING:
+            self.player.move(keys, self.world.width)
+            self.world.follow(self.player.x + self.player.width // 2)
+            
+            # Update casting
+            if self.player.is_casting:
+                if self.player.update_casting():
+                    self.start_fishing()
+                
+        elif self.state == GameState.FISHING:
+            result = self.fishing_minigame.update()
+            if result == "escape":
+                self.state = GameState.PLAYING
+                self.player.stop_fishing()
+                # Play escape sound
+                self.sound_manager.play_sound('escape')
+                # Add escape effect
+                for _ in range(5):
+                    self.effects.add_particle(
+                        self.world.camera_x + SCREEN_WIDTH//2, SCREEN_HEIGHT//2,
+                        (255, 0, 0),
+                        (random.uniform(-5, 5), random.uniform(-5, 5))
+                    )
+
+START_STATES = {state.value: state for state in (GameState.MENU, GameState.PLAYING,
+                                                  GameState.INVENTORY, GameState.GLOSSARY,
+                                                  GameState.QUEST)}
+
+def parse_window_size(text):
+    try:
+        width, height = (int(part) for part in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {text!r}")
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError(f"window size must be positive, got {text!r}")
+    return width, height
+
+def use_save_dir(directory):
+    # Keep the autosave, history, profiles, captures and exports in directory
+    # instead of SAVE_DIR. The sound and portrait caches stay where they are:
+    # they are named by what they contain, so sharing them is always safe.
+    global SAVE_DIR, HISTORY_PATH, EXPORT_DIR, AUTOSAVE_PATH, PROFILE_DB_PATH, CAPTURE_DIR
+    SAVE_DIR = directory
+    HISTORY_PATH = os.path.join(directory, "history.jsonl")
+    EXPORT_DIR = os.path.join(directory, "exports")
+    AUTOSAVE_PATH = os.path.join(directory, "autosave.json")
+    PROFILE_DB_PATH = os.path.join(directory, "profiles.db")
+    CAPTURE_DIR = os.path.join(directory, "captures")
+
+def use_headless_drivers():
+    # pygame was initialized on import with the default drivers; restart the
+    # display and mixer on the dummy ones so no window or audio device is needed
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    pygame.display.quit()
+    pygame.display.init()
+    pygame.mixer.quit()
+    try:
+        pygame.mixer.init()
+    except pygame.error:
+        pass
+
+def play_main(argv):
+    parser = argparse.ArgumentParser(prog="main.py",
+                                     description="European Forest Fishing Adventure",
+                                     epilog="Use 'main.py export --help' for exporting the catch history")
+    parser.add_argument("--headless", action="store_true",
+                        help="Run without a window or audio device (dummy SDL drivers)")
+    parser.add_argument("--frames", type=int, metavar="N", help="Quit after N frames")
+    parser.add_argument("--uncapped", action="store_true",
+                        help=f"Do not limit to {FPS} FPS or wait on idle screens")
+    parser.add_argument("--seed", help="Seed the random generators for a repeatable run")
+    parser.add_argument("--start-state", choices=sorted(START_STATES),
+                        help="Screen to start on (default: menu)")
+    parser.add_argument("--save-dir", metavar="DIR",
+                        help=f"Keep the autosave, history and profiles here (default: {SAVE_DIR}; "
+                             "a temporary directory with --headless, --seed or --start-state)")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--window", type=parse_window_size, metavar="WxH",
+                      help="Window size; the game is scaled to fit")
+    size.add_argument("--scale", type=float, metavar="F", help="Window size as a multiple of "
+                      f"{SCREEN_WIDTH}x{SCREEN_HEIGHT}")
+    parser.add_argument("--profile", nargs="?", const="fishing.pstats", metavar="PATH",
+                        help="Run under cProfile and write the stats here (default: fishing.pstats)")
+    parser.add_argument("--stats-json", action="store_true",
+                        help="Print frame-time percentiles as JSON at exit")
+    args = parser.parse_args(argv)
+    if args.frames is not None and args.frames <= 0:
+        parser.error("--frames must be positive")
+    if args.scale is not None and args.scale <= 0:
+        parser.error("--scale must be positive")
+    
+    if args.headless:
+        use_headless_drivers()
+    # Test and benchmark runs must not restore or overwrite the player's save
+    throwaway = None
+    if args.save_dir is not None:
+        use_save_dir(args.save_dir)
+    elif args.headless or args.seed is not None or args.start_state is not None:
+        throwaway = tempfile.mkdtemp(prefix="forest_fishing-")
+        use_save_dir(throwaway)
+    if args.seed is not None:
+        random.seed(args.seed)
+    window = args.window
+    if args.scale is not None:
+        window = (max(1, round(SCREEN_WIDTH * args.scale)), max(1, round(SCREEN_HEIGHT * args.scale)))
+    game = Game(seed=args.seed, window=window)
+    game.state = START_STATES[args.start_state or "menu"]
+    game.max_frames = args.frames
+    if args.uncapped:
+        game.fps_cap = 0
+        game.idle_policies.clear()
+    if args.stats_json:
+        game.frame_times = []
+        
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        game.run()
+    except SystemExit:
+        # run() quits pygame and exits when the game ends
+        pass
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print(f"Profile written to {args.profile} (python -m pstats {args.profile})",
+                  file=sys.stderr)
+        if throwaway is not None:
+            shutil.rmtree(throwaway, ignore_errors=True)
+    if args.stats_json:
+        print(json.dumps(game.frame_stats(), indent=2))
+    return 0
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "export":
+        return export_main(argv[1:])
+    return play_main(argv)
 
 if __name__ == "__main__":
-    game = Game()
-    game.run() 
+    sys.exit(main())
+
@@ -0,0 +1,103 @@
+import os
+import random
+import threading
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import main
+from main import FishingMinigame
+
+# The hook verdict must depend only on when the key was pressed, not on the
+# frame rate: a press is handled on the first frame after it happens, and
+# set_hook() is given the press time. Presses are replayed at 23, 60 and
+# 144 FPS and every verdict has to come out the same.
+
+FRAME_RATES = (23, 60, 144)
+PRESS_TIMES = [t * 37 for t in range(1, 270)]  # ms after the bite, up to ~10 s
+
+def start(seed):
+    minigame = FishingMinigame()
+    random.seed(seed)
+    minigame.start_fishing("Northern Pike", now=0)
+    return minigame
+
+def replay(fps, pressed_at, seed):
+    # Run frames until the one that handles the press, then judge it
+    minigame = start(seed)
+    frame_ms = 1000 / fps
+    frame = 0
+    while True:
+        now = frame * frame_ms
+        if minigame.update(now) == "escape":
+            return False
+        if now >= pressed_at:
+            return minigame.set_hook(pressed_at)
+        frame += 1
+
+def expected(pressed_at, seed):
+    minigame = start(seed)
+    position = minigame.bar_position(pressed_at)
+    in_time = pressed_at < minigame.max_escape_time
+    return in_time and minigame.target_zone_start <= position <= minigame.target_zone_end
+
+def test_verdict_does_not_depend_on_frame_rate():
+    for seed in range(5):
+        verdicts = []
+        for pressed_at in PRESS_TIMES:
+            verdict = {fps: replay(fps, pressed_at, seed) for fps in FRAME_RATES}
+            assert set(verdict.values()) == {expected(pressed_at, seed)}, (seed, pressed_at, verdict)
+            verdicts.append(verdict[60])
+        # The replay covers both hits and misses
+        assert any(verdicts) and not all(verdicts)
+
+def test_judging_at_the_frame_would_depend_on_frame_rate():
+    # What the test guards against: judging the bar where it is on the
+    # handling frame gives different verdicts at 23 FPS
+    minigame = start(0)
+    frame_ms = 1000 / 23
+    differ = 0
+    for pressed_at in PRESS_TIMES:
+        handled_at = -(-pressed_at // frame_ms) * frame_ms
+        at_frame = minigame.target_zone_start <= minigame.bar_position(handled_at) <= minigame.target_zone_end
+        differ += at_frame != expected(pressed_at, 0)
+    assert differ
+
+def test_late_press_misses():
+    minigame = start(0)
+    assert not minigame.set_hook(minigame.max_escape_time)
+    assert not minigame.is_active
+
+def test_press_without_timestamp_records_no_latency():
+    minigame = start(0)
+    minigame.set_hook()
+    assert not minigame.latencies
+
+def test_press_is_stamped_when_read_during_the_frame_wait(tmp_path):
+    # pygame gives key presses no time; the frame wait reads the queue every
+    # EVENT_POLL_MS so a press is stamped close to when it happened, not
+    # when its frame ends
+    main.use_save_dir(str(tmp_path))
+    game = main.Game()
+    try:
+        game.fps_cap = 10  # 100 ms frames
+        posted = []
+        
+        def press():
+            posted.append(pygame.time.get_ticks())
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+        pygame.event.clear()
+        game.frame_tick = time.perf_counter()
+        threading.Timer(0.02, press).start()
+        game.wait_for_frame()
+        waited = pygame.time.get_ticks()
+        event, = [event for event in game.waiting_events if event.type == pygame.KEYDOWN]
+        assert event.received_at - posted[0] <= main.EVENT_POLL_MS + 10
+        assert waited - event.received_at >= 50
+    finally:
+        game.layers.close()
+        game.history.close()
+        game.sound_manager.close()
@@ -0,0 +1,326 @@
+import argparse
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+# Tournament service for fishing kiosks on a LAN. Kiosks connect over TCP
+# and speak newline-delimited JSON:
+#   {"type": "hello", "kiosk": name}
+#   {"type": "subscribe"}                     -> every board now, then changes
+#   {"type": "catches", "id": n, "catches": [{"species", "weight", "rarity",
+#                                             "time", "player", "id"}, ...]}
+#                                             -> {"type": "ack", "id": n}
+# The server pushes {"type": "board", "species": s, "top": [catch, ...]} to
+# subscribers, heaviest first, each catch tagged with the kiosk it came from.
+#
+#   python tournament_server.py serve [--host H] [--port P] [--top-k K]
+#   python tournament_server.py load --clients 2000 [--serve]
+
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 8765
+TOP_K = 10  # Catches kept per species leaderboard
+PUSH_INTERVAL = 0.05  # Seconds between pushes; boards changed meanwhile are sent once
+SUBSCRIBER_BUFFER_LIMIT = 1 << 20  # Bytes a subscriber may fall behind before it is dropped
+STATS_INTERVAL = 5.0  # Seconds between server throughput lines
+
+class Leaderboard:
+    # Top-K catches of one species in a min-heap: a new catch is compared
+    # with the lightest kept one in O(1) and replaces it in O(log K), so
+    # ingest cost does not depend on how many catches the tournament saw.
+    # Kiosks resend unacknowledged batches after a reconnect, so a catch
+    # already on the board is ignored. Catch ids are only unique per kiosk.
+    def __init__(self, k):
+        self.k = k
+        self.heap = []  # (weight, sequence, catch)
+        self.ids = set()  # (kiosk, id) of the catches on the board
+        self.sequence = itertools.count()
+        self.sorted = None
+        
+    def offer(self, catch):
+        # Returns whether the board changed
+        key = (catch["kiosk"], catch["id"])
+        if catch["id"] is not None and key in self.ids:
+            return False
+        item = (catch["weight"], next(self.sequence), catch)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, item)
+        elif item[0] > self.heap[0][0]:
+            evicted = heapq.heapreplace(self.heap, item)[2]
+            self.ids.discard((evicted["kiosk"], evicted["id"]))
+        else:
+            return False
+        self.ids.add(key)
+        self.sorted = None
+        return True
+        
+    def top(self):
+        if self.sorted is None:
+            self.sorted = [catch for _, _, catch in sorted(self.heap, reverse=True)]
+        return self.sorted
+
+class TournamentServer:
+    def __init__(self, top_k=TOP_K, push_interval=PUSH_INTERVAL):
+        self.top_k = top_k
+        self.push_interval = push_interval
+        self.boards = {}
+        self.subscribers = set()
+        self.dirty = set()  # Species changed since the last push
+        
+        # Statistics
+        self.connections = 0
+        self.catches = 0
+        self.rejected = 0
+        self.pushes = 0
+        self.dropped_subscribers = 0
+        
+    async def handle(self, reader, writer):
+        self.connections += 1
+        kiosk = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    kind = message["type"]
+                except (ValueError, KeyError, TypeError):
+                    self.rejected += 1
+                    continue
+                if kind == "hello":
+                    kiosk = str(message.get("kiosk"))
+                elif kind == "subscribe":
+                    self.subscribers.add(writer)
+                    writer.write(self.encode_boards(self.boards))
+                elif kind == "catches":
+                    self.ingest(message.get("catches", ()), kiosk)
+                    if "id" in message:
+                        writer.write(json.dumps({"type": "ack", "id": message["id"]}).encode() + b"\n")
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            self.subscribers.discard(writer)
+            writer.close()
+            
+    def ingest(self, catches, kiosk):
+        for catch in catches:
+            try:
+                species = str(catch["species"])
+                entry = {"species": species, "weight": float(catch["weight"]),
+                         "rarity": catch.get("rarity"), "time": catch.get("time"),
+                         "player": catch.get("player"), "kiosk": kiosk, "id": catch.get("id")}
+            except (KeyError, TypeError, ValueError):
+                self.rejected += 1
+                continue
+            self.catches += 1
+            board = self.boards.get(species)
+            if board is None:
+                board = self.boards[species] = Leaderboard(self.top_k)
+            if board.offer(entry):
+                self.dirty.add(species)
+                
+    def encode_boards(self, species):
+        return "".join(json.dumps({"type": "board", "species": s, "top": self.boards[s].top()},
+                                  separators=(",", ":")) + "\n" for s in species).encode()
+                                  
+    async def push_loop(self):
+        # Changes are coalesced for push_interval and encoded once for all
+        # subscribers; one that stops reading is dropped rather than
+        # buffered without limit
+        while True:
+            await asyncio.sleep(self.push_interval)
+            if not self.dirty:
+                continue
+            data = self.encode_boards(sorted(self.dirty))
+            self.dirty.clear()
+            for writer in list(self.subscribers):
+                if writer.transport.get_write_buffer_size() > SUBSCRIBER_BUFFER_LIMIT:
+                    self.subscribers.discard(writer)
+                    self.dropped_subscribers += 1
+                    writer.close()
+                else:
+                    writer.write(data)
+                    self.pushes += 1
+                    
+    async def stats_loop(self, interval=STATS_INTERVAL):
+        last_catches = 0
+        while True:
+            await asyncio.sleep(interval)
+            rate = (self.catches - last_catches) / interval
+            last_catches = self.catches
+            print(f"{self.connections} connections | {len(self.subscribers)} subscribers | "
+                  f"{rate:.0f} catches/s | {self.catches} total | {self.pushes} pushes | "
+                  f"{self.rejected} rejected | {self.dropped_subscribers} slow subscribers dropped",
+                  flush=True)
+                  
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port, limit=1 << 20)
+        print(f"Tournament server listening on {host}:{port}", flush=True)
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.push_loop(), self.stats_loop())
+
+def raise_file_limit():
+    # Thousands of sockets need more descriptors than the usual soft limit
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+class LoadClient:
+    # One simulated kiosk: sends a batch of catches every interval and
+    # measures the time until the server acknowledges it
+    def __init__(self, index, args, results):
+        self.index = index
+        self.args = args
+        self.results = results
+        self.sent = {}  # batch id -> send time
+        self.rng = random.Random(index)
+        
+    async def run(self, deadline):
+        args = self.args
+        try:
+            reader, writer = await asyncio.open_connection(args.host, args.port, limit=1 << 20)
+        except OSError:
+            self.results["failed"] += 1
+            return
+        writer.write(json.dumps({"type": "hello", "kiosk": f"load-{self.index}"}).encode() + b"\n")
+        if self.index < args.subscribers:
+            writer.write(b'{"type":"subscribe"}\n')
+        receiving = asyncio.ensure_future(self.receive(reader))
+        # Spread the first batches over one interval
+        await asyncio.sleep(self.rng.random() * args.interval)
+        batch_id = 0
+        try:
+            while time.monotonic() < deadline:
+                catches = [{"species": f"species-{self.rng.randrange(args.species)}",
+                            "weight": round(self.rng.lognormvariate(1.0, 1.0), 3),
+                            "rarity": "Bronze", "time": time.time(), "player": f"load-{self.index}",
+                            "id": f"load-{self.index}:{batch_id * args.batch + i}"}
+                           for i in range(args.batch)]
+                self.sent[batch_id] = time.perf_counter()
+                writer.write(json.dumps({"type": "catches", "id": batch_id, "catches": catches},
+                                        separators=(",", ":")).encode() + b"\n")
+                await writer.drain()
+                self.results["sent"] += args.batch
+                batch_id += 1
+                await asyncio.sleep(args.interval)
+            # Give the last acknowledgements a moment to arrive
+            await asyncio.sleep(min(1.0, args.interval))
+        except ConnectionError:
+            self.results["failed"] += 1
+        finally:
+            receiving.cancel()
+            writer.close()
+            
+    async def receive(self, reader):
+        results = self.results
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            message = json.loads(line)
+            if message["type"] == "ack":
+                start = self.sent.pop(message["id"], None)
+                if start is not None:
+                    results["latencies"].append((time.perf_counter() - start) * 1000)
+                    results["acked"] += self.args.batch
+            elif message["type"] == "board":
+                results["boards"] += 1
+
+async def run_load(args):
+    results = {"sent": 0, "acked": 0, "boards": 0, "failed": 0, "latencies": []}
+    deadline = time.monotonic() + args.duration
+    clients = [LoadClient(i, args, results) for i in range(args.clients)]
+    start = time.perf_counter()
+    # Connect in waves so the listen backlog is not overrun
+    tasks = []
+    for i in range(0, len(clients), 200):
+        tasks.extend(asyncio.ensure_future(client.run(deadline)) for client in clients[i:i + 200])
+        await asyncio.sleep(0.05)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    latencies = results["latencies"]
+    return {
+        "clients": args.clients,
+        "failed_clients": results["failed"],
+        "catches_sent": results["sent"],
+        "catches_acked": results["acked"],
+        "catches_per_second": round(results["acked"] / elapsed, 1),
+        "ack_ms_p50": round(percentile(latencies, 0.5), 2),
+        "ack_ms_p99": round(percentile(latencies, 0.99), 2),
+        "ack_ms_max": round(max(latencies, default=0.0), 2),
+        "board_pushes_received": results["boards"]
+    }
+
+def load_main(args):
+    raise_file_limit()
+    server = None
+    if args.serve:
+        # The server runs in its own process so it does not share a core with the load
+        server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "serve",
+                                   "--host", args.host, "--port", str(args.port)],
+                                  stdout=subprocess.DEVNULL)
+        time.sleep(1.0)
+    try:
+        summary = asyncio.run(run_load(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        for key, value in summary.items():
+            print(f"{key}: {value}")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fishing tournament server and load generator")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="Run the tournament server")
+    serve.add_argument("--host", default=DEFAULT_HOST)
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--top-k", type=int, default=TOP_K, help="Catches kept per species")
+    serve.add_argument("--push-interval", type=float, default=PUSH_INTERVAL)
+    load = commands.add_parser("load", help="Simulate many kiosks against a server")
+    load.add_argument("--host", default="127.0.0.1")
+    load.add_argument("--port", type=int, default=DEFAULT_PORT)
+    load.add_argument("--clients", type=int, default=1000)
+    load.add_argument("--subscribers", type=int, default=100, help="Clients that also subscribe to boards")
+    load.add_argument("--interval", type=float, default=1.0, help="Seconds between batches per client")
+    load.add_argument("--batch", type=int, default=1, help="Catches per batch")
+    load.add_argument("--species", type=int, default=50)
+    load.add_argument("--duration", type=float, default=10.0)
+    load.add_argument("--serve", action="store_true", help="Start a local server for the run")
+    load.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args(argv)
+    
+    if args.command == "serve":
+        raise_file_limit()
+        server = TournamentServer(args.top_k, args.push_interval)
+        try:
+            asyncio.run(server.serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+        return 0
+    return load_main(args)
+
+if __name__ == "__main__":
+    sys.exit(main())